@@ -0,0 +1,504 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Affichage des résultats du simulateur                          ║
+║   Sections de détail et fragments Streamlit à rerun partiel                ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Chaque section reçoit le résultat de simuler et les paramètres qu'elle
+affiche, rien d'autre. Les saisies qui ne touchent pas la paie (mot de passe,
+marge) vivent dans des fragments : les modifier ne relance que le fragment,
+pas le script (CSS, logo, sidebar, calcul de paie et autres sections).
+"""
+
+import streamlit as st
+
+from baremes import HEURES_MOIS, bareme_au
+from chrono_rerun import ETAPE_PAIE
+from cotisations import ASSIETTES
+from moteur_paie import facturer
+from monte_carlo import lois_standard, simuler_risque, QUANTILES
+
+MOT_DE_PASSE = "acterim"
+MARGE_DEFAUT = 17.0
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FRAGMENTS DE SAISIE
+# ═══════════════════════════════════════════════════════════════════════════
+
+@st.fragment
+def saisie_mot_de_passe():
+    """Mot de passe des détails ; relance la page seulement si l'accès change
+
+    L'accès est rangé dans st.session_state["acces_details"].
+    """
+    mot_de_passe = st.text_input("🔒 Mot de passe (pour détails)", type="password", key="mot_de_passe",
+                                 help="Saisissez le mot de passe pour accéder aux détails des calculs")
+    acces = mot_de_passe == MOT_DE_PASSE
+    precedent = st.session_state.get("acces_details")
+    st.session_state["acces_details"] = acces
+    if precedent is not None and precedent != acces:
+        st.rerun()
+
+
+def marge_saisie():
+    """Marge courante (saisie dans le fragment facturation) pour le calcul de paie"""
+    return st.session_state.get("marge_pct", MARGE_DEFAUT)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PAIE : BRUT ET NET
+# ═══════════════════════════════════════════════════════════════════════════
+
+def afficher_brut(r, p):
+    """Salaire brut détaillé"""
+    with st.expander("💵 SALAIRE BRUT (Détails et formules)", expanded=True):
+        st.markdown("### Décomposition des heures")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Heures normales", f"{r.h_normales}h")
+            st.markdown(f'<div class="formula-box">{r.h_normales}h × {p.taux_brut:.2f}€ = {r.brut_normales:.2f}€</div>', 
+                       unsafe_allow_html=True)
+
+        with col2:
+            if r.h_sup_tranche1 > 0:
+                st.metric("Heures sup 36-43h", f"{r.h_sup_tranche1}h (+{p.majo_sup_1}%)")
+                st.markdown(f'<div class="formula-box">{r.h_sup_tranche1}h × {p.taux_brut:.2f}€ × {1+p.majo_sup_1/100:.2f} = {r.brut_sup_t1:.2f}€</div>', 
+                           unsafe_allow_html=True)
+
+        with col3:
+            if r.h_sup_tranche2 > 0:
+                st.metric("Heures sup 44h+", f"{r.h_sup_tranche2}h (+{p.majo_sup_2}%)")
+                st.markdown(f'<div class="formula-box">{r.h_sup_tranche2}h × {p.taux_brut:.2f}€ × {1+p.majo_sup_2/100:.2f} = {r.brut_sup_t2:.2f}€</div>', 
+                           unsafe_allow_html=True)
+
+        st.markdown("### Majorations")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if p.prime_brute > 0:
+                st.metric("Prime brute hebdo", f"{p.prime_brute:.2f} €")
+        with col2:
+            if r.ifm > 0:
+                st.metric("IFM (10%)", f"{r.ifm:.2f} €")
+                st.markdown(f'<div class="formula-box">{r.brut_avant_ifm:.2f}€ × 0.10 = {r.ifm:.2f}€</div>',
+                           unsafe_allow_html=True)
+        with col3:
+            if r.iccp > 0:
+                st.metric("ICCP (10%)", f"{r.iccp:.2f} €")
+                st.markdown(f'<div class="formula-box">{r.brut_majoré:.2f}€ × 0.10 = {r.iccp:.2f}€</div>',
+                           unsafe_allow_html=True)
+
+        if r.majo_nuit_montant > 0:
+            st.markdown("### Majoration Heures de Nuit")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Heures de nuit", f"{p.heures_nuit}h (+{p.majo_nuit}%)")
+                st.markdown(f'<div class="formula-box">{p.heures_nuit}h × {p.taux_brut:.2f}€ × {p.majo_nuit/100:.2f} = {r.majo_nuit_montant:.2f}€</div>',
+                           unsafe_allow_html=True)
+            with col2:
+                st.info("💡 Incluse dans la base IFM et CP")
+
+        # Afficher les primes brutes PD si présentes
+        if r.total_prime_repas_brut > 0 or r.total_prime_trajet_brut > 0:
+            st.markdown("### Primes Brutes PD (soumises)")
+            col1, col2 = st.columns(2)
+            with col1:
+                if r.total_prime_repas_brut > 0:
+                    st.metric("Prime Repas Brut", f"{r.total_prime_repas_brut:.2f} €")
+                    st.markdown(f'<div class="formula-box">{p.nb_prime_repas} × {p.taux_prime_repas:.2f}€ = {r.total_prime_repas_brut:.2f}€</div>', 
+                               unsafe_allow_html=True)
+            with col2:
+                if r.total_prime_trajet_brut > 0:
+                    st.metric("Prime Trajet Brut", f"{r.total_prime_trajet_brut:.2f} €")
+                    st.markdown(f'<div class="formula-box">{p.nb_prime_trajet} × {p.taux_prime_trajet:.2f}€ = {r.total_prime_trajet_brut:.2f}€</div>', 
+                               unsafe_allow_html=True)
+
+        st.markdown("---")
+        st.metric("**🎯 BRUT TOTAL IMPOSABLE**", f"**{r.brut_total:.2f} €**")
+
+
+def afficher_net(r, p):
+    """Net à payer détaillé"""
+    with st.expander("💰 NET À PAYER (Détails et formules)", expanded=True):
+        st.markdown("### Calcul du net")
+
+        # Afficher d'abord le détail du net fiscal
+        st.markdown("**Détail du NET FISCAL (Net imposable) :**")
+        if p.attestation_fiscale:
+            st.markdown(f"""
+        <div class="formula-box">
+        • Brut total : {r.brut_total:.2f} €<br>
+        • - Cotisations salariales : -{r.cotis_salar:.2f} €<br>
+        • - Heures sup : -{r.brut_sup_total:.2f} €<br>
+        • + Part patronale mutuelle : +{r.part_patron_mutuelle:.2f} €<br>
+        <strong>= NET FISCAL : {r.net_imposable:.2f} €</strong>
+        </div>
+        """, unsafe_allow_html=True)
+        else:
+            st.markdown(f"""
+        <div class="formula-box">
+        • Brut total : {r.brut_total:.2f} €<br>
+        • - Cotisations salariales : -{r.cotis_salar:.2f} €<br>
+        • + Part patronale mutuelle : +{r.part_patron_mutuelle:.2f} €<br>
+        • + CSG HS non déductible (réintégrée) : +{r.csg_hs:.2f} €<br>
+        • + CSG 2.9% non déductible (réintégrée) : +{r.csg_non_deduct:.2f} €<br>
+        • - Heures sup : -{r.brut_sup_total:.2f} €<br>
+        <strong>= NET FISCAL : {r.net_imposable:.2f} €</strong>
+        </div>
+        """, unsafe_allow_html=True)
+
+        st.markdown("**Calcul de la Retenue À la Source (RAS) :**")
+        if p.taux_pas is not None and p.taux_pas == p.taux_pas:
+            base = f"Base RAS : net fiscal {r.base_pas:.2f}€ • taux individualisé {r.taux_pas_applique:.2%}"
+        else:
+            abattement = r.net_imposable - r.base_pas
+            mensuel = r.base_pas * HEURES_MOIS / p.heures_semaine if p.heures_semaine else 0.0
+            base = (f"Base RAS : {r.net_imposable:.2f}€"
+                    + (f" - abattement contrat court {abattement:.2f}€" if abattement else "")
+                    + f" = {r.base_pas:.2f}€ (soit {mensuel:.0f}€/mois) • taux neutre {r.taux_pas_applique:.2%}")
+        st.markdown(f'<div class="formula-box">{base}<br>Retenue : {r.base_pas:.2f}€ × {r.taux_pas_applique:.2%} '
+                    f'= {r.retenue_source:.2f}€</div>', unsafe_allow_html=True)
+
+        st.markdown("---")
+        st.markdown("**Calcul du net à payer :**")
+
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            st.write(f"Brut total : **{r.brut_total:.2f} €**")
+            st.write(f"❌ Cotisations salariales : **-{r.cotis_salar:.2f} €**")
+            st.write(f"❌ Retenue à la source : **-{r.retenue_source:.2f} €**")
+            if r.total_repas > 0:
+                st.write(f"✅ Indemnités repas : **+{r.total_repas:.2f} €**")
+            if r.total_decouche > 0:
+                st.write(f"✅ Indemnités découchés : **+{r.total_decouche:.2f} €**")
+            if p.cout_logement_salarie > 0:
+                st.write(f"❌ Participation salarié : **-{p.cout_logement_salarie:.2f} €**")
+
+        with col2:
+            pass
+
+        st.markdown("---")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Net avant régularisation", f"{r.net_avant_regul_final:.2f} €")
+        with col2:
+            st.metric("Net cible garanti", f"{r.net_cible:.2f} €", help=f"{p.taux_net:.2f}€/h × {p.heures_semaine}h")
+        with col3:
+            st.metric("**Régularisation / Avance**", f"**+{r.regul:.2f} €**")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DÉTAILS SALARIAUX ET PATRONAUX
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _taux(cotisation, p):
+    """Taux d'une ligne de la table (lu dans les paramètres pour un taux variable)"""
+    return getattr(p, cotisation.taux) if isinstance(cotisation.taux, str) else cotisation.taux
+
+
+def afficher_cotisations_salariales(r, p, acces_details):
+    """Cotisations salariales ultra détaillées (accès par mot de passe), lignes lues dans la table"""
+    if acces_details:
+        bareme = bareme_au(p.date_effet)
+        with st.expander("📉 COTISATIONS SALARIALES (Détails et formules)"):
+
+            # Afficher le plafond SS
+            st.info(f"💡 **Plafond Sécurité Sociale** : {r.plafond_ss:.2f} € ({bareme.pmss:g}/30 × {p.jours_travailles} jours)")
+            if r.tranche_b < 0:
+                st.warning(f"⚠️ **Cumul repassé sous le plafond** → régularisation des tranches A ({r.tranche_a:.2f}€) "
+                           f"et B ({r.tranche_b:.2f}€) et du CET ({r.assiette_cet:.2f}€)")
+            elif r.est_au_dessus_plafond:
+                st.warning(f"⚠️ **Brut > Plafond** → Tranches A ({r.tranche_a:.2f}€) et B ({r.tranche_b:.2f}€)")
+
+            if p.attestation_fiscale:
+                st.info(f"✅ **Attestation fiscale cochée** : Cotisation maladie Non Résident "
+                        f"{bareme.taux['maladie'] * 100:g}% (pas de CSG/CRDS)")
+            else:
+                st.warning(f"❌ **Attestation fiscale décochée** : CSG/CRDS au lieu de maladie "
+                           f"{bareme.taux['maladie'] * 100:g}% Non Résident")
+                st.markdown("### Assiettes CSG/CRDS")
+                st.markdown(f'<div class="formula-box">Base HS : {r.brut_sup_total:.2f}€ × {bareme.abattement_csg:.2%} = {r.base_hs_csg:.2f}€<br>Base avant abattement : {r.base_avant_abattement:.2f}€ (brut - HS)<br>Base abattue : {r.base_avant_abattement:.2f}€ × {bareme.abattement_csg:.2%} = {r.base_csg_abattue:.2f}€<br>+ Part patronale mutuelle : {r.part_patron_mutuelle:.2f}€<br>+ Part patronale prévoyance : {r.part_patron_prevoyance:.2f}€<br>Base CSG : {r.base_csg:.2f}€</div>', 
+                           unsafe_allow_html=True)
+
+            st.markdown("### Cotisations sociales")
+            for _, c in bareme.salariales.appliquees(p.attestation_fiscale, r.est_au_dessus_plafond):
+                taux = _taux(c, p)
+                montant = getattr(r, c.nom)
+                base = getattr(r, c.assiette)
+                unite = "h" if c.assiette == 'h_normales' else "€"
+                if c.reduction:
+                    st.write(f"• ❌ {c.libelle} ({taux * 100:g}%) : -{montant:.2f} €")
+                else:
+                    st.write(f"• {c.libelle} ({taux * 100:g}%) : {montant:.2f} €")
+                st.markdown(f'<div class="formula-box">{ASSIETTES[c.assiette]} : {base:.2f}{unite} × {taux:g} = {montant:.2f}€</div>', 
+                           unsafe_allow_html=True)
+
+            st.markdown("---")
+            st.metric("**TOTAL COTISATIONS SALARIALES**", f"**{r.cotis_salar:.2f} €**")
+    else:
+        st.info("🔒 Saisissez le mot de passe pour accéder aux détails des cotisations salariales")
+
+
+def afficher_charges_patronales(r, p, acces_details):
+    """Charges patronales détaillées (accès par mot de passe), lignes lues dans la table"""
+    if acces_details:
+        bareme = bareme_au(p.date_effet)
+        with st.expander("🏢 CHARGES PATRONALES (Base + Taux + Montant)"):
+            st.markdown("### Charges patronales détaillées")
+
+            # Afficher chaque charge avec base, taux et montant
+            for i, c in bareme.patronales.appliquees(True, r.est_au_dessus_plafond):
+                base = getattr(r, c.assiette)
+                taux = _taux(c, p) * 100
+                montant = r.charges_patron[i]
+
+                # Affichage avec note si tranche
+                note = ""
+                if c.assiette in ('tranche_a', 'tranche_b') and r.est_au_dessus_plafond:
+                    note = " [A]" if c.assiette == 'tranche_a' else " [B]"
+                elif c.depassement:
+                    note = " (Si > plafond)"
+                elif c.assiette == 'h_normales':
+                    note = " (€/h)"
+
+                st.write(f"**{c.libelle}{note}** : {montant:.2f} €")
+                st.markdown(f'<div class="formula-box">Base : {base:.2f}€ × {taux:.2f}% = {montant:.2f}€</div>', 
+                           unsafe_allow_html=True)
+
+            st.markdown("---")
+            st.write(f"**Total brut** : {r.cotis_patron_brutes:.2f} €")
+
+            st.markdown("### Réductions")
+            st.write(f"❌ Réduction HS patronale : -{r.reduction_patron_hs:.2f} €")
+            st.markdown(f'<div class="formula-box">{r.h_sup_tranche1 + r.h_sup_tranche2}h HS × {p.reduction_hs_patronale_euro:.2f}€ = {r.reduction_patron_hs:.2f}€</div>', 
+                   unsafe_allow_html=True)
+
+            st.write(f"❌ RGDU (après ×1.1) : -{r.rgdu:.2f} €")
+            st.markdown(f'<div class="formula-box">3 SMIC : 3 × {bareme.smic_horaire}€ × {p.heures_semaine}h = {r.trois_smic:.2f}€<br>Coefficient : {r.coeff:.4f} ({r.coeff*100:.2f}%)<br>RGDU avant ×1.1 : {r.rgdu_avant:.2f}€<br>RGDU après ×1.1 : {r.rgdu:.2f}€</div>', 
+                       unsafe_allow_html=True)
+
+            st.markdown("---")
+            st.metric("**CHARGES PATRONALES NETTES**", f"**{r.cotis_patron:.2f} €**")
+    else:
+        st.info("🔒 Saisissez le mot de passe pour accéder aux détails des charges patronales")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FACTURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+@st.fragment
+def facturation(r, p, acces_details, marge_recalcule_paie=False):
+    """Marge, facturation client et résumé
+
+    Changer la marge ne relance que ce fragment : seul l'étage facturer
+    (CA HT, taux de facturation) est recalculé à partir des coûts de `r`.
+    Si le calcul inverse dépend de la marge (`marge_recalcule_paie`) ou si
+    l'analyse de risque est affichée, toute la page est relancée.
+    """
+    st.markdown("---")
+    col_marge, _ = st.columns([1, 3])
+    with col_marge:
+        marge_pct = st.number_input("📊 Marge cible %", min_value=0.0, max_value=100.0, value=MARGE_DEFAUT,
+                                    step=0.01, format="%.2f", key="marge_pct")
+    if marge_pct != p.marge_pct and (marge_recalcule_paie or acces_details and st.session_state.get("risque_actif")):
+        # Le calcul inverse vise un taux de facturation : la paie en dépend ;
+        # le panneau de risque compare ses tirages à la marge du devis
+        st.rerun()
+    f = facturer(r.cout_total_comptable, r.cout_total_tresorerie, r.ca_refactu,
+                 p.heures_semaine, p.taux_brut, marge_pct)
+
+    if acces_details:
+        with st.expander("💼 FACTURATION CLIENT", expanded=True):
+            # MODE PRINCIPAL (ex-comptable)
+            st.markdown('<div class="badge badge-comptable">💰 FACTURATION CLIENT</div>', unsafe_allow_html=True)
+
+            st.write("**Composition du coût intérimaire :**")
+            st.write(f"• Brut total : {r.brut_total:.2f} €")
+            st.write(f"• Charges patronales : {r.cotis_patron:.2f} €")
+            st.write(f"• Logement : {p.logement_hebdo:.2f} €")
+            st.write(f"• Indemnités repas (manuels) : {r.total_repas:.2f} €")
+            if p.repas_auto and r.nb_repas_auto > 0:
+                st.write(f"• 🍽️ Repas automatiques : {r.montant_repas_auto:.2f} € ({r.nb_repas_auto} × {r.taux_repas_auto:.2f}€)")
+            st.write(f"• Indemnités découchés : {r.total_decouche:.2f} €")
+            if r.total_repas_pd > 0:
+                st.write(f"• 🚶 Indemnités Repas PD : {r.total_repas_pd:.2f} €")
+            if r.total_transport_pd > 0:
+                st.write(f"• 🚶 Indemnités Transport PD : {r.total_transport_pd:.2f} €")
+            if p.cout_logement_salarie > 0:
+                st.write(f"• ❌ Participation salarié : -{p.cout_logement_salarie:.2f} €")
+
+            st.markdown("---")
+            st.metric("**Coût total intérimaire**", f"**{r.cout_total_comptable:.2f} €**")
+
+            st.write(f"Marge cible ({marge_pct:.2f}%) : {f.marge_euro_comptable:.2f} €")
+
+            st.markdown("---")
+            st.metric("**CA HT NÉCESSAIRE**", f"**{f.ca_ht_comptable:.2f} €**")
+            if r.ca_refactu > 0:
+                st.write(f"✅ dont refacturation : +{r.ca_refactu:.2f} € ({p.nb_refactu:.1f} × {p.taux_refactu:.2f}€)")
+            st.metric("**Taux facturation client**", f"**{f.taux_fact_comptable:.2f} €/h**")
+
+            # MODE TRÉSORERIE (caché dans expander)
+            if r.regul > 0 and not p.repas_auto:
+                with st.expander("💸 Facturation avec avance non récupérable"):
+                    st.write("**Composition du coût :**")
+                    st.write(f"• Coût total intérimaire : {r.cout_total_comptable:.2f} €")
+                    st.write(f"• ✅ Avance non récupérable : +{r.regul:.2f} €")
+
+                    st.markdown("---")
+                    st.metric("**Coût total avec avance**", f"**{r.cout_total_tresorerie:.2f} €**")
+
+                    st.write(f"Marge cible ({marge_pct:.2f}%) : {f.marge_euro_tresorerie:.2f} €")
+
+                    st.markdown("---")
+                    st.metric("**CA HT NÉCESSAIRE**", f"**{f.ca_ht_tresorerie:.2f} €**")
+                    if r.ca_refactu > 0:
+                        st.write(f"✅ dont refacturation : +{r.ca_refactu:.2f} €")
+                    st.metric("**Taux facturation client**", f"**{f.taux_fact_tresorerie:.2f} €/h**")
+    else:
+        st.info("🔒 Saisissez le mot de passe pour accéder aux détails de la facturation client")
+
+    # Résumé et warnings
+    st.markdown("---")
+    if acces_details:
+        with st.expander("📋 RÉSUMÉ", expanded=True):
+            # Infos générales
+            resume_text = f"""
+**Options payées :**
+- IFM : {"✅ Oui" if p.payer_ifm else "❌ Non"}
+- ICCP : {"✅ Oui" if p.payer_iccp else "❌ Non"}
+
+**Facturation :**
+- CA HT : {f.ca_ht_comptable:.2f} €{f" (dont refactu : {r.ca_refactu:.2f} €)" if r.ca_refactu > 0 else ""}
+- Marge : {f.marge_euro_comptable:.2f} € ({marge_pct:.2f}%)
+- Taux horaire : {f.taux_fact_comptable:.2f} €/h
+"""
+            st.info(resume_text)
+
+            # Warnings conditionnels
+            if p.repas_auto and r.nb_repas_auto > 0:
+                st.warning(f"""
+    ⚠️ **Repas automatiques activés**
+    
+    {r.nb_repas_auto} repas à {r.taux_repas_auto:.2f}€ ont été déclenchés pour vous permettre d'atteindre le net promis ({r.net_cible:.2f}€).
+    
+    Vous pouvez désactiver cette option dans les paramètres.
+    """)
+
+            if not p.repas_auto and r.regul > 0:
+                st.warning(f"""
+    ⚠️ **Avance nécessaire**
+    
+    Une avance de {r.regul:.2f}€ est nécessaire pour atteindre le net promis ({r.net_cible:.2f}€).
+    
+    Options :
+    - Activer les repas automatiques pour couvrir cette avance
+    - Consulter le mode "Facturation avec avance non récupérable" ci-dessus
+    """)
+    else:
+        st.info("🔒 Saisissez le mot de passe pour accéder au résumé détaillé")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RISQUE : HEURES VARIABLES
+# ═══════════════════════════════════════════════════════════════════════════
+
+@st.fragment
+def risque_heures_variables(p):
+    """Distribution du coût et de la marge si heures, nuit et jours varient
+
+    Les tirages ne sont lancés que si l'analyse est activée ; modifier ses
+    réglages ne relance que ce fragment. La marge est celle saisie dans le
+    fragment facturation, pas celle de p, figée au dernier rerun complet.
+    """
+    marge_pct = marge_saisie()
+    with st.expander("🎲 RISQUE : HEURES VARIABLES (Monte Carlo)"):
+        if not st.toggle("Analyser la variabilité du devis", key="risque_actif"):
+            st.caption(f"Tire des semaines autour de {p.heures_semaine:g}h / {p.jours_travailles:g} jours "
+                       f"et mesure la marge obtenue au taux du devis.")
+            return
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            ecart_heures = st.number_input("Écart-type heures", min_value=0.0, max_value=10.0, value=3.0,
+                                           step=0.5, key="risque_ecart_heures")
+            heures_max = st.number_input("Heures max", min_value=35.0, max_value=60.0,
+                                         value=max(48.0, float(p.heures_semaine)), step=1.0,
+                                         key="risque_heures_max")
+        with col2:
+            ecart_nuit = st.number_input("Écart-type heures de nuit", min_value=0.0, max_value=10.0,
+                                         value=0.0, step=0.5, key="risque_ecart_nuit")
+            jours = st.multiselect("Jours possibles (équiprobables)", options=[1, 2, 3, 4, 5, 6, 7],
+                                   default=[int(p.jours_travailles)], key="risque_jours")
+        with col3:
+            n = st.selectbox("Tirages", options=[10_000, 100_000, 1_000_000], index=1,
+                             format_func=lambda v: f"{v:,}".replace(",", " "), key="risque_tirages")
+            graine = st.number_input("Graine", min_value=0, value=0, step=1, key="risque_graine")
+
+        lois = lois_standard(p, ecart_heures, heures_max, ecart_nuit, jours if len(jours) > 1 else None)
+        if not lois:
+            st.info("Aucune variabilité saisie : le devis est exact.")
+            return
+        d = simuler_risque(p, lois, n, int(graine), marge_pct=marge_pct)
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Taux du devis", f"{d.taux_fact:.2f} €/h")
+        col2.metric(f"Semaines sous {marge_pct:.2f}% de marge", f"{d.part_sous_marge:.0%}")
+        col3.metric("Semaines avec avance", f"{d.part_avec_avance:.0%}")
+        st.dataframe(
+            d.tableau(),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'indicateur': "Indicateur",
+                'devis': st.column_config.NumberColumn("Devis", format="%.2f"),
+                'moyenne': st.column_config.NumberColumn("Moyenne", format="%.2f"),
+                **{f"p{round(q * 100)}": st.column_config.NumberColumn(f"{round(q * 100)}e centile", format="%.2f")
+                   for q in QUANTILES},
+            },
+        )
+        tirages = f"{d.n:,}".replace(",", " ")
+        st.caption(f"{tirages} semaines tirées (graine {d.graine}), facturées au taux du devis sur leurs "
+                   f"heures réelles ; repas, découchés et primes suivent les jours.")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PERFORMANCE DU RERUN (accès détails ou ?perf=1)
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Nœuds du graphe de paie détaillés sous l'étape de paie
+NOEUDS_CHRONOMETRES = {
+    'cotisations_patronales': "assemblage charges_patron",
+    'rgdu': "calculer_rgdu",
+}
+
+
+def afficher_performance(chrono, durees_noeuds):
+    """Durées des étapes du rerun, éléments et octets envoyés, centiles des derniers reruns"""
+    with st.expander("⏱️ PERFORMANCE DU RERUN", expanded=True):
+        p50, p95 = chrono.centiles()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Rerun", f"{chrono.total * 1000:.0f} ms")
+        col2.metric(f"p50 / p95 ({len(chrono.historique)} reruns)", f"{p50 * 1000:.0f} / {p95 * 1000:.0f} ms")
+        if chrono.octets is None:       # compteur non branché sur cette version de Streamlit
+            col3.metric("Éléments envoyés", "non disponible")
+            col4.metric("Taille envoyée", "non disponible")
+        else:
+            col3.metric("Éléments envoyés", f"{chrono.elements}")
+            col4.metric("Taille envoyée", f"{chrono.octets / 1024:.1f} Ko")
+
+        lignes = []
+        for etape, secondes in chrono.etapes.items():
+            lignes.append(f"| {etape} | {secondes * 1000:.2f} ms |")
+            if etape != ETAPE_PAIE:
+                continue
+            for noeud, libelle in NOEUDS_CHRONOMETRES.items():
+                if durees_noeuds and noeud in durees_noeuds:
+                    lignes.append(f"| ↳ {libelle} | {durees_noeuds[noeud] * 1000:.3f} ms |")
+                else:
+                    lignes.append(f"| ↳ {libelle} | non recalculé (cache ou inchangé) |")
+        lignes.append(f"| Autres (sidebar, widgets, pied de page) | {chrono.autres * 1000:.2f} ms |")
+        st.markdown("| Étape | Durée |\n|---|---:|\n" + "\n".join(lignes))
+        st.caption("Temps serveur jusqu'au panneau (construction des éléments, pas leur dessin par le "
+                   "navigateur) ; éléments et taille : messages envoyés au navigateur pendant ce rerun.")
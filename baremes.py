@@ -0,0 +1,272 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Barèmes datés                                                  ║
+║   SMIC, PMSS, indemnités, RGDU et cotisations par date d'effet             ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Un barème s'applique de sa date d'effet à la veille du barème suivant. Il
+est compilé une fois (tables de cotisations, plafond journalier) en un
+instantané immuable gardé dans un cache borné : un lot qui couvre plusieurs
+périodes choisit l'instantané de chaque ligne par recherche dichotomique sur
+les dates d'effet, sans relire ni recompiler.
+
+Prévoir le barème de janvier prochain :
+
+    enregistrer_bareme(replace(BAREME_2026, date_effet=date(2027, 1, 1),
+                               smic_horaire=12.30, libelle="Barème 2027 (prévision)"))
+"""
+
+import bisect
+import threading
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+
+from cotisations import (COTISATIONS_2026, COTISATIONS_SALARIALES, COTISATIONS_PATRONALES, ABATTEMENT_CSG,
+                         SALARIAL, PATRONAL, compiler)
+
+TAILLE_CACHE_BAREMES = 16
+HEURES_MOIS = 151.67
+
+# Grille du taux neutre de prélèvement à la source (métropole) : net imposable
+# mensuel à partir duquel chaque taux (%) s'applique
+GRILLE_PAS_2026 = (
+    (0, 0.0),
+    (1620, 0.5),
+    (1683, 1.3),
+    (1791, 2.1),
+    (1911, 2.9),
+    (2042, 3.5),
+    (2151, 4.1),
+    (2294, 5.3),
+    (2714, 7.5),
+    (3107, 9.9),
+    (3539, 11.9),
+    (3983, 13.8),
+    (4648, 15.8),
+    (5574, 17.9),
+    (6974, 20.0),
+    (8711, 24.0),
+    (12091, 28.0),
+    (16376, 33.0),
+    (25706, 38.0),
+    (55062, 43.0),
+)
+
+
+@dataclass(frozen=True)
+class Bareme:
+    """Valeurs réglementaires en vigueur à partir de date_effet"""
+    date_effet: date
+    libelle: str
+    smic_horaire: float
+    pmss: float
+    indemnite_decouche: float
+    indemnite_repas: float        # repas GD (plafond des repas automatiques avec attestation)
+    indemnite_repas_pd: float     # panier PD (plafond sans attestation)
+    rgdu_t_min: float
+    rgdu_t_max: float
+    rgdu_t_delta: float
+    abattement_csg: float = ABATTEMENT_CSG
+    grille_pas: tuple = GRILLE_PAS_2026
+    abattement_pas_court: float = 0.5    # part du SMIC mensuel abattue (contrats de 2 mois au plus)
+    cotisations: tuple = COTISATIONS_2026
+
+
+BAREME_2026 = Bareme(
+    date_effet=date(2026, 1, 1),
+    libelle="Barème 2026",
+    smic_horaire=12.02,
+    pmss=4005,
+    indemnite_decouche=51.60,
+    indemnite_repas=21.40,
+    indemnite_repas_pd=10.40,
+    rgdu_t_min=0.0200,
+    rgdu_t_max=0.3981,
+    rgdu_t_delta=0.3781,
+)
+
+
+@dataclass(frozen=True, eq=False, slots=True)
+class BaremeCompile:
+    """Instantané compilé d'un barème (comparé par identité, partageable)
+
+    Reprend les valeurs du barème en attributs directs (lus à chaque
+    simulation) et y ajoute les tables de cotisations compilées.
+    """
+    bareme: Bareme
+    date_effet: date
+    libelle: str
+    smic_horaire: float
+    pmss: float
+    indemnite_decouche: float
+    indemnite_repas: float
+    indemnite_repas_pd: float
+    rgdu_t_min: float
+    rgdu_t_max: float
+    rgdu_t_delta: float
+    abattement_csg: float
+    grille_pas: tuple
+    abattement_pas_court: float
+    plafond_jour: float          # PMSS / 30
+    abattement_pas: float        # abattement PAS mensuel des contrats courts (€)
+    seuils_pas: tuple            # grille du taux neutre : seuils mensuels croissants
+    taux_pas: tuple              # taux de chaque tranche (fraction)
+    seuils_pas_lot: object       # mêmes valeurs en tableaux NumPy (recherche par lot)
+    taux_pas_lot: object
+    salariales: object           # TableCotisations
+    patronales: object
+    taux: dict                   # nom de cotisation -> taux
+
+
+@lru_cache(maxsize=TAILLE_CACHE_BAREMES)
+def compiler_bareme(bareme):
+    """Instantané d'un barème, compilé une fois (cache borné)"""
+    salariales = compiler(bareme.cotisations, SALARIAL)
+    patronales = compiler(bareme.cotisations, PATRONAL)
+    # Les lignes sont des sorties du moteur : seuls les taux peuvent changer d'un barème à l'autre
+    if (salariales.noms, patronales.noms) != (COTISATIONS_SALARIALES.noms, COTISATIONS_PATRONALES.noms):
+        raise ValueError(f"{bareme.libelle} : les lignes de cotisations doivent être celles de la table 2026")
+    seuils_pas = tuple(float(seuil) for seuil, _ in bareme.grille_pas)
+    if seuils_pas[0] != 0 or list(seuils_pas) != sorted(set(seuils_pas)):
+        raise ValueError(f"{bareme.libelle} : la grille PAS doit commencer à 0 et être strictement croissante")
+    taux_pas = tuple(taux / 100 for _, taux in bareme.grille_pas)
+    return BaremeCompile(
+        bareme=bareme,
+        **{f.name: getattr(bareme, f.name) for f in fields(Bareme) if f.name != 'cotisations'},
+        plafond_jour=bareme.pmss / 30,
+        abattement_pas=bareme.abattement_pas_court * bareme.smic_horaire * HEURES_MOIS,
+        seuils_pas=seuils_pas,
+        taux_pas=taux_pas,
+        seuils_pas_lot=np.array(seuils_pas),
+        taux_pas_lot=np.array(taux_pas),
+        salariales=salariales,
+        patronales=patronales,
+        taux={c.nom: c.taux for c in bareme.cotisations},
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BARÈMES ENREGISTRÉS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _jours_effet(baremes):
+    return np.array([np.datetime64(b.date_effet, 'D').astype(np.int64) for b in baremes], dtype=np.float64)
+
+
+_verrou = threading.Lock()
+BAREMES = (BAREME_2026,)                  # triés par date d'effet
+_JOURS_EFFET = _jours_effet(BAREMES)
+generation = 0                            # incrémenté à chaque enregistrement
+
+
+def enregistrer_bareme(bareme):
+    """Ajoute un barème (ou remplace celui de même date d'effet)"""
+    global BAREMES, _JOURS_EFFET, generation
+    with _verrou:
+        baremes = {b.date_effet: b for b in BAREMES}
+        baremes[bareme.date_effet] = bareme
+        BAREMES = tuple(sorted(baremes.values(), key=lambda b: b.date_effet))
+        _JOURS_EFFET = _jours_effet(BAREMES)
+        generation += 1
+        _bareme_du.cache_clear()
+
+
+def etat_baremes():
+    """(génération, barèmes) du registre, à transmettre à un autre processus"""
+    with _verrou:
+        return generation, BAREMES
+
+
+def restaurer_baremes(etat):
+    """Reprend le registre d'un autre processus (etat_baremes) s'il n'est pas déjà à sa génération
+
+    Un processus de calcul démarré avant un enregistrer_bareme du
+    processus principal n'en a pas connaissance : l'état accompagne chaque
+    tranche.
+    """
+    global BAREMES, _JOURS_EFFET, generation
+    with _verrou:
+        if etat[0] == generation:
+            return
+        generation, BAREMES = etat
+        _JOURS_EFFET = _jours_effet(BAREMES)
+        _bareme_du.cache_clear()
+
+
+def date_du_jour(valeur=None):
+    """date, datetime, texte ISO ou None (aujourd'hui) -> date"""
+    if valeur is None:
+        return date.today()
+    if isinstance(valeur, datetime):
+        return valeur.date()
+    if isinstance(valeur, date):
+        return valeur
+    return date.fromisoformat(str(valeur))
+
+
+@lru_cache(maxsize=1024)
+def _bareme_du(jour):
+    baremes = BAREMES
+    i = bisect.bisect_right([b.date_effet for b in baremes], jour) - 1
+    if i < 0:
+        raise ValueError(f"Aucun barème en vigueur au {jour:%d/%m/%Y} "
+                         f"(premier : {baremes[0].date_effet:%d/%m/%Y})")
+    return compiler_bareme(baremes[i])
+
+
+def bareme_au(jour=None):
+    """Instantané du barème en vigueur à une date (aujourd'hui par défaut)"""
+    return _bareme_du(date_du_jour(jour))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DATES D'UN LOT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def jours_lot(valeurs):
+    """Dates d'un lot -> jours depuis le 01/01/1970 (float64), aujourd'hui si absente
+
+    Accepte des dates, datetime64, textes ISO, None / NaT, ou des jours déjà
+    convertis (nombres).
+    """
+    tableau = np.asarray(valeurs)
+    if tableau.dtype.kind in 'fiub':
+        jours = tableau.astype(np.float64)
+    else:
+        dates = tableau.astype('datetime64[D]')
+        jours = np.where(np.isnat(dates), np.nan, dates.astype(np.int64).astype(np.float64))
+    aujourd_hui = float(np.datetime64(date.today(), 'D').astype(np.int64))
+    return np.where(np.isnan(jours), aujourd_hui, jours)
+
+
+def indices_baremes(jours):
+    """Indice dans BAREMES du barème de chaque ligne (jours : voir jours_lot)"""
+    indices = np.searchsorted(_JOURS_EFFET, jours, side='right') - 1
+    if indices.size and indices.min() < 0:
+        premier = BAREMES[0].date_effet
+        raise ValueError(f"Dates antérieures au premier barème ({premier:%d/%m/%Y})")
+    return indices
+
+
+def baremes_lot(jours):
+    """Lignes de chaque barème d'un lot : liste de (instantané, lignes)
+
+    lignes vaut None si tout le lot relève d'un seul barème (cas courant,
+    sans copie).
+    """
+    jours = np.asarray(jours, dtype=np.float64)
+    if jours.size == 0:
+        return [(bareme_au(), None)]
+    bornes = indices_baremes(np.array([jours.min(), jours.max()]))
+    if bornes[0] == bornes[1]:
+        return [(compiler_bareme(BAREMES[bornes[0]]), None)]
+    indices = indices_baremes(jours)
+    return [(compiler_bareme(BAREMES[i]), np.flatnonzero(indices == i)) for i in np.unique(indices)]
+
+
+def valeurs_lot(nom, jours):
+    """Valeur d'un champ du barème (ex. 'smic_horaire') pour chaque ligne"""
+    return np.array([getattr(b, nom) for b in BAREMES], dtype=np.float64)[indices_baremes(jours)]
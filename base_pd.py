@@ -0,0 +1,556 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Base de données Petit Déplacement                              ║
+║   Lecture de BASE_DE_DONNE_PD.xlsx, index compilé, taux par lot            ║
+╚════════════════════════════════════════════════════════════════════════════╝
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from types import MappingProxyType
+
+import numpy as np
+
+from baremes import jours_lot, valeurs_lot
+
+FICHIER_BASE_PD = Path(__file__).parent / "BASE_DE_DONNE_PD.xlsx"
+
+ZONES_CHANTIER = [
+    "Zone IA - 0 km à 4 km",
+    "Zone IB - 4 km à 10km",
+    "Zone II - 10 km à 20 km",
+    "Zone III - 20 km à 30 km",
+    "Zone IV - 30 km à 40 km",
+    "Zone V - 40 à 50 km",
+]
+NIVEAUX = ["N1P1", "N1P2", "N2", "N3P1", "N3P2", "N4P1", "N4P2"]
+
+
+def code_zone(zone):
+    """Convertit "Zone IA - 0 km à 4 km" (ou "IA") en "IA" """
+    zone = str(zone).strip()
+    return zone.split(" ")[1] if zone.startswith("Zone ") else zone
+
+
+def lire_base_donnees_pd(fichier_excel=FICHIER_BASE_PD):
+    """Lit les 4 feuilles de la base PD (Taux, Transport, Trajet, Repas soumis)"""
+    import pandas as pd  # import différé : inutile quand le cache binaire est valide
+
+    df_taux = pd.read_excel(fichier_excel, sheet_name='Taux_Horaires')
+    df_transport = pd.read_excel(fichier_excel, sheet_name='Transport')
+    df_trajet = pd.read_excel(fichier_excel, sheet_name='Trajet_Brut')
+    df_repas = pd.read_excel(fichier_excel, sheet_name='Repas_Soumis')
+
+    # Nettoyer : convertir Département en string et supprimer espaces
+    for df in [df_taux, df_transport, df_trajet, df_repas]:
+        df['Département'] = df['Département'].astype(str).str.strip()
+
+    return df_taux, df_transport, df_trajet, df_repas
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INDEX DE LA BASE PD
+# ═══════════════════════════════════════════════════════════════════════════
+
+CODES_ZONES = ["IA", "IB", "II", "III", "IV", "V"]
+
+# Codes entiers : libellé complet ou code court -> position dans les tableaux
+INDICE_ZONE = {**{code: i for i, code in enumerate(CODES_ZONES)},
+               **{libelle: i for i, libelle in enumerate(ZONES_CHANTIER)}}
+INDICE_NIVEAU = {niveau: i for i, niveau in enumerate(NIVEAUX)}
+
+
+def _lecture_seule(tableau):
+    tableau = np.ascontiguousarray(tableau, dtype=np.float64)
+    tableau.setflags(write=False)
+    return tableau
+
+
+def _matrice(df, colonnes, positions):
+    """Matrice (départements × colonnes) alignée sur `positions` (NaN si absent)"""
+    matrice = np.full((len(positions), len(colonnes)), np.nan)
+    df = df.drop_duplicates('Département')
+    lignes = np.array([positions.get(d, -1) for d in df['Département']], dtype=np.intp)
+    ok = lignes >= 0
+    for j, colonne in enumerate(colonnes):
+        if colonne in df.columns:
+            matrice[lignes[ok], j] = df[colonne].to_numpy(dtype=np.float64)[ok]
+    return matrice
+
+
+@dataclass(frozen=True)
+class IndexBasePD:
+    """Base PD compilée : département -> ligne de tableaux float contigus
+
+    `taux` : départements × NIVEAUX, `transport` et `trajet` : départements ×
+    CODES_ZONES, `repas` : panier soumis par département. Une valeur absente
+    de l'Excel vaut NaN. L'objet est immuable (tableaux en lecture seule) et
+    peut donc être partagé sans copie entre sessions.
+    """
+    departements: tuple
+    positions: dict
+    taux: np.ndarray
+    transport: np.ndarray
+    trajet: np.ndarray
+    repas: np.ndarray
+
+    @classmethod
+    def depuis_tables(cls, df_taux, df_transport, df_trajet, df_repas):
+        """Compile les 4 DataFrames lus par lire_base_donnees_pd"""
+        departements = tuple(dict.fromkeys(
+            d for df in (df_taux, df_transport, df_trajet, df_repas) for d in df['Département']))
+        positions = MappingProxyType({d: i for i, d in enumerate(departements)})
+        colonnes_zones = ["Zone_" + code for code in CODES_ZONES]
+        return cls(
+            departements=departements,
+            positions=positions,
+            taux=_lecture_seule(_matrice(df_taux, NIVEAUX, positions)),
+            transport=_lecture_seule(_matrice(df_transport, colonnes_zones, positions)),
+            trajet=_lecture_seule(_matrice(df_trajet, colonnes_zones, positions)),
+            repas=_lecture_seule(_matrice(df_repas, ['Panier soumis'], positions)[:, 0]),
+        )
+
+    @classmethod
+    def depuis_tampon(cls, departements, tampon):
+        """Reconstruit l'index depuis un tampon plat (voir `tampon`), sans copie"""
+        departements = tuple(departements)
+        n = len(departements)
+        tailles = [n * len(NIVEAUX), n * len(CODES_ZONES), n * len(CODES_ZONES), n]
+        if tampon.size != sum(tailles):
+            raise ValueError("Tampon de base PD de taille inattendue")
+        taux, transport, trajet, repas = np.split(tampon, np.cumsum(tailles)[:-1])
+        return cls(
+            departements=departements,
+            positions=MappingProxyType({d: i for i, d in enumerate(departements)}),
+            taux=_lecture_seule(taux.reshape(n, len(NIVEAUX))),
+            transport=_lecture_seule(transport.reshape(n, len(CODES_ZONES))),
+            trajet=_lecture_seule(trajet.reshape(n, len(CODES_ZONES))),
+            repas=_lecture_seule(repas),
+        )
+
+    def tampon(self):
+        """Tableaux concaténés en un seul vecteur float64 (taux, transport, trajet, repas)"""
+        return np.concatenate([self.taux.ravel(), self.transport.ravel(),
+                               self.trajet.ravel(), self.repas.ravel()])
+
+    @cached_property
+    def empreinte(self):
+        """SHA-256 du contenu (départements et valeurs) : version de la base"""
+        sha = hashlib.sha256("\n".join(self.departements).encode())
+        sha.update(self.tampon().tobytes())
+        return sha.hexdigest()
+
+    def version_departement(self, departement):
+        """Version d'un département : ses valeurs dans les 4 feuilles (octets, NaN compris)
+
+        None si le département est absent. Sert de clé aux caches qui ne
+        dépendent que de ce département (voir cache_resultats.py).
+        """
+        ligne = self.positions.get(departement)
+        if ligne is None:
+            return None
+        return b"".join(tableau[ligne].tobytes() for tableau in (self.taux, self.transport, self.trajet, self.repas))
+
+    def __reduce__(self):
+        # positions (mappingproxy) n'est pas picklable : on transmet le tampon
+        return IndexBasePD.depuis_tampon, (self.departements, self.tampon())
+
+    # ─── Recherches unitaires (sidebar) ───────────────────────────────────
+
+    def _valeur(self, tableau, departement, *colonne):
+        ligne = self.positions.get(departement)
+        if ligne is None:
+            return None
+        valeur = float(tableau[(ligne, *colonne)])
+        return None if math.isnan(valeur) else valeur
+
+    def taux_horaire(self, departement, niveau):
+        """Taux horaire conventionnel (None si introuvable)"""
+        return self._valeur(self.taux, departement, INDICE_NIVEAU[niveau])
+
+    def transport_zone(self, departement, zone):
+        """Indemnité transport PD (None si introuvable)"""
+        return self._valeur(self.transport, departement, INDICE_ZONE[zone])
+
+    def trajet_zone(self, departement, zone):
+        """Prime trajet brut (None si introuvable)"""
+        return self._valeur(self.trajet, departement, INDICE_ZONE[zone])
+
+    def repas_soumis(self, departement):
+        """Panier repas soumis (None si introuvable)"""
+        return self._valeur(self.repas, departement)
+
+    # ─── Recherches vectorielles (lots) ───────────────────────────────────
+
+    def indices_departements(self, departements):
+        """Lignes des départements (-1 si introuvable), une recherche par valeur distincte"""
+        import pandas as pd
+
+        inverse, valeurs = pd.factorize(np.asarray(departements, dtype=object))
+        lignes = np.array([self.positions.get(cle_departement(str(d)), -1) for d in valeurs] + [-1], dtype=np.intp)
+        return lignes[inverse]
+
+    def valeurs_lot(self, tableau, lignes, colonnes=None):
+        """tableau[lignes, colonnes] avec NaN pour les lignes -1"""
+        trouve = lignes >= 0
+        sures = np.where(trouve, lignes, 0)
+        valeurs = tableau[sures] if colonnes is None else tableau[sures, colonnes]
+        return np.where(trouve, valeurs, np.nan)
+
+
+def cle_departement(departement):
+    """Clé département d'un fichier de lot ("6" ou "6.0" -> "06")"""
+    departement = departement.strip()
+    if departement.endswith(".0"):
+        departement = departement[:-2]
+    return departement.zfill(2) if departement.isdigit() else departement
+
+
+def codes_lot(valeurs, indices, n):
+    """Codes entiers d'une colonne zone / niveau (libellés ou entiers), -1 si inconnu"""
+    valeurs = np.broadcast_to(np.asarray(valeurs), (n,))
+    if np.issubdtype(valeurs.dtype, np.integer):
+        return valeurs.astype(np.intp)
+    import pandas as pd
+
+    inverse, distinctes = pd.factorize(valeurs.astype(object))
+    codes = np.array([indices.get(str(v).strip(), indices.get(code_zone(v), -1)) for v in distinctes] + [-1], dtype=np.intp)
+    return codes[inverse]
+
+
+def construire_index_pd(fichier_excel=FICHIER_BASE_PD):
+    """Lit l'Excel et compile l'index de la base PD"""
+    return IndexBasePD.depuis_tables(*lire_base_donnees_pd(fichier_excel))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CACHE BINAIRE DE LA BASE PD
+# ═══════════════════════════════════════════════════════════════════════════
+
+# À incrémenter si la disposition du tampon change
+VERSION_CACHE = 1
+
+
+def fichiers_cache(fichier_excel):
+    """Chemins du cache binaire (.npy mappé en mémoire) et de ses métadonnées (.json)"""
+    fichier_excel = Path(fichier_excel)
+    return (fichier_excel.with_name(fichier_excel.stem + ".cache.npy"),
+            fichier_excel.with_name(fichier_excel.stem + ".cache.json"))
+
+
+def empreinte_fichier(fichier):
+    """SHA-256 du contenu d'un fichier"""
+    sha = hashlib.sha256()
+    with open(fichier, "rb") as f:
+        for bloc in iter(lambda: f.read(1 << 20), b""):
+            sha.update(bloc)
+    return sha.hexdigest()
+
+
+def _ecrire_cache(index, fichier_npy, fichier_json, meta):
+    """Écrit le cache de façon atomique (fichiers temporaires puis renommage)"""
+    tmp_npy = fichier_npy.with_name(fichier_npy.name + ".tmp")
+    tmp_json = fichier_json.with_name(fichier_json.name + ".tmp")
+    with open(tmp_npy, "wb") as f:
+        np.save(f, index.tampon())
+    tmp_json.write_text(json.dumps({**meta, 'departements': list(index.departements)}), encoding="utf-8")
+    os.replace(tmp_npy, fichier_npy)
+    os.replace(tmp_json, fichier_json)
+
+
+# Chargements servis par le cache binaire (succès) ou recompilés depuis l'Excel
+# (échecs), rechargements à chaud : lus par metriques.py
+_compteurs = Counter()
+
+
+def statistiques_base_pd():
+    """Compteurs du cache binaire et des rechargements de la base PD"""
+    total = _compteurs['cache_succes'] + _compteurs['cache_echecs']
+    return {
+        'cache_succes': _compteurs['cache_succes'],
+        'cache_echecs': _compteurs['cache_echecs'],
+        'taux_succes': _compteurs['cache_succes'] / total if total else 0.0,
+        'rechargements': _compteurs['rechargements'],
+        'rechargements_modifies': _compteurs['rechargements_modifies'],
+    }
+
+
+def charger_index_pd(fichier_excel=FICHIER_BASE_PD):
+    """Charge l'index PD depuis le cache binaire, reconstruit si l'Excel a changé
+
+    Le cache est valide si la taille et la date de modification de l'Excel
+    sont inchangées ; sinon on compare le SHA-256 du contenu (un simple
+    `touch` ne relance pas openpyxl). Le tampon est mappé en mémoire en
+    lecture seule. Si le dossier n'est pas inscriptible, l'index est compilé
+    depuis l'Excel sans cache.
+    """
+    fichier_excel = Path(fichier_excel)
+    fichier_npy, fichier_json = fichiers_cache(fichier_excel)
+    stat = fichier_excel.stat()
+    meta = {'version': VERSION_CACHE, 'taille': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    try:
+        ancien = json.loads(fichier_json.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        ancien = None
+
+    if ancien and ancien.get('version') == VERSION_CACHE and fichier_npy.exists():
+        meme_fichier = ancien.get('taille') == stat.st_size and ancien.get('mtime_ns') == stat.st_mtime_ns
+        sha = None if meme_fichier else empreinte_fichier(fichier_excel)
+        if meme_fichier or sha == ancien.get('sha256'):
+            try:
+                index = IndexBasePD.depuis_tampon(ancien['departements'], np.load(fichier_npy, mmap_mode='r'))
+            except (OSError, ValueError, KeyError):
+                index = None
+            if index is not None:
+                if not meme_fichier:
+                    # Contenu identique, date modifiée : mettre à jour les métadonnées
+                    try:
+                        fichier_json.write_text(json.dumps({**ancien, **meta}), encoding="utf-8")
+                    except OSError:
+                        pass
+                _compteurs['cache_succes'] += 1
+                return index
+
+    _compteurs['cache_echecs'] += 1
+    index = construire_index_pd(fichier_excel)
+    try:
+        _ecrire_cache(index, fichier_npy, fichier_json, {**meta, 'sha256': empreinte_fichier(fichier_excel)})
+    except OSError:
+        pass  # Dossier en lecture seule : on se passe du cache
+    return index
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RÉSOLUTION DES TAUX PD POUR UN LOT
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Colonnes qu'une valeur absente (NaN) fait résoudre depuis la base
+COLONNES_AUTO_PD = frozenset({'taux_brut', 'taux_prime_repas', 'taux_prime_trajet', 'taux_transport_pd',
+                              'nb_prime_repas', 'nb_prime_trajet', 'nb_transport_pd'})
+
+
+def completer_colonnes_pd(colonnes, index, n=None):
+    """Complète les taux PD d'un lot à partir de département / zone / niveau
+
+    `colonnes` contient les colonnes du moteur vectoriel plus `departement`,
+    `zone_chantier` et `niveau` (libellés ou codes entiers). Pour les lignes
+    Petit Déplacement, un taux absent (NaN) prend la valeur de la base, comme
+    dans la sidebar : taux brut conventionnel (SMIC si département inconnu),
+    panier soumis, prime trajet, indemnité transport ; ailleurs il vaut le
+    SMIC (taux brut) ou 0. Une quantité absente vaut `jours_travailles` si le
+    taux correspondant est trouvé, 0 sinon. Renvoie un nouveau dict sans les
+    colonnes de clé.
+    """
+    colonnes = dict(colonnes)
+    departements = colonnes.pop('departement', None)
+    zones = colonnes.pop('zone_chantier', 0)
+    niveaux = colonnes.pop('niveau', 0)
+    if departements is None:
+        return colonnes
+
+    if n is None:
+        n = np.size(departements)
+    lignes = index.indices_departements(np.broadcast_to(np.asarray(departements, dtype=object), (n,)))
+    zones = codes_lot(zones, INDICE_ZONE, n)
+    niveaux = codes_lot(niveaux, INDICE_NIVEAU, n)
+    lignes_zone = np.where(zones >= 0, lignes, -1)
+    lignes_niveau = np.where(niveaux >= 0, lignes, -1)
+
+    pd_lignes = ~np.broadcast_to(np.asarray(colonnes.get('grand_deplacement', True), dtype=bool), (n,))
+    jours = np.broadcast_to(np.asarray(colonnes.get('jours_travailles', 5), dtype=np.float64), (n,))
+
+    def completer(nom, base, defaut):
+        valeur = np.broadcast_to(np.asarray(colonnes.get(nom, np.nan), dtype=np.float64), (n,))
+        auto = np.where(pd_lignes & ~np.isnan(base), base, defaut)
+        colonnes[nom] = np.where(np.isnan(valeur), auto, valeur)
+
+    def quantite(nom, taux_base):
+        valeur = np.broadcast_to(np.asarray(colonnes.get(nom, np.nan), dtype=np.float64), (n,))
+        defaut = np.where(pd_lignes & ~np.isnan(taux_base), jours, 0.0)
+        colonnes[nom] = np.where(np.isnan(valeur), defaut, valeur)
+
+    taux_min = index.valeurs_lot(index.taux, lignes_niveau, niveaux)
+    transport = index.valeurs_lot(index.transport, lignes_zone, zones)
+    trajet = index.valeurs_lot(index.trajet, lignes_zone, zones)
+    repas = index.valeurs_lot(index.repas, lignes)
+
+    # SMIC du barème en vigueur à la date de chaque mission
+    smic = valeurs_lot('smic_horaire', jours_lot(colonnes.get('date_effet')))
+    completer('taux_brut', taux_min, smic)
+    completer('taux_prime_repas', repas, 0.0)
+    completer('taux_prime_trajet', trajet, 0.0)
+    completer('taux_transport_pd', transport, 0.0)
+    quantite('nb_prime_repas', repas)
+    quantite('nb_prime_trajet', trajet)
+    quantite('nb_transport_pd', transport)
+    return colonnes
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INDEX PARTAGÉ PAR LE PROCESSUS
+# ═══════════════════════════════════════════════════════════════════════════
+
+_verrou_index = threading.Lock()
+_index_partage = None
+
+
+def index_pd_partage():
+    """Index PD unique du processus, chargé au premier appel
+
+    Toutes les sessions reçoivent le même objet immuable : aucune copie ni
+    désérialisation par rerun.
+    """
+    global _index_partage
+    index = _index_partage
+    if index is None:
+        with _verrou_index:
+            if _index_partage is None:
+                _index_partage = charger_index_pd()
+            index = _index_partage
+    return index
+
+
+def recharger_index_pd(fichier_excel=FICHIER_BASE_PD):
+    """Relit la base PD (via le cache binaire) et remplace l'index partagé
+
+    Le remplacement est atomique : les sessions en cours gardent l'ancien
+    objet jusqu'à leur prochain appel à index_pd_partage. Les abonnés
+    (voir abonner_rechargement) reçoivent le diff s'il n'est pas vide.
+    Renvoie le DiffBasePD entre l'ancien et le nouvel index.
+    """
+    global _index_partage
+    index = charger_index_pd(fichier_excel)
+    with _verrou_index:
+        ancien, _index_partage = _index_partage, index
+    diff = comparer_index_pd(ancien, index)
+    _compteurs['rechargements'] += 1
+    if not diff.vide:
+        _compteurs['rechargements_modifies'] += 1
+        for abonne in list(_abonnes_rechargement):
+            abonne(diff)
+    return diff
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RECHARGEMENT À CHAUD ET DIFF PAR DÉPARTEMENT
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class DiffBasePD:
+    """Différences entre deux index PD
+
+    `modifies` associe chaque département modifié aux colonnes changées,
+    nommées "feuille:colonne" (ex. "Transport:Zone_II", "Taux_Horaires:N2").
+    """
+    ancien: object
+    nouveau: IndexBasePD
+    ajoutes: frozenset = frozenset()
+    supprimes: frozenset = frozenset()
+    modifies: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+
+    @property
+    def departements(self):
+        """Tous les départements touchés (ajoutés, supprimés ou modifiés)"""
+        return self.ajoutes | self.supprimes | frozenset(self.modifies)
+
+    @property
+    def vide(self):
+        return not self.departements
+
+
+FEUILLES_INDEX = (
+    ('taux', 'Taux_Horaires', NIVEAUX),
+    ('transport', 'Transport', ["Zone_" + code for code in CODES_ZONES]),
+    ('trajet', 'Trajet_Brut', ["Zone_" + code for code in CODES_ZONES]),
+    ('repas', 'Repas_Soumis', ['Panier soumis']),
+)
+
+
+def comparer_index_pd(ancien, nouveau):
+    """Diff par département et par colonne entre deux index (ancien peut être None)"""
+    if ancien is None:
+        return DiffBasePD(None, nouveau, ajoutes=frozenset(nouveau.departements))
+
+    communs = [d for d in nouveau.departements if d in ancien.positions]
+    lignes_anciennes = np.array([ancien.positions[d] for d in communs], dtype=np.intp)
+    lignes_nouvelles = np.array([nouveau.positions[d] for d in communs], dtype=np.intp)
+
+    modifies = {}
+    for attribut, feuille, colonnes in FEUILLES_INDEX:
+        avant = getattr(ancien, attribut)[lignes_anciennes].reshape(len(communs), -1)
+        apres = getattr(nouveau, attribut)[lignes_nouvelles].reshape(len(communs), -1)
+        differents = (avant != apres) & ~(np.isnan(avant) & np.isnan(apres))
+        for i, j in zip(*np.nonzero(differents)):
+            modifies.setdefault(communs[i], []).append(f"{feuille}:{colonnes[j]}")
+
+    return DiffBasePD(
+        ancien, nouveau,
+        ajoutes=frozenset(nouveau.positions.keys() - ancien.positions.keys()),
+        supprimes=frozenset(ancien.positions.keys() - nouveau.positions.keys()),
+        modifies=MappingProxyType({d: tuple(c) for d, c in modifies.items()}),
+    )
+
+
+_abonnes_rechargement = []
+
+
+def abonner_rechargement(fonction):
+    """Enregistre fonction(diff) appelée après chaque rechargement effectif
+
+    Sert aux caches qui dépendent de la base PD pour n'invalider que les
+    départements touchés. Renvoie la fonction (utilisable en décorateur).
+    """
+    if fonction not in _abonnes_rechargement:
+        _abonnes_rechargement.append(fonction)
+    return fonction
+
+
+def _signature_fichier(fichier):
+    try:
+        stat = os.stat(fichier)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+_surveillance = None
+
+
+def demarrer_surveillance(fichier_excel=FICHIER_BASE_PD, intervalle=2.0):
+    """Lance (une seule fois par processus) le fil qui surveille l'Excel
+
+    Toutes les `intervalle` secondes, la taille et la date de modification
+    sont comparées ; en cas de changement la base est rechargée en arrière-
+    plan. Un fichier en cours d'écriture (erreur de lecture) est retenté au
+    passage suivant.
+    """
+    global _surveillance
+    with _verrou_index:
+        if _surveillance is not None and _surveillance.is_alive():
+            return _surveillance
+
+        def surveiller():
+            vue = _signature_fichier(fichier_excel)
+            while True:
+                time.sleep(intervalle)
+                signature = _signature_fichier(fichier_excel)
+                if signature is None or signature == vue:
+                    continue
+                try:
+                    recharger_index_pd(fichier_excel)
+                except Exception:
+                    continue  # Fichier incomplet : nouvel essai au prochain passage
+                vue = signature
+
+        _surveillance = threading.Thread(target=surveiller, name="surveillance-base-pd", daemon=True)
+        _surveillance.start()
+        return _surveillance
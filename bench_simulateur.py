@@ -0,0 +1,353 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Mesures de performance du simulateur                           ║
+║   Usage : python bench_simulateur.py [moteur|parallele|demarrage|...]      ║
+╚════════════════════════════════════════════════════════════════════════════╝
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+DOSSIER = Path(__file__).parent
+
+
+def scenarios_aleatoires(n, graine=0):
+    """Colonnes d'entrée aléatoires couvrant GD / PD, tranches et attestation"""
+    rng = np.random.default_rng(graine)
+    h = rng.integers(35, 49, n)
+    return {
+        'grand_deplacement': rng.random(n) < 0.5,
+        'payer_ifm': rng.random(n) < 0.8,
+        'payer_iccp': rng.random(n) < 0.8,
+        'attestation_fiscale': rng.random(n) < 0.5,
+        'repas_auto': rng.random(n) < 0.2,
+        'heures_semaine': h,
+        'jours_travailles': rng.integers(1, 8, n),
+        'heures_nuit': rng.integers(0, h + 1),
+        'taux_brut': np.round(rng.uniform(12.02, 25.0, n), 2),
+        'prime_brute': rng.choice([0.0, 50.0, 300.0], n),
+        'nb_repas_gd': rng.integers(0, 8, n),
+        'taux_repas_gd': rng.choice([0.0, 21.40], n),
+        'nb_decouches_gd': rng.integers(0, 8, n),
+        'taux_decouche_gd': rng.choice([0.0, 51.60], n),
+        'marge_pct': np.round(rng.uniform(5, 30, n), 2),
+    }
+
+
+def _chrono(fonction, repetitions=5):
+    """Meilleur temps d'exécution (s) sur quelques répétitions"""
+    meilleur = float("inf")
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+def bench_moteur():
+    """Débit du moteur unitaire et du moteur vectoriel"""
+    from moteur_paie import ParametresSimulation, simuler
+    from moteur_vectoriel import simuler_lot
+
+    p = ParametresSimulation()
+    n = 20_000
+    t = _chrono(lambda: [simuler(p) for _ in range(n)], 3)
+    print(f"moteur_paie.simuler      : {t / n * 1e6:8.1f} µs/simulation")
+
+    n = 1_000_000
+    colonnes = scenarios_aleatoires(n)
+    t = _chrono(lambda: simuler_lot(colonnes), 3)
+    print(f"moteur_vectoriel (1M)    : {t:8.3f} s  ({n / t:,.0f} scénarios/s)")
+
+
+def bench_graphe():
+    """Recalcul incrémental : nœuds réévalués et durée après un seul changement"""
+    from dataclasses import replace
+    from moteur_paie import ParametresSimulation, SimulationIncrementale, GRAPHE_PAIE, simuler
+
+    p = ParametresSimulation()
+    n = 20_000
+    t = _chrono(lambda: [simuler(p) for _ in range(n)], 3)
+    print(f"évaluation complète      : {t / n * 1e6:8.1f} µs  ({len(GRAPHE_PAIE.noeuds)} nœuds)")
+
+    for nom, valeurs in (('marge_pct', (15.0, 20.0)), ('payer_ifm', (True, False)), ('heures_semaine', (41, 45))):
+        simulation = SimulationIncrementale()
+        scenarios = [replace(p, **{nom: v}) for v in valeurs] * (n // 2)
+        simulation.simuler(scenarios[-1])
+        t = _chrono(lambda: [simulation.simuler(q) for q in scenarios], 3)
+        print(f"{nom + ' modifié':24s} : {t / n * 1e6:8.1f} µs  "
+              f"({len(simulation.calcul.reevalues)} nœuds réévalués)")
+
+
+def bench_cache(n=20_000, profils=200):
+    """Cache de résultats : lecture d'un profil déjà simulé contre un calcul complet"""
+    from dataclasses import replace
+    from moteur_paie import ParametresSimulation, simuler
+    from cache_resultats import CacheResultats
+
+    p = ParametresSimulation()
+    scenarios = [replace(p, heures_semaine=35 + i % 14, taux_brut=12.02 + i // 14 * 0.5) for i in range(profils)]
+    sequence = [scenarios[i % profils] for i in range(n)]
+    t = _chrono(lambda: [simuler(q) for q in sequence], 3)
+    print(f"sans cache               : {t / n * 1e6:8.1f} µs/simulation")
+    cache = CacheResultats()
+    t = _chrono(lambda: [cache.simuler(q) for q in sequence], 3)
+    stats = cache.statistiques()
+    print(f"avec cache ({profils} profils) : {t / n * 1e6:8.1f} µs/simulation  "
+          f"({stats['taux_succes']:.1%} de succès)")
+
+
+def bench_cumul(n=10_000, semaines=52):
+    """Paie sur une année : n salariés, une semaine ajoutée à la fois"""
+    from datetime import date, timedelta
+    from paie_cumulee import simuler_semaines_lot
+
+    colonnes = scenarios_aleatoires(n)
+    lot = [dict(colonnes, date_effet=date(2026, 1, 5) + timedelta(weeks=k)) for k in range(semaines)]
+    t = _chrono(lambda: list(simuler_semaines_lot(lot)), 3)
+    print(f"{n:,} salariés × {semaines} sem. : {t:8.3f} s  ({t / semaines * 1000:.1f} ms par semaine ajoutée)")
+
+
+def bench_risque(n=100_000):
+    """Monte Carlo sur heures, nuit et jours autour d'un devis GD"""
+    from moteur_paie import ParametresSimulation
+    from monte_carlo import Normale, Uniforme, Discrete, simuler_risque
+
+    p = ParametresSimulation(nb_repas_gd=5, taux_repas_gd=21.40, nb_decouches_gd=4, taux_decouche_gd=51.60)
+    lois = {'heures_semaine': Normale(41, 3, 35, 48, pas=0.5), 'heures_nuit': Uniforme(0, 6, pas=1),
+            'jours_travailles': Discrete((4, 5, 6), (0.2, 0.7, 0.1))}
+    t = _chrono(lambda: simuler_risque(p, lois, n), 3)
+    print(f"{n:,} tirages : {t:8.3f} s")
+
+
+def bench_centimes(n=1_000_000):
+    """Mode bulletin (lignes au centime, totaux en centimes entiers) contre calcul flottant"""
+    from moteur_vectoriel import simuler_lot
+
+    colonnes = scenarios_aleatoires(n)
+    flottant = _chrono(lambda: simuler_lot(colonnes), 3)
+    print(f"flottant          : {flottant:8.3f} s  ({n / flottant:,.0f} scénarios/s)")
+    exact = _chrono(lambda: simuler_lot(dict(colonnes, arrondi_centime=True)), 3)
+    print(f"bulletin centime  : {exact:8.3f} s  ({n / exact:,.0f} scénarios/s, x{exact / flottant:.2f})")
+
+    # Écart entre le total flottant arrondi à l'affichage et le total du bulletin
+    # (bien plus qu'un centime quand un centime de brut fait franchir un seuil : RGDU à 3 SMIC)
+    r, c = simuler_lot(colonnes), simuler_lot(dict(colonnes, arrondi_centime=True))
+    for nom in ('cotis_salar', 'cotis_patron_brutes', 'cout_total_comptable'):
+        ecart = np.abs(np.round(r[nom], 2) - c[nom])
+        print(f"{nom:21s}: écart sur {np.mean(ecart > 0.005):6.1%} des lignes, "
+              f"99e centile {np.percentile(ecart, 99):.2f} €")
+
+
+def bench_portefeuille(n=1_000):
+    """Répartition des marges puis des taux bruts sur un portefeuille de missions"""
+    from portefeuille import optimiser_marges, optimiser_taux_brut
+
+    colonnes = scenarios_aleatoires(n)
+    colonnes['taux_net'] = np.round(np.random.default_rng(1).uniform(10, 15, n), 2)
+    optimiser_marges(colonnes, 100_000)     # imports et base PD hors mesure
+    t = _chrono(lambda: optimiser_marges(colonnes, 100_000, taux_client=45.0), 3)
+    print(f"{n:,} missions, marges      : {t * 1000:8.1f} ms")
+    t = _chrono(lambda: optimiser_taux_brut(colonnes, 100_000, taux_client=40.0), 3)
+    print(f"{n:,} missions, taux bruts  : {t * 1000:8.1f} ms")
+
+
+def bench_parallele(n=2_000_000):
+    """Passage à l'échelle du calcul multi-processus (1, 2, 4... cœurs)"""
+    import os
+    from calcul_parallele import CalculParallele
+    from moteur_vectoriel import simuler_lot
+
+    colonnes = scenarios_aleatoires(n)
+    sorties = ['brut_total', 'cotis_patron', 'rgdu', 'cout_total_comptable', 'taux_fact_comptable']
+    reference = _chrono(lambda: simuler_lot(colonnes), 3)
+    print(f"simuler_lot (1 processus) : {reference:8.3f} s  ({n / reference:,.0f} scénarios/s)")
+
+    coeurs = os.cpu_count() or 1
+    processus = 1
+    while processus <= coeurs:
+        with CalculParallele(processus) as calcul:
+            calcul.simuler_lot({}, 1)  # démarrage des processus hors mesure
+            t = _chrono(lambda: calcul.simuler_lot(colonnes, sorties=sorties), 3)
+        print(f"CalculParallele ({processus:2d} proc.) : {t:8.3f} s  ({n / t:,.0f} scénarios/s, "
+              f"accélération x{reference / t:.2f})")
+        processus *= 2
+
+
+def _demarrage_a_froid(code):
+    """Durée (s) d'un chargement dans un nouveau processus Python"""
+    script = ("import time; debut = time.perf_counter(); " + code +
+              "; print(time.perf_counter() - debut)")
+    sortie = subprocess.run([sys.executable, "-c", script], cwd=DOSSIER,
+                            capture_output=True, text=True, check=True)
+    return float(sortie.stdout.strip().splitlines()[-1])
+
+
+def bench_demarrage():
+    """Démarrage à froid : lecture openpyxl contre cache binaire"""
+    import base_pd
+
+    base_pd.charger_index_pd()  # s'assure que le cache existe
+    excel = min(_demarrage_a_froid("import base_pd; base_pd.construire_index_pd()") for _ in range(3))
+    cache = min(_demarrage_a_froid("import base_pd; base_pd.charger_index_pd()") for _ in range(3))
+    print(f"Base PD depuis l'Excel   : {excel * 1000:8.1f} ms")
+    print(f"Base PD depuis le cache  : {cache * 1000:8.1f} ms")
+
+
+def bench_sessions(n_sessions=50, reruns=20):
+    """Mémoire et latence de la base PD pour N sessions simultanées
+
+    Avant : @st.cache_data désérialise (pickle) les 4 DataFrames à chaque
+    rerun de chaque session. Après : toutes les sessions lisent le même
+    index immuable.
+    """
+    import pickle
+    import threading
+    import tracemalloc
+    import base_pd
+
+    tables = base_pd.lire_base_donnees_pd()
+    cache_data = pickle.dumps(tables)
+    base_pd.index_pd_partage()
+
+    def mesurer(obtenir):
+        latences = []
+        conserves = [None] * n_sessions
+        verrou = threading.Lock()
+
+        def session(i):
+            for _ in range(reruns):
+                debut = time.perf_counter()
+                conserves[i] = obtenir()
+                duree = time.perf_counter() - debut
+                with verrou:
+                    latences.append(duree)
+
+        def lancer():
+            fils = [threading.Thread(target=session, args=(i,)) for i in range(n_sessions)]
+            for f in fils:
+                f.start()
+            for f in fils:
+                f.join()
+
+        lancer()
+        quantiles = np.percentile(latences, [50, 95]) * 1e6
+
+        # Mémoire retenue par les sessions (mesurée à part : tracemalloc ralentit)
+        conserves[:] = [None] * n_sessions
+        tracemalloc.start()
+        lancer()
+        memoire = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return quantiles, memoire / 1e6
+
+    for nom, obtenir in (("st.cache_data (copie)", lambda: pickle.loads(cache_data)),
+                         ("index partagé", base_pd.index_pd_partage)):
+        (p50, p95), memoire = mesurer(obtenir)
+        print(f"{nom:24s} : p50 {p50:8.1f} µs  p95 {p95:8.1f} µs  "
+              f"mémoire retenue ({n_sessions} sessions) {memoire:6.2f} Mo")
+
+
+def _page_facturation(r, p):
+    from affichage import facturation
+    facturation(r, p, True)
+
+
+def _page_mot_de_passe():
+    from affichage import saisie_mot_de_passe
+    saisie_mot_de_passe()
+
+
+def bench_interface(interactions=60):
+    """Latence d'une interaction (p50 / p95) : rerun complet contre rerun de fragment
+
+    Rerun complet : toute la page, ce que déclenchait chaque saisie avant les
+    fragments. Rerun de fragment : le corps du fragment seul, avec les
+    arguments du dernier rerun complet, ce que Streamlit exécute quand un
+    widget du fragment change. Temps serveur (AppTest), hors réseau et rendu.
+    """
+    from streamlit.testing.v1 import AppTest
+    from moteur_paie import ParametresSimulation, simuler
+
+    def latences(app, widget, cle, valeurs):
+        mesures = []
+        for i in range(interactions):
+            getattr(app, widget)(key=cle).set_value(valeurs(i))
+            debut = time.perf_counter()
+            app.run()
+            mesures.append(time.perf_counter() - debut)
+        return np.percentile(mesures, [50, 95]) * 1000
+
+    def page(acces):
+        app = AppTest.from_file(str(DOSSIER / "simulateur_btp_v7.py"), default_timeout=60)
+        app.run()
+        if acces:
+            app.text_input(key="mot_de_passe").set_value("acterim").run()
+        return app
+
+    p = ParametresSimulation()
+    r = simuler(p)
+    marge = lambda i: 15.0 + i % 7
+    saisie = lambda i: "x" * (i % 5 + 1)
+    cas = (
+        ("marge, page complète", page(True), "number_input", "marge_pct", marge),
+        ("marge, fragment", AppTest.from_function(_page_facturation, args=(r, p)), "number_input", "marge_pct", marge),
+        ("mot de passe, page", page(False), "text_input", "mot_de_passe", saisie),
+        ("mot de passe, fragment", AppTest.from_function(_page_mot_de_passe), "text_input", "mot_de_passe", saisie),
+    )
+    for nom, app, widget, cle, valeurs in cas:
+        app.run()
+        p50, p95 = latences(app, widget, cle, valeurs)
+        print(f"{nom:24s} : p50 {p50:7.1f} ms  p95 {p95:7.1f} ms")
+
+
+def bench_charge_utile(reruns=5):
+    """Octets envoyés au navigateur par rerun : habillage en ligne contre servi en statique
+
+    En ligne : feuille de style et logo base64 dans chaque rerun (ce que
+    faisait la page avant static/). Statique : @import et <img> par URL.
+    Compté comme le panneau de performance (?perf=1), hors mot de passe.
+    """
+    from streamlit import config
+    from streamlit.testing.v1 import AppTest
+
+    for nom, statique in (("habillage en ligne", False), ("habillage statique", True)):
+        config.set_option("server.enableStaticServing", statique)
+        app = AppTest.from_file(str(DOSSIER / "simulateur_btp_v7.py"), default_timeout=60)
+        app.query_params["perf"] = "1"
+        app.run()
+        octets = []
+        for _ in range(reruns):
+            app.run()
+            octets.append(app.session_state["chrono_rerun"].octets)
+        elements = app.session_state["chrono_rerun"].elements
+        if elements is None:
+            print(f"{nom:24s} : envois non comptés sur cette version de Streamlit")
+            continue
+        print(f"{nom:24s} : {np.median(octets) / 1024:8.1f} Ko/rerun  ({elements} éléments)")
+
+
+MESURES = {
+    'moteur': bench_moteur,
+    'graphe': bench_graphe,
+    'cache': bench_cache,
+    'cumul': bench_cumul,
+    'risque': bench_risque,
+    'centimes': bench_centimes,
+    'portefeuille': bench_portefeuille,
+    'parallele': bench_parallele,
+    'demarrage': bench_demarrage,
+    'sessions': bench_sessions,
+    'interface': bench_interface,
+    'charge_utile': bench_charge_utile,
+}
+
+if __name__ == "__main__":
+    choix = sys.argv[1:] or list(MESURES)
+    for nom in choix:
+        print(f"── {nom} ──")
+        MESURES[nom]()
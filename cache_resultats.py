@@ -0,0 +1,192 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Cache des résultats de simulation                              ║
+║   LRU partagé par toutes les sessions, clé = scénario normalisé            ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Les profils standards (GD 41h au SMIC avec IFM/ICCP, PD 06 N2 zone II...)
+sont simulés une fois par processus. La clé réunit la version du barème,
+la version du département PD (aucune pour un scénario GD, qui ne lit pas la
+base) et les paramètres arrondis avec leur type (41 et 41.0 ne s'affichent
+pas pareil). Le résultat est calculé à partir des
+paramètres normalisés : une même clé donne toujours le même résultat, quelle
+que soit la session qui l'a rangé.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import fields
+from functools import lru_cache
+from operator import attrgetter
+
+import baremes
+import cotisations
+import moteur_paie
+from base_pd import abonner_rechargement
+from moteur_paie import ParametresSimulation, simuler
+
+TAILLE_CACHE = 2048
+DECIMALES_CLE = 6
+
+_NOMS_PARAMETRES = tuple(f.name for f in fields(ParametresSimulation))
+_lire_parametres = attrgetter(*_NOMS_PARAMETRES)
+_I_DATE = _NOMS_PARAMETRES.index('date_effet')
+_I_BASE = 2      # version_base dans une clé (version, génération, version_base, valeurs, types)
+_NOMS_CONSTANTES = tuple(nom for nom, v in vars(moteur_paie).items()
+                         if nom.isupper() and isinstance(v, (int, float)))
+_lire_constantes = attrgetter(*_NOMS_CONSTANTES)
+
+
+@lru_cache(maxsize=TAILLE_CACHE)
+def _normaliser(valeurs, types):
+    valeurs = tuple([round(v, DECIMALES_CLE) + 0.0 if isinstance(v, float) else v for v in valeurs])
+    return valeurs, tuple(map(type, valeurs))
+
+
+def normaliser(p):
+    """Valeurs de p arrondies à DECIMALES_CLE (réels) ; renvoie (valeurs, types)
+
+    La date de la mission est remplacée par la date d'effet de son barème :
+    toutes les dates d'une même période partagent leurs résultats.
+    """
+    valeurs = _lire_parametres(p)
+    date_bareme = baremes.bareme_au(valeurs[_I_DATE]).date_effet
+    valeurs = valeurs[:_I_DATE] + (date_bareme,) + valeurs[_I_DATE + 1:]
+    # Le type fait partie de la clé du mémo : 41 et 41.0 y sont distincts
+    return _normaliser(valeurs, tuple(map(type, valeurs)))
+
+
+@lru_cache(maxsize=8)
+def _empreinte_bareme(constantes, fichiers):
+    sha = hashlib.sha256(repr(constantes).encode())
+    for fichier, _, _ in fichiers:
+        with open(fichier, "rb") as f:
+            sha.update(f.read())
+    return sha.hexdigest()[:16]
+
+
+def version_bareme():
+    """Empreinte des constantes, des barèmes datés et du source du moteur
+
+    Relue à chaque appel : une constante ou une ligne de cotisation modifiée à
+    chaud, un barème enregistré, un moteur_paie.py, cotisations.py ou
+    baremes.py édité change la version (l'empreinte des fichiers n'est
+    recalculée que si leur taille ou leur date changent).
+    """
+    constantes = (_lire_constantes(moteur_paie), cotisations.COTISATIONS_2026, baremes.generation)
+    fichiers = []
+    for module in (moteur_paie, cotisations, baremes):
+        stat = os.stat(module.__file__)
+        fichiers.append((module.__file__, stat.st_size, stat.st_mtime_ns))
+    return _empreinte_bareme(constantes, tuple(fichiers))
+
+
+class CacheResultats:
+    """LRU borné de ResultatSimulation (immuables, partageables sans copie)"""
+
+    def __init__(self, taille_max=TAILLE_CACHE):
+        self.taille_max = taille_max
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+        self._bareme = None
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def obtenir(self, cle):
+        """Résultat rangé sous cle (marqué récent), ou None"""
+        with self._verrou:
+            resultat = self._entrees.get(cle)
+            if resultat is None:
+                self.echecs += 1
+            else:
+                self._entrees.move_to_end(cle)
+                self.succes += 1
+            return resultat
+
+    def ranger(self, cle, resultat):
+        """Range un résultat ; évince les plus anciens au-delà de taille_max"""
+        with self._verrou:
+            self._entrees[cle] = resultat
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def invalider_departements(self, departements):
+        """Invalide les résultats des scénarios PD des départements donnés"""
+        with self._verrou:
+            cles = [cle for cle in self._entrees
+                    if cle[_I_BASE] is not None and cle[_I_BASE][0] in departements]
+            for cle in cles:
+                del self._entrees[cle]
+            if cles:
+                self.invalidations += 1
+        return len(cles)
+
+    def vider(self):
+        """Invalide tous les résultats (base PD rechargée, barème modifié)"""
+        with self._verrou:
+            if self._entrees:
+                self._entrees.clear()
+                self.invalidations += 1
+
+    def statistiques(self):
+        with self._verrou:
+            total = self.succes + self.echecs
+            return {
+                'taille': len(self._entrees),
+                'taille_max': self.taille_max,
+                'succes': self.succes,
+                'echecs': self.echecs,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'taux_succes': self.succes / total if total else 0.0,
+            }
+
+    def simuler(self, p, version_base=None, calcul=simuler):
+        """Résultat de p depuis le cache, sinon calcul(p normalisé) puis rangement
+
+        version_base : None pour un scénario qui ne lit pas la base PD (GD),
+        sinon (département, version) dont viennent les taux PD de p (voir
+        version_pd). calcul : moteur à utiliser en cas d'absence (ex.
+        SimulationIncrementale.simuler de la session).
+        """
+        bareme = version_bareme()
+        if bareme != self._bareme:
+            self.vider()
+            self._bareme = bareme
+        # Génération du registre dans la clé : un barème remplacé à la même date
+        # d'effet ne ressert pas les résultats de l'ancien
+        generation = baremes.generation
+        valeurs, types = normaliser(p)
+        cle = (bareme, generation, version_base, valeurs, types)
+        resultat = self.obtenir(cle)
+        if resultat is None:
+            resultat = calcul(ParametresSimulation(*valeurs))
+            self.ranger(cle, resultat)
+        return resultat
+
+
+def version_pd(index, departement):
+    """version_base d'un scénario PD : (département, version de sa ligne dans l'index)"""
+    return departement, index.version_departement(departement) if index is not None else None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CACHE PARTAGÉ, INVALIDÉ PAR DÉPARTEMENT AU RECHARGEMENT DE LA BASE
+# ═══════════════════════════════════════════════════════════════════════════
+
+CACHE_RESULTATS = CacheResultats()
+
+
+@abonner_rechargement
+def _sur_rechargement(diff):
+    # Seuls les scénarios PD des départements touchés ; les GD restent valides
+    CACHE_RESULTATS.invalider_departements(diff.departements)
@@ -0,0 +1,151 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Calcul par lot multi-processus                                 ║
+║   simuler_lot réparti sur un pool, entrées / sorties en mémoire partagée   ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Les colonnes d'entrée sont copiées une fois dans un segment de mémoire
+partagée ; chaque processus calcule une tranche de lignes avec
+moteur_vectoriel.simuler_lot et écrit ses résultats directement dans le
+segment de sortie. Aucune ligne n'est sérialisée (pickle) : seules les
+bornes des tranches circulent entre processus, avec le registre des barèmes
+(un barème enregistré après le démarrage du pool est ainsi vu des processus).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing import shared_memory
+from types import MappingProxyType
+
+import numpy as np
+
+from baremes import etat_baremes, restaurer_baremes
+from moteur_vectoriel import simuler_lot, preparer_colonnes, COLONNES_ENTREE, COLONNES_BOOLEENNES
+
+# Lignes par tranche : borne la mémoire de travail de chaque processus
+TAILLE_TRANCHE = 65_536
+
+
+@lru_cache(maxsize=1)
+def types_sortie():
+    """Type de chaque sortie du moteur (booléens restitués comme tels), lu au premier lot"""
+    return MappingProxyType({nom: v.dtype for nom, v in simuler_lot({}, 1).items()})
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CÔTÉ PROCESSUS DE CALCUL
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _calculer(seg_entree, seg_sortie, variables, constantes, sorties, n, debut, fin):
+    # Vues locales : libérées au retour, avant la fermeture des segments
+    valeurs = np.ndarray((len(variables), n), dtype=np.float64, buffer=seg_entree.buf)
+    resultats = np.ndarray((len(sorties), n), dtype=np.float64, buffer=seg_sortie.buf)
+    colonnes = dict(constantes)
+    for i, nom in enumerate(variables):
+        colonne = valeurs[i, debut:fin]
+        colonnes[nom] = colonne.astype(np.bool_) if nom in COLONNES_BOOLEENNES else colonne
+
+    calcul = simuler_lot(colonnes, fin - debut)
+    for i, nom in enumerate(sorties):
+        resultats[i, debut:fin] = calcul[nom]
+
+
+def _simuler_tranche(baremes, entree, variables, constantes, sortie, sorties, n, debut, fin):
+    """Calcule les lignes [debut, fin[ ; lit et écrit en mémoire partagée
+
+    baremes : registre du processus principal (etat_baremes), repris si un
+    barème a été enregistré depuis le démarrage du processus de calcul.
+    """
+    restaurer_baremes(baremes)
+    seg_entree = shared_memory.SharedMemory(name=entree)
+    seg_sortie = shared_memory.SharedMemory(name=sortie)
+    try:
+        _calculer(seg_entree, seg_sortie, variables, constantes, sorties, n, debut, fin)
+    finally:
+        seg_entree.close()
+        seg_sortie.close()
+    return fin - debut
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# POOL RÉUTILISABLE
+# ═══════════════════════════════════════════════════════════════════════════
+
+class CalculParallele:
+    """Pool de processus pour simuler_lot ; à garder ouvert entre plusieurs lots
+
+        with CalculParallele(processus=8) as calcul:
+            resultats = calcul.simuler_lot(colonnes)
+    """
+
+    def __init__(self, processus=None, taille_tranche=TAILLE_TRANCHE):
+        self.processus = processus or os.cpu_count() or 1
+        self.taille_tranche = taille_tranche
+        self._pool = ProcessPoolExecutor(self.processus)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def fermer(self):
+        self._pool.shutdown()
+
+    def simuler_lot(self, colonnes, n=None, sorties=None):
+        """Mêmes entrées / sorties que moteur_vectoriel.simuler_lot
+
+        `sorties` restreint les colonnes calculées en retour (toutes par
+        défaut) : la mémoire partagée de sortie vaut 8 octets par ligne et
+        par sortie. Les résultats sont dans l'ordre des lignes d'entrée.
+        """
+        types = types_sortie()
+        sorties = list(types) if sorties is None else list(sorties)
+        inconnues = set(sorties) - set(types)
+        if inconnues:
+            raise KeyError(f"Sorties inconnues : {', '.join(sorted(inconnues))}")
+
+        tableaux = preparer_colonnes(colonnes, n)
+        n = len(next(iter(tableaux.values())))
+        if n == 0:
+            return {nom: np.empty(0, dtype=types[nom]) for nom in sorties}
+
+        # Colonnes scalaires transmises telles quelles, les autres en mémoire partagée
+        variables = [nom for nom in COLONNES_ENTREE if np.ndim(colonnes.get(nom, 0)) > 0]
+        constantes = {nom: tableaux[nom][0] for nom in COLONNES_ENTREE if nom not in variables}
+
+        seg_entree = shared_memory.SharedMemory(create=True, size=max(len(variables), 1) * n * 8)
+        seg_sortie = shared_memory.SharedMemory(create=True, size=len(sorties) * n * 8)
+        try:
+            return self._repartir(seg_entree, seg_sortie, tableaux, variables, constantes, sorties, n)
+        finally:
+            for segment in (seg_entree, seg_sortie):
+                segment.close()
+                segment.unlink()
+
+    def _repartir(self, seg_entree, seg_sortie, tableaux, variables, constantes, sorties, n):
+        valeurs = np.ndarray((len(variables), n), dtype=np.float64, buffer=seg_entree.buf)
+        for i, nom in enumerate(variables):
+            valeurs[i] = tableaux[nom]
+
+        baremes = etat_baremes()
+        taches = [
+            self._pool.submit(_simuler_tranche, baremes, seg_entree.name, variables, constantes,
+                              seg_sortie.name, sorties, n, debut, min(debut + self.taille_tranche, n))
+            for debut in range(0, n, self.taille_tranche)
+        ]
+        for tache in taches:
+            tache.result()
+
+        # Une seule copie hors du segment ; chaque sortie est une ligne de la matrice
+        resultats = np.ndarray((len(sorties), n), dtype=np.float64, buffer=seg_sortie.buf).copy()
+        types = types_sortie()
+        return {nom: resultats[i] if types[nom] == np.float64 else resultats[i].astype(types[nom])
+                for i, nom in enumerate(sorties)}
+
+
+def simuler_lot_parallele(colonnes, n=None, processus=None, sorties=None, taille_tranche=TAILLE_TRANCHE):
+    """simuler_lot sur `processus` cœurs (tous par défaut), pool créé pour l'appel"""
+    with CalculParallele(processus, taille_tranche) as calcul:
+        return calcul.simuler_lot(colonnes, n, sorties)
@@ -0,0 +1,138 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Chronométrage des reruns Streamlit                             ║
+║   Durée de chaque étape, éléments et octets envoyés, centiles glissants    ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Un ChronoRerun par session (st.session_state) : le script ouvre une étape
+autour de chaque bloc (CSS et logo, base PD, lookups, paie, sections
+affichées) et le panneau de performance lit les durées du rerun en cours.
+Les messages envoyés au navigateur sont comptés (éléments, taille des
+protobufs) seulement quand le panneau est affiché, et si la version de
+Streamlit le permet (sinon le panneau les indique non disponibles).
+
+Les durées sont celles du serveur : construire les éléments, pas les
+dessiner dans le navigateur.
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+FENETRE_RERUNS = 200
+ETAPE_PAIE = "Paie (simuler)"    # le panneau y rattache les nœuds chronométrés du graphe
+
+
+class ChronoRerun:
+    """Étapes du rerun en cours et durées des reruns précédents d'une session"""
+
+    def __init__(self, fenetre=FENETRE_RERUNS):
+        self.historique = deque(maxlen=fenetre)   # durée totale des reruns terminés (s)
+        self.etapes = {}                          # étape -> secondes (rerun en cours)
+        self.debut = time.perf_counter()
+        self.fin = self.debut                     # fin de la dernière étape du rerun en cours
+        self.total = 0.0
+        self.elements = None                      # None : envois non comptés
+        self.octets = None
+        self.en_cours = False
+        self._a_la_cloture = None
+
+    def demarrer(self, compter_envois=False):
+        """Début d'un rerun ; compter_envois : compte les messages envoyés au navigateur
+
+        Le rerun précédent, s'il s'est arrêté avant la fin du script
+        (exception), est d'abord clos.
+        """
+        self.clore(interrompu=True)
+        self.etapes = {}
+        self.debut = self.fin = time.perf_counter()
+        self.en_cours = True
+        self._a_la_cloture = None
+        if _suivre_envois(self if compter_envois else None):
+            self.elements = self.octets = 0
+        else:
+            self.elements = self.octets = None
+
+    def a_la_cloture(self, fonction):
+        """fonction(chrono) appelée une seule fois, à la clôture du rerun en cours"""
+        self._a_la_cloture = fonction
+
+    def ajouter(self, nom, secondes):
+        """Ajoute une durée à l'étape (cumulée si l'étape revient)"""
+        self.etapes[nom] = self.etapes.get(nom, 0.0) + secondes
+        self.fin = time.perf_counter()
+
+    @contextmanager
+    def etape(self, nom):
+        """Chronomètre le bloc dans l'étape nom"""
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.ajouter(nom, time.perf_counter() - debut)
+
+    def terminer(self, fin=None):
+        """Fin du rerun : sa durée totale (jusqu'à fin, maintenant par défaut) rejoint l'historique"""
+        self.total = (time.perf_counter() if fin is None else fin) - self.debut
+        self.historique.append(self.total)
+
+    def clore(self, interrompu=False):
+        """Termine le rerun en cours et appelle la fonction de clôture (sans effet s'il est déjà clos)
+
+        Appelé en fin de script, avant un st.rerun(), et par demarrer pour
+        un rerun interrompu par une exception : sa durée s'arrête alors à la
+        fin de sa dernière étape.
+        """
+        if not self.en_cours:
+            return
+        self.en_cours = False
+        self.terminer(self.fin if interrompu else None)
+        fonction, self._a_la_cloture = self._a_la_cloture, None
+        if fonction is not None:
+            fonction(self)
+
+    @property
+    def autres(self):
+        """Temps du rerun hors étapes chronométrées (sidebar, widgets...)"""
+        return max(0.0, self.total - sum(self.etapes.values()))
+
+    def centiles(self, centiles=(50, 95)):
+        """Centiles (s) des durées des derniers reruns"""
+        return tuple(np.percentile(self.historique, centiles)) if self.historique else (0.0,) * len(centiles)
+
+
+def _suivre_envois(chrono):
+    """Branche (ou débranche si chrono est None) le compteur sur les envois de la session
+
+    Renvoie True si les envois sont comptés. Le compteur remplace
+    ScriptRunContext._enqueue, attribut privé : absent (hors serveur, autre
+    version de Streamlit), rien n'est compté.
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None or not hasattr(ctx, '_enqueue'):     # hors serveur (tests, bare mode) ou API changée
+        return False
+    envoi = getattr(ctx._enqueue, '__wrapped__', ctx._enqueue)
+    if chrono is None:
+        ctx._enqueue = envoi
+        return False
+
+    def compter(message):
+        if message.WhichOneof('type') == 'delta':
+            chrono.elements += 1
+        chrono.octets += message.ByteSize()
+        envoi(message)
+
+    compter.__wrapped__ = envoi
+    ctx._enqueue = compter
+    return True
+
+
+def chrono_session(session_state):
+    """ChronoRerun de la session (créé au premier rerun)"""
+    if "chrono_rerun" not in session_state:
+        session_state["chrono_rerun"] = ChronoRerun()
+    return session_state["chrono_rerun"]
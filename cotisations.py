@@ -0,0 +1,247 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Tables des cotisations                                         ║
+║   Chaque cotisation décrite une fois : assiette, taux, côté, conditions    ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+La table est compilée au chargement en vecteurs de taux (un par cas
+attestation fiscale × dépassement du plafond, les lignes hors cas à 0) et en
+sélecteur d'assiettes : un bloc de cotisations devient montants = taux ×
+assiettes[sélecteur], puis un total accumulé dans l'ordre de la table, en
+unitaire comme en lot (mêmes opérations, mêmes résultats au bit près).
+L'affichage détaillé lit la même table.
+
+Mode bulletin (arrondi_centime) : chaque ligne est arrondie au centime comme
+sur une fiche de paie et le total est sommé en centimes entiers (int64 en
+lot), sans écart de représentation entre lignes et total.
+"""
+
+import math
+from dataclasses import dataclass
+from functools import reduce
+from operator import add, mul
+
+import numpy as np
+
+# Assiettes (valeurs du graphe de calcul) -> libellé
+ASSIETTES = {
+    'brut_total': "Brut total",
+    'tranche_a': "Tranche A",
+    'tranche_b': "Tranche B",
+    'assiette_cet': "Assiette CET",
+    'h_normales': "Heures normales",
+    'brut_sup_total': "Brut HS",
+    'base_csg': "Base CSG",
+    'base_hs_csg': "Base HS",
+}
+
+SALARIAL = 'salarial'
+PATRONAL = 'patronal'
+
+# Abattement pour frais professionnels sur l'assiette CSG/CRDS
+ABATTEMENT_CSG = 0.9825
+
+# Demi-centime relevé d'un millionième de centime : absorbe les erreurs de
+# représentation (1.005 × 100 = 100.49999999999999 s'arrondit à 101)
+DEMI_CENTIME = 0.5 + 1e-6
+
+
+@dataclass(frozen=True, slots=True)
+class Cotisation:
+    """Une ligne de cotisation
+
+    taux        : taux de l'assiette, ou nom d'un paramètre de simulation
+                  (ex. 'taux_accident')
+    attestation : None = toujours due, True = seulement avec attestation
+                  fiscale, False = seulement sans
+    depassement : due seulement si le brut cumulé dépasse le plafond SS
+                  cumulé, à date ou à la semaine précédente (régularisation)
+    reduction   : montant déduit du total
+    """
+    nom: str
+    libelle: str
+    assiette: str
+    taux: object
+    cote: str
+    attestation: object = None
+    depassement: bool = False
+    reduction: bool = False
+
+
+# Ordre de la table = ordre de sommation des totaux
+COTISATIONS_2026 = (
+    # Salariales
+    Cotisation('maladie', "Maladie", 'brut_total', 0.055, SALARIAL, attestation=True),
+    Cotisation('ss_plaf', "SS plafonnée", 'tranche_a', 0.069, SALARIAL),
+    Cotisation('ss_deplaf', "SS déplafonnée", 'brut_total', 0.004, SALARIAL),
+    Cotisation('comp_incap_t1', "Comp. Incap T1", 'tranche_a', 0.004, SALARIAL),
+    Cotisation('comp_t1', "Complémentaire T1", 'tranche_a', 0.0401, SALARIAL),
+    Cotisation('comp_sante', "Complémentaire santé", 'h_normales', 0.0874, SALARIAL),
+    Cotisation('csg_deduct', "CSG DÉDUCTIBLE", 'base_csg', 0.068, SALARIAL, attestation=False),
+    Cotisation('csg_non_deduct', "CSG NON DÉDUCTIBLE", 'base_csg', 0.029, SALARIAL, attestation=False),
+    Cotisation('csg_hs', "CSG NON DÉDUCTIBLE sur heures sup", 'base_hs_csg', 0.097, SALARIAL, attestation=False),
+    Cotisation('comp_incap_t2', "Comp. Incap T2", 'tranche_b', 0.00335, SALARIAL, depassement=True),
+    Cotisation('comp_t2', "Complémentaire T2", 'tranche_b', 0.0972, SALARIAL, depassement=True),
+    Cotisation('cet', "CET 1+2", 'assiette_cet', 0.0014, SALARIAL, depassement=True),
+    Cotisation('reduction_hs', "Réduction HS", 'brut_sup_total', 0.1131, SALARIAL, reduction=True),
+
+    # Patronales
+    Cotisation('secu_maladie', "Secu-Maladie-Mat-Inv-Deces", 'brut_total', 0.13, PATRONAL),
+    Cotisation('comp_sante_patron', "Complementaire sante", 'h_normales', 0.0874, PATRONAL),
+    Cotisation('accident', "Accidents du travail", 'brut_total', 'taux_accident', PATRONAL),
+    Cotisation('ss_deplaf_patron', "Securite Sociale deplafonnee", 'brut_total', 0.0211, PATRONAL),
+    Cotisation('famille', "Famille-Securite Sociale", 'brut_total', 0.0525, PATRONAL),
+    Cotisation('chomage', "Assurance chomage", 'brut_total', 0.0403, PATRONAL),
+    Cotisation('autres', "Autres contributions", 'brut_total', 0.03766, PATRONAL),
+    Cotisation('statutaires', "Cotisations statutaires", 'brut_total', 0.0015, PATRONAL),
+    Cotisation('comp_incap_t1_patron', "Complementaire Incap-Inv-Deces T1", 'tranche_a', 0.00449, PATRONAL),
+    Cotisation('ss_plaf_patron', "Securite Sociale plafonnee", 'tranche_a', 0.0855, PATRONAL),
+    Cotisation('comp_t1_patron', "Complementaire Tranche 1", 'tranche_a', 0.0601, PATRONAL),
+    Cotisation('comp_incap_t2_patron', "Complementaire Incap-Inv-Deces T2", 'tranche_b', 0.00385, PATRONAL,
+               depassement=True),
+    Cotisation('comp_t2_patron', "Complementaire Tranche 2", 'tranche_b', 0.1457, PATRONAL, depassement=True),
+    Cotisation('cet_patron', "CET 1+2", 'assiette_cet', 0.0014, PATRONAL, depassement=True),
+)
+
+# (attestation fiscale, brut cumulé au-dessus du plafond) : colonne des taux compilés
+CAS = ((False, False), (False, True), (True, False), (True, True))
+
+
+def _applicable(ligne, attestation, depassement):
+    return ((ligne.attestation is None or ligne.attestation == attestation)
+            and (depassement or not ligne.depassement))
+
+
+@dataclass(frozen=True)
+class TableCotisations:
+    """Un côté de la table, compilé
+
+    `assiettes` : assiettes utilisées, dans l'ordre de ASSIETTES (ordre des
+    valeurs à fournir) ; `selecteur[i]` : assiette de la ligne i ;
+    `taux[cas]` : taux de chaque ligne pour un cas de CAS (0 hors cas, 1 pour
+    un taux paramètre, multiplié ensuite par sa valeur) ; `variables` :
+    (ligne, paramètre) des taux paramètres.
+    """
+    lignes: tuple
+    noms: tuple
+    assiettes: tuple
+    selecteur: tuple
+    taux: dict
+    taux_lot: np.ndarray       # lignes × CAS
+    signes: tuple
+    variables: tuple
+
+    @property
+    def parametres(self):
+        """Paramètres de simulation servant de taux, dans l'ordre attendu par montants"""
+        return tuple(nom for _, nom in self.variables)
+
+    def appliquees(self, attestation, depassement):
+        """Lignes dues dans ce cas : (indice, Cotisation)"""
+        return tuple((i, ligne) for i, ligne in enumerate(self.lignes)
+                     if _applicable(ligne, bool(attestation), bool(depassement)))
+
+    def montants(self, bases, attestation, depassement, valeurs=()):
+        """Montant de chaque ligne ; bases dans l'ordre de `assiettes`"""
+        taux = self.taux[bool(attestation), bool(depassement)]
+        if valeurs:
+            taux = list(taux)
+            for (i, _), valeur in zip(self.variables, valeurs):
+                taux[i] *= valeur
+        return tuple(map(mul, map(bases.__getitem__, self.selecteur), taux))
+
+    def total(self, montants):
+        """Somme des montants dans l'ordre de la table (réductions déduites)"""
+        return reduce(add, map(mul, montants, self.signes))
+
+    def montants_lot(self, bases, attestation, depassement, valeurs=()):
+        """Version vectorielle de montants : tableau lignes × scénarios"""
+        n = np.broadcast(*bases, attestation, depassement).size
+        cas = np.broadcast_to(2 * np.asarray(attestation, dtype=np.intp) + np.asarray(depassement, dtype=np.intp),
+                              (n,))
+        montants = np.empty((len(self.lignes), n))
+        for i, (assiette, taux) in enumerate(zip(self.selecteur, self.taux_lot)):
+            np.multiply(bases[assiette], taux[cas], out=montants[i])
+        for (i, _), valeur in zip(self.variables, valeurs):
+            montants[i] *= valeur
+        return montants
+
+    def total_lot(self, montants):
+        total = montants[0] * self.signes[0]
+        for montant, signe in zip(montants[1:], self.signes[1:]):
+            total = total + montant * signe
+        return total
+
+    def total_centimes(self, montants):
+        """Mode bulletin : (montants arrondis au centime, total sommé en centimes entiers)"""
+        lignes = tuple(map(centimes, montants))
+        total = sum(c if signe > 0 else -c for c, signe in zip(lignes, self.signes))
+        return tuple(c / 100 for c in lignes), total / 100
+
+    def total_centimes_lot(self, montants):
+        """Version vectorielle de total_centimes (lignes × scénarios en int64)"""
+        lignes = _centimes_flottants(montants)
+        with np.errstate(invalid='ignore'):
+            total = np.asarray(self.signes, dtype=np.int64) @ lignes.astype(np.int64)
+        lignes /= 100
+        return lignes, total / 100
+
+
+def centimes(montant):
+    """Montant en centimes entiers, au plus proche (demi-centime : en s'éloignant de zéro)"""
+    return int(math.copysign(math.floor(abs(montant) * 100 + DEMI_CENTIME), montant))
+
+
+def _centimes_flottants(montants):
+    # Centimes entiers portés par des float64 (exacts sous 2**53), calculés en place
+    centimes = np.multiply(montants, 100)
+    np.abs(centimes, out=centimes)
+    centimes += DEMI_CENTIME
+    np.floor(centimes, out=centimes)
+    return np.copysign(centimes, montants, out=centimes)
+
+
+def au_centime_lot(montants):
+    """Montants arrondis au centime (float64) : version vectorielle de centimes(montant) / 100"""
+    montants = _centimes_flottants(montants)
+    montants /= 100
+    return montants
+
+
+def compiler(cotisations, cote):
+    """Compile les lignes d'un côté (SALARIAL ou PATRONAL) d'une table"""
+    lignes = tuple(c for c in cotisations if c.cote == cote)
+    inconnues = {c.assiette for c in lignes} - set(ASSIETTES)
+    if inconnues:
+        raise KeyError(f"Assiettes inconnues : {', '.join(sorted(inconnues))}")
+    assiettes = tuple(a for a in ASSIETTES if any(c.assiette == a for c in lignes))
+
+    taux = {}
+    for cas in CAS:
+        taux[cas] = tuple((1.0 if isinstance(c.taux, str) else c.taux) if _applicable(c, *cas) else 0.0
+                          for c in lignes)
+    taux_lot = np.array([taux[cas] for cas in CAS], dtype=np.float64).T.copy()
+    taux_lot.setflags(write=False)
+
+    return TableCotisations(
+        lignes=lignes,
+        noms=tuple(c.nom for c in lignes),
+        assiettes=assiettes,
+        selecteur=tuple(assiettes.index(c.assiette) for c in lignes),
+        taux=taux,
+        taux_lot=taux_lot,
+        signes=tuple(-1.0 if c.reduction else 1.0 for c in lignes),
+        variables=tuple((i, c.taux) for i, c in enumerate(lignes) if isinstance(c.taux, str)),
+    )
+
+
+COTISATIONS_SALARIALES = compiler(COTISATIONS_2026, SALARIAL)
+COTISATIONS_PATRONALES = compiler(COTISATIONS_2026, PATRONAL)
+
+
+def taux_de(nom, cotisations=COTISATIONS_2026):
+    """Taux d'une ligne de la table (ex. part patronale mutuelle pour l'assiette CSG)"""
+    for c in cotisations:
+        if c.nom == nom:
+            return c.taux
+    raise KeyError(f"Cotisation inconnue : {nom}")
@@ -0,0 +1,162 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Graphe de calcul                                               ║
+║   Nœuds nommés, dépendances explicites, recalcul du seul cône aval         ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Un nœud est une fonction dont les paramètres portent le nom de ses
+dépendances (entrées du graphe ou sorties d'autres nœuds) :
+
+    @graphe.noeud('ifm')
+    def _ifm(brut_avant_ifm, payer_ifm):
+        return brut_avant_ifm * 0.10 if payer_ifm else 0.0
+
+Les nœuds sont enregistrés dans l'ordre du calcul : une dépendance doit déjà
+exister, ce qui garantit un graphe sans cycle et fournit l'ordre
+topologique.
+"""
+
+import inspect
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
+
+
+@dataclass(frozen=True, slots=True)
+class Noeud:
+    """Fonction du graphe : dépendances (noms des paramètres) -> sorties"""
+    nom: str
+    fonction: object
+    dependances: tuple
+    sorties: tuple   # plusieurs sorties : la fonction renvoie un tuple dans cet ordre
+    arguments: object   # valeurs -> tuple des valeurs des dépendances
+
+
+def _lecteur(noms):
+    if len(noms) == 1:
+        lire = itemgetter(noms[0])
+        return lambda valeurs: (lire(valeurs),)
+    return itemgetter(*noms) if noms else lambda valeurs: ()
+
+
+class Graphe:
+    """Graphe de calcul orienté sans cycle"""
+
+    def __init__(self, entrees):
+        self.entrees = tuple(entrees)
+        self.noeuds = []
+        self.producteur = {}   # sortie -> Noeud
+
+    def noeud(self, *sorties):
+        """Décorateur : enregistre la fonction comme nœud (sortie par défaut : son nom sans '_')"""
+        def enregistrer(fonction):
+            nom = fonction.__name__.lstrip('_')
+            dependances = tuple(inspect.signature(fonction).parameters)
+            inconnues = [d for d in dependances if d not in self.producteur and d not in self.entrees]
+            if inconnues:
+                raise KeyError(f"Nœud {nom} : dépendances inconnues {', '.join(inconnues)}")
+            noeud = Noeud(nom, fonction, dependances, sorties or (nom,), _lecteur(dependances))
+            for sortie in noeud.sorties:
+                if sortie in self.producteur or sortie in self.entrees:
+                    raise KeyError(f"Nœud {nom} : sortie {sortie} déjà définie")
+                self.producteur[sortie] = noeud
+            self.noeuds.append(noeud)
+            self.cone.cache_clear()
+            self.entrees_de.cache_clear()
+            return fonction
+        return enregistrer
+
+    def evaluer(self, entrees):
+        """Évalue tout le graphe ; renvoie les entrées et toutes les sorties"""
+        valeurs = dict(entrees)
+        for noeud in self.noeuds:
+            resultat = noeud.fonction(*noeud.arguments(valeurs))
+            if len(noeud.sorties) == 1:
+                valeurs[noeud.sorties[0]] = resultat
+            else:
+                valeurs.update(zip(noeud.sorties, resultat))
+        return valeurs
+
+    @lru_cache(maxsize=None)
+    def cone(self, modifiees):
+        """Nœuds en aval des noms donnés (frozenset), dans l'ordre du calcul"""
+        touches = set(modifiees)
+        aval = []
+        for noeud in self.noeuds:
+            if not touches.isdisjoint(noeud.dependances):
+                aval.append(noeud)
+                touches.update(noeud.sorties)
+        return tuple(aval)
+
+    @lru_cache(maxsize=None)
+    def entrees_de(self, nom):
+        """Entrées du graphe dont dépend une sortie (une entrée dépend d'elle-même)"""
+        if nom in self.entrees:
+            return frozenset((nom,))
+        if nom not in self.producteur:
+            raise KeyError(f"Sortie inconnue : {nom}")
+        return frozenset().union(*(self.entrees_de(d) for d in self.producteur[nom].dependances))
+
+    def sorties_de(self, entree):
+        """Sorties qui changent (potentiellement) avec une entrée"""
+        return frozenset(s for noeud in self.cone(frozenset((entree,))) for s in noeud.sorties)
+
+
+def _identique(a, b):
+    # Le type compte : 41 et 41.0 sont égaux mais ne s'affichent pas pareil
+    return a.__class__ is b.__class__ and a == b
+
+
+def _identiques(a, b):
+    return a == b and all(x.__class__ is y.__class__ for x, y in zip(a, b))
+
+
+class CalculIncremental:
+    """Valeurs mémorisées d'un graphe, recalculées seulement en aval des changements
+
+    Chaque nœud garde l'empreinte (valeurs typées) des dépendances avec
+    lesquelles il a été évalué : un nœud du cône aval dont les dépendances
+    n'ont pas changé (ex. ifm quand payer_ifm reste faux) n'est pas réévalué,
+    et la propagation s'arrête là.
+    """
+
+    def __init__(self, graphe):
+        self.graphe = graphe
+        self.valeurs = {}
+        self.empreintes = {}     # nom du nœud -> valeurs de ses dépendances à la dernière évaluation
+        self.reevalues = ()      # nœuds réévalués au dernier calcul
+        self.durees = None       # dict à remplir (nom du nœud -> secondes) pour chronométrer les nœuds
+
+    def calculer(self, entrees):
+        """Met à jour les entrées ; renvoie toutes les valeurs (dict partagé, ne pas modifier)"""
+        if not self.empreintes:
+            noeuds = self.graphe.noeuds
+        else:
+            valeurs = self.valeurs
+            modifiees = frozenset(nom for nom in self.graphe.entrees
+                                  if entrees[nom] is not valeurs[nom] and not _identique(entrees[nom], valeurs[nom]))
+            noeuds = self.graphe.cone(modifiees)
+        self.valeurs.update((nom, entrees[nom]) for nom in self.graphe.entrees)
+
+        reevalues = []
+        durees = self.durees
+        for noeud in noeuds:
+            empreinte = noeud.arguments(self.valeurs)
+            precedente = self.empreintes.get(noeud.nom)
+            if precedente is not None and _identiques(precedente, empreinte):
+                continue
+            if durees is None:
+                resultat = noeud.fonction(*empreinte)
+            else:
+                debut = time.perf_counter()
+                resultat = noeud.fonction(*empreinte)
+                durees[noeud.nom] = time.perf_counter() - debut
+            if len(noeud.sorties) == 1:
+                self.valeurs[noeud.sorties[0]] = resultat
+            else:
+                self.valeurs.update(zip(noeud.sorties, resultat))
+            self.empreintes[noeud.nom] = empreinte
+            reevalues.append(noeud.nom)
+        self.reevalues = tuple(reevalues)
+        return self.valeurs
@@ -0,0 +1,255 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Grille tarifaire Petit Déplacement                             ║
+║   Département × zone × niveau × heures, précalculée à chaque chargement    ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Toutes les combinaisons sont calculées en un seul appel à simuler_lot et
+rangées dans des tableaux denses (départements × zones × niveaux × heures) :
+une question « N3P1, zone III, 13, 41h » devient une lecture d'indice.
+Après un rechargement de la base, seuls les départements du diff sont
+recalculés ; un rechargement pendant la construction la fait reprendre sur
+le nouvel index. La grille partagée est refaite si le barème change.
+"""
+
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict, replace
+from pathlib import Path
+from types import MappingProxyType
+
+import numpy as np
+
+from base_pd import (
+    index_pd_partage, abonner_rechargement, completer_colonnes_pd, cle_departement,
+    CODES_ZONES, NIVEAUX, INDICE_ZONE, INDICE_NIVEAU, COLONNES_AUTO_PD,
+)
+from baremes import bareme_au
+from cache_resultats import version_bareme
+from moteur_paie import ParametresSimulation
+from moteur_vectoriel import simuler_lot
+
+HEURES_GRILLE = tuple(range(35, 49))
+
+# Indicateur -> sortie du moteur
+INDICATEURS = {
+    'taux_brut': 'taux_brut',
+    'brut_total': 'brut_total',
+    'cout_total': 'cout_total_comptable',
+    'ca_ht': 'ca_ht_comptable',
+    'taux_facturation': 'taux_fact_comptable',
+    'coefficient': 'coeff_comptable',
+}
+
+
+def _calculer(departements, index, heures, parametres):
+    """Tableaux (départements × zones × niveaux × heures) de chaque indicateur"""
+    forme = (len(departements), len(CODES_ZONES), len(NIVEAUX), len(heures))
+    d, z, nv, h = np.meshgrid(np.arange(forme[0]), np.arange(forme[1]), np.arange(forme[2]),
+                              np.asarray(heures, dtype=np.float64), indexing='ij')
+
+    colonnes = {nom: v for nom, v in asdict(parametres).items() if nom not in COLONNES_AUTO_PD}
+    colonnes.update(
+        grand_deplacement=False,
+        heures_semaine=h.ravel(),
+        departement=np.asarray(departements, dtype=object)[d.ravel()],
+        zone_chantier=z.ravel(),
+        niveau=nv.ravel(),
+    )
+    n = d.size
+    colonnes = completer_colonnes_pd(colonnes, index, n)
+    resultats = simuler_lot(colonnes, n)
+    resultats['taux_brut'] = colonnes['taux_brut']
+    return {nom: np.asarray(resultats[sortie], dtype=np.float64).reshape(forme)
+            for nom, sortie in INDICATEURS.items()}
+
+
+@dataclass(frozen=True)
+class GrilleTarifaire:
+    """Grille PD dense et immuable, partageable entre sessions
+
+    `valeurs[indicateur]` : tableau départements × CODES_ZONES × NIVEAUX ×
+    heures. Les taux PD viennent de la base, les autres paramètres de
+    `parametres` (ceux de la sidebar par défaut).
+    """
+    departements: tuple
+    positions: MappingProxyType
+    heures: tuple
+    parametres: ParametresSimulation
+    valeurs: MappingProxyType
+
+    @classmethod
+    def depuis_tableaux(cls, departements, heures, parametres, valeurs):
+        for tableau in valeurs.values():
+            tableau.setflags(write=False)
+        return cls(tuple(departements), MappingProxyType({d: i for i, d in enumerate(departements)}),
+                   tuple(heures), parametres, MappingProxyType(valeurs))
+
+    def valeur(self, departement, zone, niveau, heures, indicateur='taux_facturation'):
+        """Lecture directe ; None si la combinaison est hors grille"""
+        ligne = self.positions.get(cle_departement(str(departement)))
+        z = INDICE_ZONE.get(zone)
+        nv = INDICE_NIVEAU.get(niveau)
+        if ligne is None or z is None or nv is None or heures not in self.heures:
+            return None
+        return float(self.valeurs[indicateur][ligne, z, nv, self.heures.index(heures)])
+
+    def facturation(self, marge_pct):
+        """CA HT, taux de facturation et coefficient pour une autre marge, sans recalcul
+
+        ca_ht = coût / (1 - marge) + refacturation : seul le coût dépend de la base.
+        """
+        p = self.parametres
+        ca_ht = self.valeurs['cout_total'] / (1 - marge_pct / 100) + p.nb_refactu * p.taux_refactu
+        taux_facturation = ca_ht / np.asarray(self.heures, dtype=np.float64)
+        return {'ca_ht': ca_ht, 'taux_facturation': taux_facturation,
+                'coefficient': taux_facturation / self.valeurs['taux_brut']}
+
+    def tableau(self, departements=None, zones=None, niveaux=None, heures=None, indicateurs=None, marge_pct=None):
+        """DataFrame (une ligne par combinaison) restreint aux valeurs demandées"""
+        import pandas as pd
+
+        deps = list(self.departements if departements is None else
+                    [d for d in (cle_departement(str(d)) for d in departements) if d in self.positions])
+        zones = list(CODES_ZONES if zones is None else zones)
+        niveaux = list(NIVEAUX if niveaux is None else niveaux)
+        heures = [h for h in (self.heures if heures is None else heures) if h in self.heures]
+        indicateurs = list(INDICATEURS if indicateurs is None else indicateurs)
+
+        selection = np.ix_([self.positions[d] for d in deps], [INDICE_ZONE[z] for z in zones],
+                           [INDICE_NIVEAU[nv] for nv in niveaux], [self.heures.index(h) for h in heures])
+        cles = np.meshgrid(np.arange(len(deps)), np.arange(len(zones)), np.arange(len(niveaux)),
+                           np.arange(len(heures)), indexing='ij')
+        table = {
+            'departement': np.asarray(deps, dtype=object)[cles[0].ravel()],
+            'zone': np.asarray([CODES_ZONES[INDICE_ZONE[z]] for z in zones], dtype=object)[cles[1].ravel()],
+            'niveau': np.asarray(niveaux, dtype=object)[cles[2].ravel()],
+            'heures': np.asarray(heures)[cles[3].ravel()],
+        }
+        # Une autre marge change le CA HT, le taux de facturation et le coefficient
+        valeurs = self.valeurs if marge_pct is None else {**self.valeurs, **self.facturation(marge_pct)}
+        for nom in indicateurs:
+            table[nom] = valeurs[nom][selection].ravel()
+        return pd.DataFrame(table)
+
+    def exporter(self, destination, format=None, marge_pct=None):
+        """Écrit toute la grille dans un seul fichier, 'csv' ou 'xlsx'
+
+        destination : chemin (format déduit de l'extension) ou fichier ouvert.
+        """
+        format = format or Path(destination).suffix.lstrip(".").lower()
+        df = self.tableau(marge_pct=marge_pct).round(2)
+        if format == "xlsx":
+            df.to_excel(destination, index=False, sheet_name="Grille_PD")
+        else:
+            df.to_csv(destination, index=False)
+        return destination
+
+    def mettre_a_jour(self, diff):
+        """Nouvelle grille pour l'index du diff ; seuls les départements touchés sont recalculés"""
+        index = diff.nouveau
+        departements = index.departements
+        a_calculer = [d for d in departements if d in diff.departements or d not in self.positions]
+        calcules = _calculer(a_calculer, index, self.heures, self.parametres) if a_calculer else {}
+
+        recalcul = set(a_calculer)
+        lignes_reprises = [i for i, d in enumerate(departements) if d not in recalcul]
+        anciennes = [self.positions[departements[i]] for i in lignes_reprises]
+        lignes_calculees = [i for i, d in enumerate(departements) if d in recalcul]
+
+        valeurs = {}
+        for nom, ancien in self.valeurs.items():
+            tableau = np.empty((len(departements),) + ancien.shape[1:])
+            tableau[lignes_reprises] = ancien[anciennes]
+            if a_calculer:
+                tableau[lignes_calculees] = calcules[nom]
+            valeurs[nom] = tableau
+        return GrilleTarifaire.depuis_tableaux(departements, self.heures, self.parametres, valeurs)
+
+
+def construire_grille(index, heures=HEURES_GRILLE, parametres=None):
+    """Calcule la grille complète pour un index PD
+
+    parametres : ParametresSimulation des champs non PD (marge, options...) ;
+    le type de déplacement, les heures et les taux PD sont imposés par la grille.
+    """
+    parametres = replace(parametres or ParametresSimulation(), grand_deplacement=False)
+    valeurs = _calculer(index.departements, index, heures, parametres)
+    return GrilleTarifaire.depuis_tableaux(index.departements, heures, parametres, valeurs)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# GRILLE PARTAGÉE, MISE À JOUR AU RECHARGEMENT DE LA BASE
+# ═══════════════════════════════════════════════════════════════════════════
+
+_verrou_grille = threading.Lock()
+_grille_partagee = None     # (version, GrilleTarifaire)
+_construction = None        # Future de la construction en cours
+_perimee = False            # base rechargée pendant la construction : à refaire
+
+
+def _version():
+    # La grille suit le barème en vigueur (date_effet=None) : source, constantes et date d'effet
+    return version_bareme(), bareme_au(None).date_effet
+
+
+def _construire(construction):
+    """Corps du fil de construction : recommence tant que la base est rechargée pendant le calcul"""
+    global _grille_partagee, _construction, _perimee
+    try:
+        while True:
+            with _verrou_grille:
+                _perimee = False
+            version = _version()
+            grille = construire_grille(index_pd_partage())
+            with _verrou_grille:
+                if not _perimee:
+                    _grille_partagee = version, grille
+                    _construction = None
+                    break
+    except BaseException as erreur:
+        with _verrou_grille:
+            _construction = None
+        construction.set_exception(erreur)
+        return
+    construction.set_result(grille)
+
+
+def _grille_ou_construction():
+    """(grille à jour, None) ou (None, Future de la construction en cours, lancée au besoin)"""
+    global _construction
+    version = _version()
+    with _verrou_grille:
+        if _grille_partagee is not None and _grille_partagee[0] == version:
+            return _grille_partagee[1], None
+        if _construction is None:
+            _construction = Future()
+            threading.Thread(target=_construire, args=(_construction,), name="grille-tarifaire",
+                             daemon=True).start()
+        return None, _construction
+
+
+def grille_partagee():
+    """Grille du processus pour l'index PD partagé et le barème en vigueur (attend sa construction)"""
+    grille, construction = _grille_ou_construction()
+    return grille if construction is None else construction.result()
+
+
+def precalculer_grille():
+    """Lance la construction de la grille partagée si elle manque ou a changé de barème
+
+    Un seul fil à la fois, sans bloquer la page qui charge : les reruns
+    suivants retrouvent la construction en cours.
+    """
+    _grille_ou_construction()
+
+
+@abonner_rechargement
+def _sur_rechargement(diff):
+    global _grille_partagee, _perimee
+    with _verrou_grille:
+        if _construction is not None:
+            _perimee = True     # la construction en cours repart de l'index rechargé
+        elif _grille_partagee is not None:
+            version, grille = _grille_partagee
+            _grille_partagee = version, grille.mettre_a_jour(diff)
@@ -0,0 +1,90 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Habillage de la page                                           ║
+║   Logo et feuille de style servis en statique, police Inter embarquée      ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Le logo (static/logo_acterim.png) et la feuille de style (static/acterim.css)
+sont servis par Streamlit (server.enableStaticServing) et référencés par
+URL : un rerun n'envoie plus qu'un @import et une balise <img> au lieu de
+toute la feuille de style et du logo encodé en base64. L'URL porte
+l'empreinte du fichier, calculée une fois par processus : le navigateur
+garde sa copie tant que le fichier ne change pas.
+
+La police Inter (static/polices, licence OFL) est déclarée dans
+.streamlit/config.toml ([[theme.fontFaces]]) : plus d'@import Google Fonts,
+qui bloquait l'affichage sur les postes sans accès internet.
+
+Sans service statique, repli sur l'injection en ligne (feuille de style lue
+et logo encodé une seule fois par processus).
+"""
+
+import base64
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+import streamlit as st
+
+DOSSIER_STATIQUE = Path(__file__).parent / "static"
+URL_STATIQUE = "app/static"
+FEUILLE_STYLE = "acterim.css"
+LOGO = "logo_acterim.png"
+
+
+def service_statique():
+    """Vrai si Streamlit sert le dossier static/ (server.enableStaticServing)"""
+    return bool(st.get_option("server.enableStaticServing"))
+
+
+@lru_cache(maxsize=None)
+def _contenu(nom):
+    chemin = DOSSIER_STATIQUE / nom
+    return chemin.read_bytes() if chemin.is_file() else None
+
+
+@lru_cache(maxsize=None)
+def url_statique(nom):
+    """URL d'un fichier de static/, suffixée de son empreinte (None si absent)"""
+    contenu = _contenu(nom)
+    if contenu is None:
+        return None
+    return f"{URL_STATIQUE}/{nom}?v={hashlib.sha1(contenu).hexdigest()[:12]}"
+
+
+@lru_cache(maxsize=None)
+def _logo_en_ligne():
+    contenu = _contenu(LOGO)
+    return f"data:image/png;base64,{base64.b64encode(contenu).decode()}" if contenu else None
+
+
+@lru_cache(maxsize=None)
+def _style_en_ligne():
+    contenu = _contenu(FEUILLE_STYLE)
+    return f"<style>{contenu.decode()}</style>" if contenu else None
+
+
+def afficher_habillage():
+    """Feuille de style et en-tête ACTÉRIM (logo, ou le titre s'il manque)"""
+    if service_statique():
+        feuille = url_statique(FEUILLE_STYLE)
+        style = f'<style>@import url("{feuille}");</style>' if feuille else None
+        logo = url_statique(LOGO)
+    else:
+        style = _style_en_ligne()
+        logo = _logo_en_ligne()
+    if style:
+        st.html(style)   # balises <style> seules : conteneur d'événements, sans place dans la page
+
+    if logo:
+        st.markdown(f"""
+    <div class="acterim-header">
+        <img src="{logo}" class="acterim-logo-img" alt="ACTÉRIM Logo">
+    </div>
+    """, unsafe_allow_html=True)
+    else:
+        st.markdown("""
+    <div class="acterim-header">
+        <div style="color: white; font-size: 36px; font-weight: 700;">Actérim - Simulateur Paie BTP</div>
+    </div>
+    """, unsafe_allow_html=True)
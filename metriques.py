@@ -0,0 +1,241 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Métriques d'exploitation                                       ║
+║   Reruns, latences par étape, caches, rechargements, sessions, mémoire     ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Registre unique du processus (METRIQUES), alimenté à la fin de chaque rerun
+de la page principale par le ChronoRerun de la session. Avec la variable
+d'environnement ACTERIM_METRIQUES=<dossier>, un fil exporte toutes les
+INTERVALLE_EXPORT secondes :
+
+    metriques.prom     format texte Prometheus (collecteur « textfile » de
+                       node_exporter), remplacé atomiquement
+    metriques.jsonl    une ligne JSON par export
+
+Profilage (opt-in, ralentit les reruns) : ACTERIM_PROFILS=N garde dans
+<dossier>/profils/ le cProfile des N reruns les plus lents (fichiers .prof
+lisibles par pstats ou snakeviz).
+"""
+
+import bisect
+import cProfile
+import heapq
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from base_pd import statistiques_base_pd
+from cache_resultats import CACHE_RESULTATS
+
+# Bornes (s) des histogrammes de latence
+BORNES_LATENCE = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ETAPE_RERUN = "rerun"               # durée totale, à côté des étapes du ChronoRerun
+INTERVALLE_EXPORT = 15.0
+SESSION_ACTIVE = 300.0              # une session est active si elle a relancé le script depuis 5 min
+PREFIXE = "acterim"
+
+
+class Histogramme:
+    """Histogramme de latences à bornes fixes (comptes non cumulés, +Inf en dernier)"""
+
+    def __init__(self, bornes=BORNES_LATENCE):
+        self.bornes = bornes
+        self.comptes = [0] * (len(bornes) + 1)
+        self.somme = 0.0
+        self.nombre = 0
+
+    def observer(self, secondes):
+        self.comptes[bisect.bisect_left(self.bornes, secondes)] += 1
+        self.somme += secondes
+        self.nombre += 1
+
+    def cumules(self):
+        """(borne, compte cumulé) au format Prometheus, +Inf compris"""
+        total = 0
+        for borne, compte in zip((*self.bornes, float("inf")), self.comptes):
+            total += compte
+            yield borne, total
+
+
+def _memoire_rss():
+    """Mémoire résidente du processus (octets) ; à défaut le pic (getrusage)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _etiquette(valeur):
+    return str(valeur).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _borne(borne):
+    return "+Inf" if borne == float("inf") else repr(borne)
+
+
+class Metriques:
+    """Compteurs et histogrammes du processus (partagés par les sessions)"""
+
+    def __init__(self, profils=0, dossier_profils=None):
+        self._verrou = threading.Lock()
+        self.reruns = 0
+        self.histogrammes = {}          # étape -> Histogramme
+        self._sessions = {}             # id du ChronoRerun de la session -> dernier rerun (monotonic)
+        self.profils = profils
+        self.dossier_profils = Path(dossier_profils) if dossier_profils else None
+        self._plus_lents = []           # tas (durée, fichier) des reruns profilés gardés
+
+    # ─── Alimentation (fin de rerun) ──────────────────────────────────────
+
+    def profiler(self):
+        """cProfile démarré pour ce rerun si le profilage est activé, sinon None"""
+        if not self.profils or self.dossier_profils is None:
+            return None
+        profil = cProfile.Profile()
+        try:
+            profil.enable()
+        except ValueError:   # un autre profileur est déjà actif
+            return None
+        return profil
+
+    def enregistrer_rerun(self, chrono, profil=None):
+        """Compte le rerun terminé de chrono (durées par étape) ; garde son profil s'il est parmi les plus lents"""
+        if profil is not None:
+            profil.disable()
+        with self._verrou:
+            self.reruns += 1
+            self._sessions[id(chrono)] = time.monotonic()
+            for etape, secondes in (*chrono.etapes.items(), (ETAPE_RERUN, chrono.total)):
+                if etape not in self.histogrammes:
+                    self.histogrammes[etape] = Histogramme()
+                self.histogrammes[etape].observer(secondes)
+            garder = profil is not None and (len(self._plus_lents) < self.profils
+                                             or chrono.total > self._plus_lents[0][0])
+        if garder:
+            self._garder_profil(profil, chrono.total)
+
+    def _garder_profil(self, profil, duree):
+        self.dossier_profils.mkdir(parents=True, exist_ok=True)
+        fichier = self.dossier_profils / f"rerun_{duree * 1000:08.1f}ms_{datetime.now():%Y%m%d_%H%M%S_%f}.prof"
+        profil.dump_stats(fichier)
+        with self._verrou:
+            heapq.heappush(self._plus_lents, (duree, str(fichier)))
+            retires = [heapq.heappop(self._plus_lents) for _ in range(len(self._plus_lents) - self.profils)]
+        for _, ancien in retires:
+            Path(ancien).unlink(missing_ok=True)
+
+    # ─── Lecture ──────────────────────────────────────────────────────────
+
+    def sessions_actives(self):
+        limite = time.monotonic() - SESSION_ACTIVE
+        with self._verrou:
+            for session in [s for s, vu in self._sessions.items() if vu < limite]:
+                del self._sessions[session]
+            return len(self._sessions)
+
+    def instantane(self):
+        """Toutes les métriques (dict sérialisable en JSON)"""
+        sessions = self.sessions_actives()
+        with self._verrou:
+            histogrammes = {
+                etape: {'nombre': h.nombre, 'somme': h.somme,
+                        'cumules': {_borne(b): n for b, n in h.cumules()}}
+                for etape, h in self.histogrammes.items()
+            }
+            reruns = self.reruns
+        return {
+            'horodatage': datetime.now().isoformat(timespec='seconds'),
+            'reruns': reruns,
+            'latences': histogrammes,
+            'cache_resultats': CACHE_RESULTATS.statistiques(),
+            'base_pd': statistiques_base_pd(),
+            'sessions_actives': sessions,
+            'memoire_rss_octets': _memoire_rss(),
+        }
+
+    def prometheus(self, instantane=None):
+        """Format texte d'exposition Prometheus"""
+        m = instantane or self.instantane()
+        lignes = []
+
+        def metrique(nom, type_, aide, valeurs):
+            lignes.append(f"# HELP {PREFIXE}_{nom} {aide}")
+            lignes.append(f"# TYPE {PREFIXE}_{nom} {type_}")
+            for suffixe, etiquettes, valeur in valeurs:
+                etiquettes = ",".join(f'{cle}="{_etiquette(v)}"' for cle, v in etiquettes.items())
+                lignes.append(f"{PREFIXE}_{nom}{suffixe}{{{etiquettes}}} {valeur}" if etiquettes
+                              else f"{PREFIXE}_{nom}{suffixe} {valeur}")
+
+        metrique("reruns_total", "counter", "Reruns complets de la page principale", [("", {}, m['reruns'])])
+        valeurs = []
+        for etape, h in m['latences'].items():
+            valeurs += [("_bucket", {'etape': etape, 'le': borne}, n) for borne, n in h['cumules'].items()]
+            valeurs += [("_sum", {'etape': etape}, repr(h['somme'])), ("_count", {'etape': etape}, h['nombre'])]
+        metrique("etape_secondes", "histogram", f"Durée des étapes d'un rerun (etape=\"{ETAPE_RERUN}\" : total)",
+                 valeurs)
+        for cache, stats, aide in (('cache_resultats', m['cache_resultats'], "cache des résultats de paie"),
+                                   ('cache_base_pd', {'succes': m['base_pd']['cache_succes'],
+                                                      'echecs': m['base_pd']['cache_echecs'],
+                                                      'taux_succes': m['base_pd']['taux_succes']},
+                                    "cache binaire de la base PD (départements)")):
+            metrique(f"{cache}_succes_total", "counter", f"Succès du {aide}", [("", {}, stats['succes'])])
+            metrique(f"{cache}_echecs_total", "counter", f"Échecs du {aide}", [("", {}, stats['echecs'])])
+            metrique(f"{cache}_taux_succes", "gauge", f"Taux de succès du {aide}",
+                     [("", {}, repr(stats['taux_succes']))])
+        metrique("base_pd_rechargements_total", "counter", "Rechargements de la base PD (modifie : diff non vide)",
+                 [("", {'modifie': 'non'}, m['base_pd']['rechargements'] - m['base_pd']['rechargements_modifies']),
+                  ("", {'modifie': 'oui'}, m['base_pd']['rechargements_modifies'])])
+        metrique("sessions_actives", "gauge", f"Sessions ayant relancé le script depuis {SESSION_ACTIVE:.0f} s",
+                 [("", {}, m['sessions_actives'])])
+        metrique("memoire_rss_octets", "gauge", "Mémoire résidente du processus", [("", {}, m['memoire_rss_octets'])])
+        return "\n".join(lignes) + "\n"
+
+    def exporter(self, dossier):
+        """Écrit metriques.prom (remplacé atomiquement) et ajoute une ligne à metriques.jsonl"""
+        dossier = Path(dossier)
+        dossier.mkdir(parents=True, exist_ok=True)
+        m = self.instantane()
+        temporaire = dossier / "metriques.prom.tmp"
+        temporaire.write_text(self.prometheus(m), encoding="utf-8")
+        os.replace(temporaire, dossier / "metriques.prom")
+        with open(dossier / "metriques.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(m, ensure_ascii=False) + "\n")
+
+
+def _depuis_environnement():
+    dossier = os.environ.get("ACTERIM_METRIQUES")
+    profils = int(os.environ.get("ACTERIM_PROFILS", "0") or 0)
+    return Metriques(profils, Path(dossier) / "profils" if dossier else None), dossier
+
+
+METRIQUES, DOSSIER_METRIQUES = _depuis_environnement()
+_verrou_export = threading.Lock()
+_export = None
+
+
+def demarrer_export(dossier=DOSSIER_METRIQUES, intervalle=INTERVALLE_EXPORT):
+    """Lance (une seule fois par processus) le fil d'export ; sans dossier, ne fait rien"""
+    global _export
+    if not dossier:
+        return None
+    with _verrou_export:
+        if _export is not None and _export.is_alive():
+            return _export
+
+        def exporter():
+            while True:
+                try:
+                    METRIQUES.exporter(dossier)
+                except OSError:
+                    pass  # Dossier momentanément inaccessible : nouvel essai au prochain passage
+                time.sleep(intervalle)
+
+        _export = threading.Thread(target=exporter, name="export-metriques", daemon=True)
+        _export.start()
+        return _export
@@ -0,0 +1,298 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Risque sur heures variables (Monte Carlo)                      ║
+║   Distribution du coût, de la marge réalisée et de l'avance                ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Un devis chiffré sur 41h et 5 jours cache la variabilité réelle : heures,
+heures de nuit et jours sur chantier bougent d'une semaine à l'autre, et le
+coût n'est pas linéaire (tranches HS à 43h, plafond SS, courbe RGDU). On tire
+N semaines selon des lois choisies pour ces entrées, on les simule par lot
+(simuler_lot) et on résume :
+
+    cout_total_comptable   coût de chaque semaine tirée
+    marge_realisee_pct     marge obtenue au taux de facturation du devis
+                           (facturé aux heures réelles, hors refacturation),
+                           à comparer à marge_pct
+    regul                  avance nécessaire pour tenir le net promis
+
+Les tirages sont faits par blocs avec un générateur initialisé par `graine`
+(un flux par variable : le résultat ne dépend pas de la taille des blocs).
+Les quantiles sont estimés au fil des blocs sur un résumé de taille fixe :
+la mémoire ne dépend pas du nombre de tirages.
+
+    d = simuler_risque(p, {'heures_semaine': Normale(41, 3, 35, 48, pas=0.5),
+                           'jours_travailles': Discrete((4, 5), (0.2, 0.8))}, n=100_000)
+    d.tableau()
+"""
+
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+
+from moteur_paie import simuler
+from moteur_vectoriel import simuler_lot, COLONNES_ENTREE, COLONNES_BOOLEENNES
+
+TAILLE_BLOC = 20_000
+TAILLE_RESUME = 2_000           # points gardés par estimateur de quantiles
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Nombres par jour (repas, découchés, primes, transports) : suivent les jours tirés
+COMPTES_JOURNALIERS = ('nb_repas_gd', 'nb_decouches_gd', 'nb_prime_repas', 'nb_prime_trajet',
+                       'nb_repas_pd', 'nb_transport_pd')
+# Grandeurs résumées
+INDICATEURS = {
+    'cout_total_comptable': "Coût total €",
+    'marge_realisee_pct': "Marge réalisée %",
+    'regul': "Avance €",
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LOIS DE TIRAGE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _borner(x, mini, maxi, pas):
+    if pas:
+        x = np.round(x / pas) * pas
+    return np.clip(x, mini, maxi)
+
+
+@dataclass(frozen=True)
+class Normale:
+    """Loi normale bornée (valeurs hors bornes ramenées aux bornes), arrondie au pas"""
+    moyenne: float
+    ecart_type: float
+    mini: float = -np.inf
+    maxi: float = np.inf
+    pas: float = 0.0
+
+    def tirer(self, rng, n):
+        return _borner(rng.normal(self.moyenne, self.ecart_type, n), self.mini, self.maxi, self.pas)
+
+
+@dataclass(frozen=True)
+class Uniforme:
+    """Loi uniforme sur [mini, maxi], arrondie au pas"""
+    mini: float
+    maxi: float
+    pas: float = 0.0
+
+    def tirer(self, rng, n):
+        return _borner(rng.uniform(self.mini, self.maxi, n), self.mini, self.maxi, self.pas)
+
+
+@dataclass(frozen=True)
+class Triangulaire:
+    """Loi triangulaire (mini, valeur la plus probable, maxi), arrondie au pas"""
+    mini: float
+    mode: float
+    maxi: float
+    pas: float = 0.0
+
+    def tirer(self, rng, n):
+        return _borner(rng.triangular(self.mini, self.mode, self.maxi, n), self.mini, self.maxi, self.pas)
+
+
+@dataclass(frozen=True)
+class Discrete:
+    """Valeurs possibles et leurs poids (équiprobables si poids absent)"""
+    valeurs: tuple
+    poids: tuple = None
+
+    def tirer(self, rng, n):
+        poids = None
+        if self.poids is not None:
+            poids = np.asarray(self.poids, dtype=np.float64)
+            poids = poids / poids.sum()
+        return rng.choice(np.asarray(self.valeurs, dtype=np.float64), n, p=poids)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# QUANTILES AU FIL DE L'EAU
+# ═══════════════════════════════════════════════════════════════════════════
+
+class QuantilesFlux:
+    """Quantiles approchés d'un flux de valeurs, en mémoire bornée
+
+    Garde au plus 2 × taille points pondérés, triés ; au-delà, les points
+    voisins sont fusionnés en `taille` paquets de même poids (moyenne
+    pondérée). L'erreur sur le rang est de l'ordre de 1 / taille ; minimum,
+    maximum et moyenne sont exacts.
+    """
+
+    def __init__(self, taille=TAILLE_RESUME):
+        self.taille = taille
+        self.valeurs = np.empty(0)
+        self.poids = np.empty(0)
+        self.n = 0
+        self.somme = 0.0
+        self.mini = np.inf
+        self.maxi = -np.inf
+
+    def ajouter(self, x):
+        x = np.asarray(x, dtype=np.float64).ravel()
+        if x.size == 0:
+            return
+        self.n += x.size
+        self.somme += float(x.sum())
+        self.mini = min(self.mini, float(x.min()))
+        self.maxi = max(self.maxi, float(x.max()))
+
+        valeurs = np.concatenate([self.valeurs, x])
+        poids = np.concatenate([self.poids, np.ones(x.size)])
+        ordre = np.argsort(valeurs, kind='stable')
+        valeurs, poids = valeurs[ordre], poids[ordre]
+        if valeurs.size > 2 * self.taille:
+            cumul = np.cumsum(poids)
+            paquets = np.minimum(((cumul - poids / 2) / cumul[-1] * self.taille).astype(np.int64), self.taille - 1)
+            poids_paquets = np.bincount(paquets, poids, self.taille)
+            garde = poids_paquets > 0
+            valeurs = np.bincount(paquets, poids * valeurs, self.taille)[garde] / poids_paquets[garde]
+            poids = poids_paquets[garde]
+        self.valeurs, self.poids = valeurs, poids
+
+    @property
+    def moyenne(self):
+        return self.somme / self.n if self.n else np.nan
+
+    def _points(self):
+        """(rangs, valeurs) des points gardés, bornés par le minimum et le maximum"""
+        cumul = np.cumsum(self.poids)
+        rangs = np.concatenate([[0.0], (cumul - self.poids / 2) / cumul[-1], [1.0]])
+        return rangs, np.concatenate([[self.mini], self.valeurs, [self.maxi]])
+
+    def quantile(self, q):
+        """Quantile(s) q (entre 0 et 1), interpolé(s) entre les points gardés"""
+        if self.n == 0:
+            return np.full(np.shape(q), np.nan)
+        rangs, valeurs = self._points()
+        return np.interp(q, rangs, valeurs)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SIMULATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class DistributionRisque:
+    """Résumé des tirages d'un scénario"""
+    devis: object                 # ResultatSimulation du scénario nominal
+    marge_pct: float
+    taux_fact: float              # taux de facturation du devis (€/h)
+    n: int = 0
+    graine: int = None
+    estimateurs: dict = field(default_factory=lambda: {nom: QuantilesFlux() for nom in INDICATEURS})
+    sous_marge: int = 0           # tirages dont la marge réalisée est sous marge_pct
+    avec_avance: int = 0          # tirages nécessitant une avance
+
+    @property
+    def part_sous_marge(self):
+        return self.sous_marge / self.n if self.n else np.nan
+
+    @property
+    def part_avec_avance(self):
+        return self.avec_avance / self.n if self.n else np.nan
+
+    def quantiles(self, nom, q=QUANTILES):
+        return self.estimateurs[nom].quantile(q)
+
+    def tableau(self, q=QUANTILES):
+        """Une ligne par indicateur : devis, moyenne, quantiles"""
+        devis = {
+            'cout_total_comptable': self.devis.cout_total_comptable,
+            'marge_realisee_pct': self.marge_pct,
+            'regul': self.devis.regul,
+        }
+        lignes = []
+        for nom, libelle in INDICATEURS.items():
+            estimateur = self.estimateurs[nom]
+            ligne = {'indicateur': libelle, 'devis': devis[nom], 'moyenne': estimateur.moyenne}
+            ligne.update({f"p{round(x * 100)}": v for x, v in zip(q, estimateur.quantile(q))})
+            lignes.append(ligne)
+        return pd.DataFrame(lignes)
+
+
+def _generateurs(lois, graine):
+    """Un générateur par variable tirée (flux indépendants, reproductibles)"""
+    enfants = np.random.SeedSequence(graine).spawn(len(lois))
+    return {nom: np.random.default_rng(s) for nom, s in zip(lois, enfants)}
+
+
+def tirer_colonnes(p, lois, generateurs, n):
+    """n semaines tirées autour du scénario p ; renvoie les colonnes de simuler_lot
+
+    Les nombres journaliers non tirés (repas, découchés, primes, transports)
+    suivent les jours tirés : un jour de plus ou de moins sur chantier en
+    ajoute ou en retire un, s'ils étaient payés. Les heures de nuit restent
+    inférieures aux heures de la semaine.
+    """
+    colonnes = {nom: loi.tirer(generateurs[nom], n) for nom, loi in lois.items()}
+    if 'jours_travailles' in colonnes:
+        ecart = colonnes['jours_travailles'] - p.jours_travailles
+        for nom in COMPTES_JOURNALIERS:
+            nominal = getattr(p, nom)
+            if nom not in colonnes and nominal > 0:
+                colonnes[nom] = np.maximum(nominal + ecart, 0)
+    if 'heures_nuit' in colonnes or 'heures_semaine' in colonnes:
+        colonnes['heures_nuit'] = np.minimum(colonnes.get('heures_nuit', p.heures_nuit),
+                                             colonnes.get('heures_semaine', p.heures_semaine))
+    return colonnes
+
+
+def simuler_risque(p, lois, n=100_000, graine=0, taille_bloc=TAILLE_BLOC, calcul=simuler_lot, marge_pct=None):
+    """Tire n semaines autour du scénario p et résume leur distribution
+
+    lois : champ de ParametresSimulation -> loi (Normale, Uniforme,
+    Triangulaire, Discrete). Le devis (taux de facturation) est celui de p ;
+    chaque tirage est facturé à ce taux sur ses heures réelles.
+    calcul : simuler_lot ou CalculParallele.simuler_lot.
+    marge_pct : marge du devis si elle a changé depuis p (saisie en cours).
+    """
+    inconnues = set(lois) - (set(COLONNES_ENTREE) - COLONNES_BOOLEENNES - {'date_effet'})
+    if inconnues:
+        raise KeyError(f"Variables non tirables : {', '.join(sorted(inconnues))}")
+
+    if marge_pct is not None:
+        p = replace(p, marge_pct=marge_pct)
+    devis = simuler(p)
+    distribution = DistributionRisque(devis, p.marge_pct, devis.taux_fact_comptable, graine=graine)
+    generateurs = _generateurs(lois, graine)
+    base = {nom: getattr(p, nom) for nom in COLONNES_ENTREE}
+
+    for debut in range(0, n, taille_bloc):
+        taille = min(taille_bloc, n - debut)
+        colonnes = dict(base, **tirer_colonnes(p, lois, generateurs, taille))
+        r = calcul(colonnes, taille)
+        # Refacturation retirée des ventes, comme dans facturer : la marge porte sur le coût seul
+        ventes = distribution.taux_fact * np.broadcast_to(colonnes['heures_semaine'], (taille,)) - r['ca_refactu']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            marge = 100 * (1 - r['cout_total_comptable'] / ventes)
+        valeurs = {'cout_total_comptable': r['cout_total_comptable'], 'marge_realisee_pct': marge,
+                   'regul': r['regul']}
+        for nom, estimateur in distribution.estimateurs.items():
+            estimateur.ajouter(valeurs[nom])
+        distribution.sous_marge += int(np.count_nonzero(marge < p.marge_pct - 1e-9))
+        distribution.avec_avance += int(np.count_nonzero(r['regul'] > 0))
+        distribution.n += taille
+    return distribution
+
+
+def lois_standard(p, ecart_heures=3.0, heures_max=48.0, ecart_nuit=0.0, jours=None):
+    """Lois usuelles autour du scénario p (saisie de l'interface)
+
+    Heures : normale centrée sur p.heures_semaine, à la demi-heure, entre 35h
+    et heures_max ; nuit : normale centrée sur p.heures_nuit si ecart_nuit ;
+    jours : valeurs équiprobables (ex. (4, 5)) si jours est donné.
+    """
+    lois = {}
+    if ecart_heures:
+        lois['heures_semaine'] = Normale(p.heures_semaine, ecart_heures, min(35.0, p.heures_semaine),
+                                         max(heures_max, p.heures_semaine), pas=0.5)
+    if ecart_nuit:
+        lois['heures_nuit'] = Normale(p.heures_nuit, ecart_nuit, 0.0, pas=0.5)
+    if jours:
+        lois['jours_travailles'] = Discrete(tuple(jours))
+    return lois
+
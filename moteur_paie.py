@@ -0,0 +1,664 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Moteur de calcul de paie                                       ║
+║   Calculs purs (sans Streamlit) : brut, cotisations, net, RGDU, facturation║
+╚════════════════════════════════════════════════════════════════════════════╝
+"""
+
+import bisect
+import math
+from dataclasses import dataclass, fields
+from operator import attrgetter, itemgetter
+
+import baremes
+from baremes import BAREME_2026, HEURES_MOIS, bareme_au
+from cotisations import COTISATIONS_SALARIALES, centimes
+from graphe_calcul import Graphe, CalculIncremental
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BARÈME 2026 (valeurs par défaut ; le calcul lit le barème daté, voir baremes.py)
+# ═══════════════════════════════════════════════════════════════════════════
+
+SMIC_LEGAL_2026 = BAREME_2026.smic_horaire
+PMSS_2026 = BAREME_2026.pmss
+INDEMNITE_DECOUCHE_2026 = BAREME_2026.indemnite_decouche
+INDEMNITE_REPAS_2026 = BAREME_2026.indemnite_repas
+INDEMNITE_REPAS_PD_2026 = BAREME_2026.indemnite_repas_pd
+
+H_NORMALES = 35
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FONCTION CALCUL RGDU
+# ═══════════════════════════════════════════════════════════════════════════
+
+def calculer_rgdu(brut_total, heures_travaillees, smic_horaire=SMIC_LEGAL_2026,
+                  t_min=BAREME_2026.rgdu_t_min, t_max=BAREME_2026.rgdu_t_max, t_delta=BAREME_2026.rgdu_t_delta):
+    """Calcule la Réduction Générale Des Cotisations patronales (RGDU)"""
+    trois_smic = 3 * smic_horaire * heures_travaillees
+
+    if brut_total == 0:
+        return 0, 0, 0, trois_smic
+
+    step1 = trois_smic / brut_total
+    step2 = step1 - 1
+    step3 = step2 / 2
+
+    # Au-delà de 3 SMIC : pas de réduction
+    if step3 < 0:
+        return 0, 0, 0, trois_smic
+
+    # Puissance 1.75 : step3 × √step3 × ⁴√step3 (racines exactes, même résultat
+    # au bit près que le moteur vectoriel)
+    racine = math.sqrt(step3)
+    step4 = step3 * racine * math.sqrt(racine)
+    step5 = step4 * t_delta
+    coeff = step5 + t_min
+
+    coeff_max = min(coeff, t_max)
+
+    rgdu_avant = coeff_max * brut_total
+    rgdu_apres = rgdu_avant * 1.1
+
+    return rgdu_avant, rgdu_apres, coeff_max, trois_smic
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENTRÉES / SORTIES DU MOTEUR
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True, slots=True)
+class ParametresSimulation:
+    """Paramètres d'une simulation (valeurs de la sidebar, taux PD déjà résolus)"""
+    grand_deplacement: bool = True
+    payer_ifm: bool = True
+    payer_iccp: bool = True
+    attestation_fiscale: bool = True
+    repas_auto: bool = False
+    taux_accident: float = 0.03
+    reduction_hs_patronale_euro: float = 1.5
+
+    heures_semaine: int = 41
+    jours_travailles: int = 5
+    heures_nuit: int = 0
+
+    taux_brut: float = SMIC_LEGAL_2026
+    taux_net: float = 14.0
+    prime_brute: float = 0.0
+
+    # Primes brutes PD (soumises)
+    nb_prime_repas: int = 0
+    taux_prime_repas: float = 0.0
+    nb_prime_trajet: int = 0
+    taux_prime_trajet: float = 0.0
+
+    # Majorations en %
+    majo_sup_1: float = 25
+    majo_sup_2: float = 50
+    majo_nuit: float = 10
+
+    # Indemnités GD (nettes)
+    nb_repas_gd: int = 0
+    taux_repas_gd: float = 0.0
+    nb_decouches_gd: int = 0
+    taux_decouche_gd: float = 0.0
+
+    # Indemnités PD (nettes)
+    nb_repas_pd: int = 0
+    taux_repas_pd: float = INDEMNITE_REPAS_PD_2026
+    nb_transport_pd: int = 0
+    taux_transport_pd: float = 0.0
+
+    logement_hebdo: float = 0.0
+    cout_logement_salarie: float = 0.0
+    nb_refactu: float = 0.0
+    taux_refactu: float = 0.0
+    marge_pct: float = 17.0
+
+    # Prélèvement à la source : taux individualisé (%) transmis par
+    # l'administration, None = grille du taux neutre (abattue pour un contrat
+    # de 2 mois au plus)
+    taux_pas: object = None
+    contrat_court: bool = True
+
+    # Mode bulletin : chaque montant de la fiche de paie (gains, cotisations,
+    # réductions, nets, coût) arrondi au centime, totaux sommés en centimes
+    arrondi_centime: bool = False
+
+    # Date de la mission : choisit le barème en vigueur (None = aujourd'hui)
+    date_effet: object = None
+
+    # Cumuls de l'année avant cette semaine (paie sur plusieurs semaines,
+    # voir paie_cumulee.py) : plafond SS et RGDU régularisés progressivement
+    cumul_brut: float = 0.0
+    cumul_heures: float = 0.0
+    cumul_plafond: float = 0.0
+    cumul_rgdu: float = 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class ResultatSimulation:
+    """Résultat complet d'une simulation (tous les montants intermédiaires)"""
+    # Indemnités
+    total_repas: float
+    total_decouche: float
+    total_prime_repas_brut: float
+    total_prime_trajet_brut: float
+    total_repas_pd: float
+    total_transport_pd: float
+
+    # Brut
+    h_normales: int
+    h_sup_tranche1: int
+    h_sup_tranche2: int
+    brut_normales: float
+    brut_sup_t1: float
+    brut_sup_t2: float
+    brut_sup_total: float
+    brut_base: float
+    majo_nuit_montant: float
+    brut_avant_ifm: float
+    ifm: float
+    brut_majoré: float
+    iccp: float
+    brut_total: float
+
+    # Plafond SS
+    plafond_ss: float
+    tranche_a: float
+    tranche_b: float
+    assiette_cet: float
+    est_au_dessus_plafond: bool
+
+    # Cotisations salariales
+    part_patron_mutuelle: float
+    part_patron_prevoyance: float
+    base_hs_csg: float
+    csg_hs: float
+    base_avant_abattement: float
+    base_csg_abattue: float
+    base_csg: float
+    csg_deduct: float
+    csg_non_deduct: float
+    maladie: float
+    ss_plaf: float
+    comp_incap_t1: float
+    comp_t1: float
+    comp_incap_t2: float
+    comp_t2: float
+    cet: float
+    ss_deplaf: float
+    comp_sante: float
+    reduction_hs: float
+    cotis_salar: float
+
+    # Net
+    net_imposable: float
+    base_pas: float
+    taux_pas_applique: float
+    retenue_source: float
+    net_avant_regul: float
+    net_cible: float
+    regul_initiale: float
+    nb_repas_auto: int
+    taux_repas_auto: float
+    montant_repas_auto: float
+    total_repas_final: float
+    net_avant_regul_final: float
+    regul: float
+
+    # Charges patronales
+    charges_patron: tuple   # montants dans l'ordre de COTISATIONS_PATRONALES
+    cotis_patron_brutes: float
+    reduction_patron_hs: float
+    rgdu_avant: float
+    rgdu: float
+    coeff: float
+    trois_smic: float
+    cotis_patron: float
+
+    # Coût et facturation
+    cout_total_comptable: float
+    cout_total_tresorerie: float
+    ca_refactu: float
+    ca_ht_comptable: float
+    taux_fact_comptable: float
+    marge_euro_comptable: float
+    coeff_comptable: float
+    ca_ht_tresorerie: float
+    taux_fact_tresorerie: float
+    marge_euro_tresorerie: float
+    coeff_tresorerie: float
+
+
+@dataclass(frozen=True, slots=True)
+class Facturation:
+    """Étage facturation seul : ne dépend que des coûts et de la marge"""
+    ca_ht_comptable: float
+    taux_fact_comptable: float
+    marge_euro_comptable: float
+    coeff_comptable: float
+    ca_ht_tresorerie: float
+    taux_fact_tresorerie: float
+    marge_euro_tresorerie: float
+    coeff_tresorerie: float
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FACTURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def facturer(cout_total_comptable, cout_total_tresorerie, ca_refactu, heures, taux_brut, marge_pct):
+    """CA HT, taux de facturation, marge et coefficient pour une marge donnée
+
+    Les coûts viennent de simuler : changer la marge ne relance pas la paie.
+    """
+    marge = marge_pct / 100
+
+    # CA HT : marge sur le coût intérimaire uniquement, refacturation ajoutée en CA direct
+    ca_ht_comptable = (cout_total_comptable / (1 - marge)) + ca_refactu
+    taux_fact_comptable = ca_ht_comptable / heures
+    marge_euro_comptable = ca_ht_comptable - cout_total_comptable - ca_refactu
+    coeff_comptable = taux_fact_comptable / taux_brut
+
+    ca_ht_tresorerie = (cout_total_tresorerie / (1 - marge)) + ca_refactu
+    taux_fact_tresorerie = ca_ht_tresorerie / heures
+    marge_euro_tresorerie = ca_ht_tresorerie - cout_total_tresorerie - ca_refactu
+    coeff_tresorerie = taux_fact_tresorerie / taux_brut
+
+    return Facturation(
+        ca_ht_comptable=ca_ht_comptable,
+        taux_fact_comptable=taux_fact_comptable,
+        marge_euro_comptable=marge_euro_comptable,
+        coeff_comptable=coeff_comptable,
+        ca_ht_tresorerie=ca_ht_tresorerie,
+        taux_fact_tresorerie=taux_fact_tresorerie,
+        marge_euro_tresorerie=marge_euro_tresorerie,
+        coeff_tresorerie=coeff_tresorerie,
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# GRAPHE DE CALCUL
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Chaque montant est un nœud nommé dont les paramètres sont ses dépendances
+# (champs de ParametresSimulation ou autres nœuds). simuler évalue tout le
+# graphe ; SimulationIncrementale ne réévalue que l'aval des paramètres
+# modifiés ; GRAPHE_PAIE.entrees_de('taux_fact_comptable') donne les
+# paramètres dont dépend une sortie.
+
+# Entrées : les champs de ParametresSimulation et la génération du registre des
+# barèmes (un barème remplacé à la même date d'effet change le nœud bareme)
+GRAPHE_PAIE = Graphe((*(f.name for f in fields(ParametresSimulation)), 'generation_baremes'))
+noeud = GRAPHE_PAIE.noeud
+
+
+# Barème en vigueur à la date de la mission (instantané compilé, partagé)
+@noeud()
+def _bareme(date_effet, generation_baremes):
+    return bareme_au(date_effet)
+
+
+def _au_centime(montant, arrondi_centime):
+    # Mode bulletin : montant arrondi au centime (inchangé sinon)
+    return centimes(montant) / 100 if arrondi_centime else montant
+
+
+# Indemnités selon type de déplacement : GD (nettes) ou PD (primes brutes et indemnités nettes)
+@noeud()
+def _total_repas(grand_deplacement, nb_repas_gd, taux_repas_gd, arrondi_centime):
+    return _au_centime(nb_repas_gd * taux_repas_gd if grand_deplacement else 0.0, arrondi_centime)
+
+
+@noeud()
+def _total_decouche(grand_deplacement, nb_decouches_gd, taux_decouche_gd, arrondi_centime):
+    return _au_centime(nb_decouches_gd * taux_decouche_gd if grand_deplacement else 0.0, arrondi_centime)
+
+
+@noeud()
+def _total_prime_repas_brut(grand_deplacement, nb_prime_repas, taux_prime_repas, arrondi_centime):
+    return _au_centime(0.0 if grand_deplacement else nb_prime_repas * taux_prime_repas, arrondi_centime)
+
+
+@noeud()
+def _total_prime_trajet_brut(grand_deplacement, nb_prime_trajet, taux_prime_trajet, arrondi_centime):
+    return _au_centime(0.0 if grand_deplacement else nb_prime_trajet * taux_prime_trajet, arrondi_centime)
+
+
+@noeud()
+def _total_repas_pd(grand_deplacement, nb_repas_pd, taux_repas_pd, arrondi_centime):
+    return _au_centime(0.0 if grand_deplacement else nb_repas_pd * taux_repas_pd, arrondi_centime)
+
+
+@noeud()
+def _total_transport_pd(grand_deplacement, nb_transport_pd, taux_transport_pd, arrondi_centime):
+    return _au_centime(0.0 if grand_deplacement else nb_transport_pd * taux_transport_pd, arrondi_centime)
+
+
+# 1. BRUT TOTAL AVEC DOUBLE MAJORATION ET PRIMES BRUTES
+@noeud()
+def _h_normales(heures_semaine):
+    # Semaine incomplète (temps partiel, semaine de pointages entamée) : heures pointées
+    return min(heures_semaine, H_NORMALES)
+
+
+@noeud('h_sup_tranche1', 'h_sup_tranche2')
+def _heures_sup(heures_semaine):
+    h_sup_tranche1 = 0  # 36-43h à majo_sup_1%
+    h_sup_tranche2 = 0  # 44h+ à majo_sup_2%
+    if heures_semaine > 35:
+        if heures_semaine <= 43:
+            h_sup_tranche1 = heures_semaine - 35
+        else:
+            h_sup_tranche1 = 8  # Max 8h pour la tranche 1
+            h_sup_tranche2 = heures_semaine - 43
+    return h_sup_tranche1, h_sup_tranche2
+
+
+@noeud()
+def _brut_normales(h_normales, taux_brut, arrondi_centime):
+    return _au_centime(h_normales * taux_brut, arrondi_centime)
+
+
+@noeud()
+def _brut_sup_t1(h_sup_tranche1, taux_brut, majo_sup_1, arrondi_centime):
+    return _au_centime(h_sup_tranche1 * taux_brut * (1 + majo_sup_1 / 100), arrondi_centime)
+
+
+@noeud()
+def _brut_sup_t2(h_sup_tranche2, taux_brut, majo_sup_2, arrondi_centime):
+    return _au_centime(h_sup_tranche2 * taux_brut * (1 + majo_sup_2 / 100), arrondi_centime)
+
+
+@noeud()
+def _brut_sup_total(brut_sup_t1, brut_sup_t2, arrondi_centime):
+    return _au_centime(brut_sup_t1 + brut_sup_t2, arrondi_centime)
+
+
+@noeud()
+def _brut_base(brut_normales, brut_sup_total, arrondi_centime):
+    return _au_centime(brut_normales + brut_sup_total, arrondi_centime)
+
+
+@noeud()
+def _majo_nuit_montant(heures_nuit, taux_brut, majo_nuit, arrondi_centime):
+    # Majoration heures de nuit (jamais cumulée avec HS, s'ajoute comme une prime)
+    return _au_centime(heures_nuit * taux_brut * (majo_nuit / 100), arrondi_centime)
+
+
+@noeud()
+def _brut_avant_ifm(brut_base, prime_brute, total_prime_repas_brut, total_prime_trajet_brut, majo_nuit_montant,
+                    arrondi_centime):
+    # Ajout primes (hebdo + primes brutes PD + majoration nuit)
+    return _au_centime(brut_base + prime_brute + total_prime_repas_brut + total_prime_trajet_brut + majo_nuit_montant,
+                       arrondi_centime)
+
+
+@noeud()
+def _ifm(brut_avant_ifm, payer_ifm, arrondi_centime):
+    return _au_centime(brut_avant_ifm * 0.10, arrondi_centime) if payer_ifm else 0.0
+
+
+@noeud()
+def _brut_majoré(brut_avant_ifm, ifm, arrondi_centime):
+    return _au_centime(brut_avant_ifm + ifm, arrondi_centime)
+
+
+@noeud()
+def _iccp(brut_majoré, payer_iccp, arrondi_centime):
+    return _au_centime(brut_majoré * 0.10, arrondi_centime) if payer_iccp else 0.0
+
+
+@noeud()
+def _brut_total(brut_avant_ifm, ifm, iccp, arrondi_centime):
+    return _au_centime(brut_avant_ifm + ifm + iccp, arrondi_centime)
+
+
+# 3. CALCUL DU PLAFOND SÉCURITÉ SOCIALE
+@noeud()
+def _plafond_ss(jours_travailles, bareme):
+    return bareme.plafond_jour * jours_travailles
+
+
+# Régularisation progressive : tranches du cumul à date moins celles déjà déclarées.
+# Le CET est dû sur tout le brut cumulé tant que le cumul dépasse le plafond :
+# repassé sous le plafond, tranche B et CET déjà prélevés sont régularisés
+# (montants négatifs), d'où les lignes de dépassement actives si le cumul à
+# date OU le cumul précédent dépasse son plafond.
+@noeud('tranche_a', 'tranche_b', 'assiette_cet', 'est_au_dessus_plafond')
+def _tranches(brut_total, plafond_ss, cumul_brut, cumul_plafond):
+    brut_cumule = cumul_brut + brut_total
+    plafond_cumule = cumul_plafond + plafond_ss
+    depasse = brut_cumule > plafond_cumule
+    depassait = cumul_brut > cumul_plafond
+    return (min(brut_cumule, plafond_cumule) - min(cumul_brut, cumul_plafond),
+            max(0, brut_cumule - plafond_cumule) - max(0, cumul_brut - cumul_plafond),
+            (brut_cumule if depasse else 0.0) - (cumul_brut if depassait else 0.0),
+            depasse or depassait)
+
+
+# 4. COTISATIONS SALARIALES DÉTAILLÉES
+@noeud()
+def _part_patron_mutuelle(h_normales, bareme, arrondi_centime):
+    return _au_centime(h_normales * bareme.taux['comp_sante_patron'], arrondi_centime)
+
+
+@noeud()
+def _part_patron_prevoyance(brut_total, bareme, arrondi_centime):
+    return _au_centime(brut_total * bareme.taux['comp_incap_t1_patron'], arrondi_centime)
+
+
+# Assiette CSG sur heures sup
+@noeud()
+def _base_hs_csg(brut_sup_total, bareme, arrondi_centime):
+    return _au_centime(brut_sup_total * bareme.abattement_csg, arrondi_centime)
+
+
+# Assiette CSG 2.9% et 6.8% (base = brut HORS HS × 0.9825 + part patronale)
+@noeud()
+def _base_avant_abattement(brut_total, brut_sup_total):
+    return brut_total - brut_sup_total
+
+
+@noeud()
+def _base_csg_abattue(base_avant_abattement, bareme):
+    return base_avant_abattement * bareme.abattement_csg
+
+
+@noeud()
+def _base_csg(base_csg_abattue, part_patron_mutuelle, part_patron_prevoyance, arrondi_centime):
+    return _au_centime(base_csg_abattue + part_patron_mutuelle + part_patron_prevoyance, arrondi_centime)
+
+
+# Toutes les lignes salariales de la table (maladie ou CSG selon l'attestation,
+# tranches A/B, CET au-delà du plafond, réduction HS) et leur total
+@noeud(*COTISATIONS_SALARIALES.noms, 'cotis_salar')
+def _cotisations_salariales(bareme, attestation_fiscale, est_au_dessus_plafond, brut_total, tranche_a, tranche_b,
+                            assiette_cet, h_normales, brut_sup_total, base_csg, base_hs_csg, arrondi_centime):
+    table = bareme.salariales
+    montants = table.montants(
+        (brut_total, tranche_a, tranche_b, assiette_cet, h_normales, brut_sup_total, base_csg, base_hs_csg),
+        attestation_fiscale, est_au_dessus_plafond)
+    if arrondi_centime:
+        montants, total = table.total_centimes(montants)
+        return montants + (total,)
+    return montants + (table.total(montants),)
+
+
+# 5. NET IMPOSABLE ET RETENUE À LA SOURCE
+@noeud()
+def _net_imposable(attestation_fiscale, brut_total, cotis_salar, brut_sup_total, part_patron_mutuelle,
+                   csg_hs, csg_non_deduct, arrondi_centime):
+    if attestation_fiscale:
+        net_imposable = brut_total - cotis_salar - brut_sup_total + part_patron_mutuelle
+    else:
+        # Réintégrer les CSG non déductibles (HS + 2.9%)
+        net_imposable = brut_total - cotis_salar + part_patron_mutuelle + csg_hs + csg_non_deduct - brut_sup_total
+    return _au_centime(net_imposable, arrondi_centime)
+
+
+@noeud('base_pas', 'taux_pas_applique')
+def _base_pas(bareme, net_imposable, heures_semaine, taux_pas, contrat_court, arrondi_centime):
+    # Taux individualisé : appliqué tel quel au net imposable
+    if taux_pas is not None and taux_pas == taux_pas:
+        return net_imposable, taux_pas / 100
+    # Grille du taux neutre proratisée à la période (heures / 151.67), abattement
+    # de 50 % du SMIC mensuel (proratisé) pour les contrats courts
+    prorata = heures_semaine / HEURES_MOIS
+    base_pas = net_imposable - bareme.abattement_pas * prorata if contrat_court else net_imposable
+    base_pas = _au_centime(base_pas, arrondi_centime)
+    if base_pas <= 0 or prorata <= 0:
+        return base_pas, 0.0
+    tranche = bisect.bisect_right(bareme.seuils_pas, base_pas / prorata) - 1
+    return base_pas, bareme.taux_pas[tranche]
+
+
+@noeud()
+def _retenue_source(base_pas, taux_pas_applique, arrondi_centime):
+    return _au_centime(max(0, base_pas * taux_pas_applique), arrondi_centime)
+
+
+# 6. NET AVANT RÉGULARISATION et REPAS AUTO
+@noeud()
+def _net_avant_regul(brut_total, cotis_salar, retenue_source, total_repas, total_decouche, total_repas_pd,
+                     total_transport_pd, cout_logement_salarie, arrondi_centime):
+    return _au_centime(brut_total - cotis_salar - retenue_source + total_repas + total_decouche + total_repas_pd + total_transport_pd - cout_logement_salarie,
+                       arrondi_centime)
+
+
+@noeud()
+def _net_cible(taux_net, heures_semaine, arrondi_centime):
+    return _au_centime(taux_net * heures_semaine, arrondi_centime)
+
+
+@noeud()
+def _regul_initiale(net_cible, net_avant_regul, arrondi_centime):
+    return _au_centime(max(0, net_cible - net_avant_regul), arrondi_centime)
+
+
+@noeud('nb_repas_auto', 'taux_repas_auto', 'montant_repas_auto', 'total_repas_final', 'net_avant_regul_final', 'regul')
+def _repas_automatiques(repas_auto, regul_initiale, attestation_fiscale, jours_travailles, net_cible, net_avant_regul,
+                        brut_total, cotis_salar, retenue_source, total_repas, total_decouche, total_repas_pd,
+                        total_transport_pd, cout_logement_salarie, bareme, arrondi_centime):
+    # REPAS AUTOMATIQUES pour atteindre le net
+    if not (repas_auto and regul_initiale > 0):
+        return 0, 0, 0, total_repas, net_avant_regul, regul_initiale
+
+    # Plafond selon attestation fiscale
+    taux_max_repas = bareme.indemnite_repas if attestation_fiscale else bareme.indemnite_repas_pd
+
+    # Nombre de repas = nombre de jours travaillés (toujours)
+    nb_repas_auto = int(jours_travailles)
+
+    # Taux unitaire = montant nécessaire / nb de jours (plafonné au taux max)
+    taux_repas_auto = _au_centime(min(regul_initiale / nb_repas_auto, taux_max_repas), arrondi_centime)
+    montant_repas_auto = _au_centime(nb_repas_auto * taux_repas_auto, arrondi_centime)
+
+    # Recalcul avec les repas auto
+    total_repas_final = _au_centime(total_repas + montant_repas_auto, arrondi_centime)
+    net_avant_regul_final = _au_centime(brut_total - cotis_salar - retenue_source + total_repas_final + total_decouche + total_repas_pd + total_transport_pd - cout_logement_salarie,
+                                        arrondi_centime)
+    regul = _au_centime(max(0, net_cible - net_avant_regul_final), arrondi_centime)
+    return nb_repas_auto, taux_repas_auto, montant_repas_auto, total_repas_final, net_avant_regul_final, regul
+
+
+# 7. CHARGES PATRONALES avec Tranches A/B (montants dans l'ordre de COTISATIONS_PATRONALES)
+@noeud('charges_patron', 'cotis_patron_brutes')
+def _cotisations_patronales(bareme, est_au_dessus_plafond, taux_accident, brut_total, tranche_a, tranche_b, assiette_cet,
+                            h_normales, arrondi_centime):
+    table = bareme.patronales
+    montants = table.montants((brut_total, tranche_a, tranche_b, assiette_cet, h_normales),
+                              True, est_au_dessus_plafond, (taux_accident,))
+    if arrondi_centime:
+        return table.total_centimes(montants)
+    return montants, table.total(montants)
+
+
+@noeud()
+def _reduction_patron_hs(h_sup_tranche1, h_sup_tranche2, reduction_hs_patronale_euro, arrondi_centime):
+    return _au_centime((h_sup_tranche1 + h_sup_tranche2) * reduction_hs_patronale_euro, arrondi_centime)
+
+
+# 8. CALCUL RGDU
+@noeud('rgdu_avant', 'rgdu', 'coeff', 'trois_smic')
+def _rgdu(brut_total, heures_semaine, bareme, cumul_brut, cumul_heures, cumul_rgdu, arrondi_centime):
+    # Réduction annualisée : calculée sur le cumul à date, moins la réduction déjà accordée
+    rgdu_avant, rgdu, coeff, trois_smic = calculer_rgdu(
+        cumul_brut + brut_total, cumul_heures + heures_semaine, bareme.smic_horaire,
+        bareme.rgdu_t_min, bareme.rgdu_t_max, bareme.rgdu_t_delta)
+    if cumul_rgdu:
+        rgdu_avant, rgdu = rgdu_avant - cumul_rgdu / 1.1, rgdu - cumul_rgdu
+    return _au_centime(rgdu_avant, arrondi_centime), _au_centime(rgdu, arrondi_centime), coeff, trois_smic
+
+
+@noeud()
+def _cotis_patron(cotis_patron_brutes, reduction_patron_hs, rgdu, arrondi_centime):
+    return _au_centime(cotis_patron_brutes - reduction_patron_hs - rgdu, arrondi_centime)
+
+
+# 9. COÛT TOTAL ET FACTURATION
+@noeud()
+def _cout_total_comptable(brut_total, cotis_patron, logement_hebdo, total_repas_final, total_decouche, total_repas_pd,
+                          total_transport_pd, cout_logement_salarie, arrondi_centime):
+    return _au_centime(brut_total + cotis_patron + logement_hebdo + total_repas_final + total_decouche + total_repas_pd + total_transport_pd - cout_logement_salarie,
+                       arrondi_centime)
+
+
+@noeud()
+def _cout_total_tresorerie(cout_total_comptable, regul, arrondi_centime):
+    return _au_centime(cout_total_comptable + regul, arrondi_centime)
+
+
+@noeud()
+def _ca_refactu(nb_refactu, taux_refactu, arrondi_centime):
+    return _au_centime(nb_refactu * taux_refactu, arrondi_centime)
+
+
+SORTIES_FACTURATION = tuple(f.name for f in fields(Facturation))
+
+
+@noeud(*SORTIES_FACTURATION)
+def _facturation(cout_total_comptable, cout_total_tresorerie, ca_refactu, heures_semaine, taux_brut, marge_pct):
+    f = facturer(cout_total_comptable, cout_total_tresorerie, ca_refactu, heures_semaine, taux_brut, marge_pct)
+    return tuple(getattr(f, nom) for nom in SORTIES_FACTURATION)
+
+
+del noeud
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CALCULS DÉTAILLÉS
+# ═══════════════════════════════════════════════════════════════════════════
+
+_NOMS_PARAMETRES = tuple(f.name for f in fields(ParametresSimulation))
+_lire_parametres = attrgetter(*_NOMS_PARAMETRES)
+_lire_resultat = itemgetter(*(f.name for f in fields(ResultatSimulation)))
+
+
+def _entrees(p):
+    entrees = dict(zip(_NOMS_PARAMETRES, _lire_parametres(p)))
+    entrees['generation_baremes'] = baremes.generation
+    return entrees
+
+
+def _resultat(valeurs):
+    return ResultatSimulation(*_lire_resultat(valeurs))
+
+
+def simuler(p):
+    """Calcule une simulation complète à partir de ParametresSimulation"""
+    return _resultat(GRAPHE_PAIE.evaluer(_entrees(p)))
+
+
+class SimulationIncrementale:
+    """simuler avec mémoire : seul l'aval des paramètres modifiés est recalculé
+
+    Une instance par session (les valeurs mémorisées sont celles du dernier appel).
+    """
+
+    def __init__(self):
+        self.calcul = CalculIncremental(GRAPHE_PAIE)
+
+    def simuler(self, p):
+        return _resultat(self.calcul.calculer(_entrees(p)))
@@ -0,0 +1,345 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Moteur de calcul vectoriel (NumPy)                             ║
+║   Mêmes formules que moteur_paie.simuler, appliquées à des colonnes        ║
+╚════════════════════════════════════════════════════════════════════════════╝
+"""
+
+from dataclasses import fields
+
+import numpy as np
+
+from baremes import BAREME_2026, HEURES_MOIS, baremes_lot, jours_lot
+from cotisations import au_centime_lot
+from moteur_paie import ParametresSimulation, H_NORMALES, SMIC_LEGAL_2026
+
+# Valeurs par défaut des colonnes absentes (celles de ParametresSimulation)
+COLONNES_ENTREE = {f.name: f.default for f in fields(ParametresSimulation)}
+COLONNES_BOOLEENNES = {nom for nom, defaut in COLONNES_ENTREE.items() if isinstance(defaut, bool)}
+# Dates (date, datetime64, texte ISO, None) converties en jours depuis le 01/01/1970
+COLONNES_DATES = {'date_effet'}
+
+
+def preparer_colonnes(colonnes, n=None):
+    """Convertit un mapping de colonnes en tableaux NumPy de même longueur"""
+    inconnues = set(colonnes) - set(COLONNES_ENTREE)
+    if inconnues:
+        raise KeyError(f"Colonnes inconnues : {', '.join(sorted(inconnues))}")
+
+    if n is None:
+        longueurs = {np.size(v) for v in colonnes.values() if np.ndim(v) > 0}
+        if len(longueurs) > 1:
+            raise ValueError(f"Colonnes de longueurs différentes : {sorted(longueurs)}")
+        n = longueurs.pop() if longueurs else 1
+
+    tableaux = {}
+    for nom, defaut in COLONNES_ENTREE.items():
+        if nom in COLONNES_DATES:
+            valeur = jours_lot(colonnes.get(nom, defaut))
+        else:
+            dtype = np.bool_ if nom in COLONNES_BOOLEENNES else np.float64
+            valeur = np.asarray(colonnes.get(nom, defaut), dtype=dtype)
+        tableaux[nom] = np.broadcast_to(valeur, (n,)) if valeur.ndim == 0 else valeur
+    return tableaux
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FONCTION CALCUL RGDU
+# ═══════════════════════════════════════════════════════════════════════════
+
+def calculer_rgdu_lot(brut_total, heures_travaillees, smic_horaire=SMIC_LEGAL_2026,
+                      t_min=BAREME_2026.rgdu_t_min, t_max=BAREME_2026.rgdu_t_max, t_delta=BAREME_2026.rgdu_t_delta):
+    """Version vectorielle de moteur_paie.calculer_rgdu"""
+    trois_smic = 3 * smic_horaire * heures_travaillees
+
+    brut_nul = brut_total == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        step1 = trois_smic / brut_total
+        step2 = step1 - 1
+        step3 = step2 / 2
+        # Au-delà de 3 SMIC (step3 < 0) : pas de réduction
+        # Puissance 1.75 calculée comme dans moteur_paie.calculer_rgdu
+        sans_reduction = brut_nul | (step3 < 0)
+        step3 = np.where(sans_reduction, 0.0, step3)
+        racine = np.sqrt(step3)
+        step4 = step3 * racine * np.sqrt(racine)
+    step5 = step4 * t_delta
+    coeff = step5 + t_min
+
+    coeff_max = np.where(sans_reduction, 0.0, np.minimum(coeff, t_max))
+
+    rgdu_avant = coeff_max * brut_total
+    rgdu_apres = rgdu_avant * 1.1
+
+    return rgdu_avant, rgdu_apres, coeff_max, trois_smic
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MODE BULLETIN (ARRONDI AU CENTIME)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _inchange(montants):
+    return montants
+
+
+def _arrondi_centime(centime):
+    """Arrondi des montants selon la colonne arrondi_centime (une passe de plus par montant au plus)"""
+    if centime.all():
+        return au_centime_lot
+    if not centime.any():
+        return _inchange
+    return lambda montants: np.where(centime, au_centime_lot(montants), montants)
+
+
+def _cotisations_centime(table, montants, centime):
+    """Lignes de cotisations et leur total, au centime sur les lignes en mode bulletin"""
+    if not centime.any():
+        return montants, table.total_lot(montants)
+    arrondis, total = table.total_centimes_lot(montants)
+    if centime.all():
+        return arrondis, total
+    return np.where(centime, arrondis, montants), np.where(centime, total, table.total_lot(montants))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CALCULS DÉTAILLÉS (VECTORIELS)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def simuler_lot(colonnes, n=None):
+    """Calcule un lot de simulations ; renvoie un dict nom -> tableau NumPy
+
+    Les colonnes portent les noms des champs de ParametresSimulation ; une
+    colonne absente prend la valeur par défaut, un scalaire est diffusé.
+    Les montants sont identiques à ceux de moteur_paie.simuler ligne à ligne
+    (sauf `charges_patron`, dont seul le total est renvoyé). Chaque ligne est
+    calculée avec le barème en vigueur à sa date_effet.
+    """
+    p = preparer_colonnes(colonnes, n)
+    groupes = baremes_lot(p['date_effet'])
+    if len(groupes) == 1:
+        return _simuler_bareme(p, groupes[0][0])
+
+    # Lot à cheval sur plusieurs barèmes : un calcul par barème, replacé ligne à ligne
+    n = len(p['date_effet'])
+    resultats = {}
+    for bareme, lignes in groupes:
+        partiel = _simuler_bareme({nom: v[lignes] for nom, v in p.items()}, bareme)
+        for nom, valeurs in partiel.items():
+            if nom not in resultats:
+                resultats[nom] = np.empty(n, dtype=valeurs.dtype)
+            resultats[nom][lignes] = valeurs
+    return resultats
+
+
+def _simuler_bareme(p, bareme):
+    """simuler_lot sur des colonnes préparées relevant toutes du même barème"""
+    where = np.where
+
+    h = p['heures_semaine']
+    brut_h = p['taux_brut']
+    jours = p['jours_travailles']
+    marge = p['marge_pct'] / 100
+    attest_fisc = p['attestation_fiscale']
+    cout_log_salarie = p['cout_logement_salarie']
+    gd = p['grand_deplacement']
+    centime = p['arrondi_centime']
+    arrondi = _arrondi_centime(centime)
+
+    # Variables selon type de déplacement
+    total_repas = arrondi(where(gd, p['nb_repas_gd'] * p['taux_repas_gd'], 0.0))
+    total_decouche = arrondi(where(gd, p['nb_decouches_gd'] * p['taux_decouche_gd'], 0.0))
+    total_prime_repas_brut = arrondi(where(gd, 0.0, p['nb_prime_repas'] * p['taux_prime_repas']))
+    total_prime_trajet_brut = arrondi(where(gd, 0.0, p['nb_prime_trajet'] * p['taux_prime_trajet']))
+    total_repas_pd = arrondi(where(gd, 0.0, p['nb_repas_pd'] * p['taux_repas_pd']))
+    total_transport_pd = arrondi(where(gd, 0.0, p['nb_transport_pd'] * p['taux_transport_pd']))
+
+    # 1. BRUT TOTAL AVEC DOUBLE MAJORATION ET PRIMES BRUTES
+    h_normales = np.minimum(h, H_NORMALES)     # semaine incomplète : heures pointées
+    h_sup_tranche1 = np.clip(h - 35, 0, 8)      # 36-43h à majo_sup_1%
+    h_sup_tranche2 = np.maximum(h - 43, 0)      # 44h+ à majo_sup_2%
+
+    brut_normales = arrondi(h_normales * brut_h)
+    brut_sup_t1 = arrondi(h_sup_tranche1 * brut_h * (1 + p['majo_sup_1'] / 100))
+    brut_sup_t2 = arrondi(h_sup_tranche2 * brut_h * (1 + p['majo_sup_2'] / 100))
+    brut_sup_total = arrondi(brut_sup_t1 + brut_sup_t2)
+
+    brut_base = arrondi(brut_normales + brut_sup_total)
+
+    majo_nuit_montant = arrondi(p['heures_nuit'] * brut_h * (p['majo_nuit'] / 100))
+
+    brut_avant_ifm = arrondi(brut_base + p['prime_brute'] + total_prime_repas_brut + total_prime_trajet_brut + majo_nuit_montant)
+    ifm = where(p['payer_ifm'], arrondi(brut_avant_ifm * 0.10), 0.0)
+    brut_majoré = arrondi(brut_avant_ifm + ifm)
+    iccp = where(p['payer_iccp'], arrondi(brut_majoré * 0.10), 0.0)
+    brut_total = arrondi(brut_avant_ifm + ifm + iccp)
+
+    # 3. CALCUL DU PLAFOND SÉCURITÉ SOCIALE
+    plafond_ss = bareme.plafond_jour * jours
+    cumul_brut, cumul_plafond = p['cumul_brut'], p['cumul_plafond']
+    brut_cumule = cumul_brut + brut_total
+    plafond_cumule = cumul_plafond + plafond_ss
+    tranche_a = np.minimum(brut_cumule, plafond_cumule) - np.minimum(cumul_brut, cumul_plafond)
+    tranche_b = np.maximum(0, brut_cumule - plafond_cumule) - np.maximum(0, cumul_brut - cumul_plafond)
+    # Dépassement à date ou à la semaine précédente : tranche B et CET régularisés
+    depasse = brut_cumule > plafond_cumule
+    depassait = cumul_brut > cumul_plafond
+    assiette_cet = where(depasse, brut_cumule, 0.0) - where(depassait, cumul_brut, 0.0)
+    est_au_dessus_plafond = depasse | depassait
+
+    # 4. COTISATIONS SALARIALES DÉTAILLÉES
+    part_patron_mutuelle = arrondi(h_normales * bareme.taux['comp_sante_patron'])
+    part_patron_prevoyance = arrondi(brut_total * bareme.taux['comp_incap_t1_patron'])
+
+    base_hs_csg = arrondi(brut_sup_total * bareme.abattement_csg)
+
+    base_avant_abattement = brut_total - brut_sup_total
+    base_csg_abattue = base_avant_abattement * bareme.abattement_csg
+    base_csg = arrondi(base_csg_abattue + part_patron_mutuelle + part_patron_prevoyance)
+
+    # Une ligne par cotisation de la table (lignes × scénarios)
+    table = bareme.salariales
+    salariales = table.montants_lot(
+        (brut_total, tranche_a, tranche_b, assiette_cet, h_normales, brut_sup_total, base_csg, base_hs_csg),
+        attest_fisc, est_au_dessus_plafond)
+    salariales, cotis_salar = _cotisations_centime(table, salariales, centime)
+    salariales = dict(zip(table.noms, salariales))
+    csg_hs = salariales['csg_hs']
+    csg_non_deduct = salariales['csg_non_deduct']
+
+    # 5. NET IMPOSABLE ET RETENUE À LA SOURCE
+    net_imposable = arrondi(where(
+        attest_fisc,
+        brut_total - cotis_salar - brut_sup_total + part_patron_mutuelle,
+        brut_total - cotis_salar + part_patron_mutuelle + csg_hs + csg_non_deduct - brut_sup_total,
+    ))
+
+    # Taux individualisé si renseigné, sinon grille du taux neutre proratisée
+    # (heures / 151.67) : une recherche dichotomique pour tout le lot
+    taux_pas = p['taux_pas']
+    neutre = np.isnan(taux_pas)
+    prorata = h / HEURES_MOIS
+    base_pas = where(neutre & p['contrat_court'], arrondi(net_imposable - bareme.abattement_pas * prorata),
+                     net_imposable)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tranche = np.searchsorted(bareme.seuils_pas_lot, base_pas / prorata, side='right') - 1
+    taux_neutre = where((base_pas <= 0) | (prorata <= 0), 0.0, bareme.taux_pas_lot[np.maximum(tranche, 0)])
+    taux_pas_applique = where(neutre, taux_neutre, taux_pas / 100)
+    retenue_source = arrondi(np.maximum(0, base_pas * taux_pas_applique))
+
+    # 6. NET AVANT RÉGULARISATION et REPAS AUTO
+    net_avant_regul = arrondi(brut_total - cotis_salar - retenue_source + total_repas + total_decouche + total_repas_pd + total_transport_pd - cout_log_salarie)
+    net_cible = arrondi(p['taux_net'] * h)
+    regul_initiale = arrondi(np.maximum(0, net_cible - net_avant_regul))
+
+    avec_repas_auto = p['repas_auto'] & (regul_initiale > 0)
+    taux_max_repas = where(attest_fisc, bareme.indemnite_repas, bareme.indemnite_repas_pd)
+    nb_repas_auto = where(avec_repas_auto, np.trunc(jours), 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        taux_repas_auto = where(avec_repas_auto, arrondi(np.minimum(regul_initiale / nb_repas_auto, taux_max_repas)), 0.0)
+    montant_repas_auto = arrondi(nb_repas_auto * taux_repas_auto)
+
+    total_repas_final = where(avec_repas_auto, arrondi(total_repas + montant_repas_auto), total_repas)
+    net_avant_regul_final = where(
+        avec_repas_auto,
+        arrondi(brut_total - cotis_salar - retenue_source + total_repas_final + total_decouche + total_repas_pd + total_transport_pd - cout_log_salarie),
+        net_avant_regul,
+    )
+    regul = where(avec_repas_auto, arrondi(np.maximum(0, net_cible - net_avant_regul_final)), regul_initiale)
+
+    # 7. CHARGES PATRONALES
+    table = bareme.patronales
+    patronales = table.montants_lot(
+        (brut_total, tranche_a, tranche_b, assiette_cet, h_normales), True, est_au_dessus_plafond,
+        (p['taux_accident'],))
+    patronales, cotis_patron_brutes = _cotisations_centime(table, patronales, centime)
+    reduction_patron_hs = arrondi((h_sup_tranche1 + h_sup_tranche2) * p['reduction_hs_patronale_euro'])
+
+    # 8. CALCUL RGDU
+    rgdu_avant, rgdu, coeff, trois_smic = calculer_rgdu_lot(brut_cumule, p['cumul_heures'] + h, bareme.smic_horaire,
+                                                        bareme.rgdu_t_min, bareme.rgdu_t_max, bareme.rgdu_t_delta)
+    rgdu_avant = arrondi(rgdu_avant - p['cumul_rgdu'] / 1.1)
+    rgdu = arrondi(rgdu - p['cumul_rgdu'])
+    cotis_patron = arrondi(cotis_patron_brutes - reduction_patron_hs - rgdu)
+
+    # 9. COÛT TOTAL ET FACTURATION
+    cout_total_comptable = arrondi(brut_total + cotis_patron + p['logement_hebdo'] + total_repas_final + total_decouche + total_repas_pd + total_transport_pd - cout_log_salarie)
+    cout_total_tresorerie = arrondi(cout_total_comptable + regul)
+
+    ca_refactu = arrondi(p['nb_refactu'] * p['taux_refactu'])
+
+    ca_ht_comptable = (cout_total_comptable / (1 - marge)) + ca_refactu
+    taux_fact_comptable = ca_ht_comptable / h
+    marge_euro_comptable = ca_ht_comptable - cout_total_comptable - ca_refactu
+    coeff_comptable = taux_fact_comptable / brut_h
+
+    ca_ht_tresorerie = (cout_total_tresorerie / (1 - marge)) + ca_refactu
+    taux_fact_tresorerie = ca_ht_tresorerie / h
+    marge_euro_tresorerie = ca_ht_tresorerie - cout_total_tresorerie - ca_refactu
+    coeff_tresorerie = taux_fact_tresorerie / brut_h
+
+    return {
+        'total_repas': total_repas,
+        'total_decouche': total_decouche,
+        'total_prime_repas_brut': total_prime_repas_brut,
+        'total_prime_trajet_brut': total_prime_trajet_brut,
+        'total_repas_pd': total_repas_pd,
+        'total_transport_pd': total_transport_pd,
+        'h_normales': h_normales,
+        'h_sup_tranche1': h_sup_tranche1,
+        'h_sup_tranche2': h_sup_tranche2,
+        'brut_normales': brut_normales,
+        'brut_sup_t1': brut_sup_t1,
+        'brut_sup_t2': brut_sup_t2,
+        'brut_sup_total': brut_sup_total,
+        'brut_base': brut_base,
+        'majo_nuit_montant': majo_nuit_montant,
+        'brut_avant_ifm': brut_avant_ifm,
+        'ifm': ifm,
+        'brut_majoré': brut_majoré,
+        'iccp': iccp,
+        'brut_total': brut_total,
+        'plafond_ss': plafond_ss,
+        'tranche_a': tranche_a,
+        'tranche_b': tranche_b,
+        'assiette_cet': assiette_cet,
+        'est_au_dessus_plafond': est_au_dessus_plafond,
+        'part_patron_mutuelle': part_patron_mutuelle,
+        'part_patron_prevoyance': part_patron_prevoyance,
+        'base_hs_csg': base_hs_csg,
+        'base_avant_abattement': base_avant_abattement,
+        'base_csg_abattue': base_csg_abattue,
+        'base_csg': base_csg,
+        **salariales,
+        'cotis_salar': cotis_salar,
+        'net_imposable': net_imposable,
+        'base_pas': base_pas,
+        'taux_pas_applique': taux_pas_applique,
+        'retenue_source': retenue_source,
+        'net_avant_regul': net_avant_regul,
+        'net_cible': net_cible,
+        'regul_initiale': regul_initiale,
+        'nb_repas_auto': nb_repas_auto,
+        'taux_repas_auto': taux_repas_auto,
+        'montant_repas_auto': montant_repas_auto,
+        'total_repas_final': total_repas_final,
+        'net_avant_regul_final': net_avant_regul_final,
+        'regul': regul,
+        'cotis_patron_brutes': cotis_patron_brutes,
+        'reduction_patron_hs': reduction_patron_hs,
+        'rgdu_avant': rgdu_avant,
+        'rgdu': rgdu,
+        'coeff': coeff,
+        'trois_smic': trois_smic,
+        'cotis_patron': cotis_patron,
+        'cout_total_comptable': cout_total_comptable,
+        'cout_total_tresorerie': cout_total_tresorerie,
+        'ca_refactu': ca_refactu,
+        'ca_ht_comptable': ca_ht_comptable,
+        'taux_fact_comptable': taux_fact_comptable,
+        'marge_euro_comptable': marge_euro_comptable,
+        'coeff_comptable': coeff_comptable,
+        'ca_ht_tresorerie': ca_ht_tresorerie,
+        'taux_fact_tresorerie': taux_fact_tresorerie,
+        'marge_euro_tresorerie': marge_euro_tresorerie,
+        'coeff_tresorerie': coeff_tresorerie,
+    }
@@ -0,0 +1,101 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Grille tarifaire Petit Déplacement                             ║
+║   Taux de facturation et coûts précalculés, filtrables et exportables      ║
+╚════════════════════════════════════════════════════════════════════════════╝
+"""
+
+import io
+
+import streamlit as st
+
+from base_pd import demarrer_surveillance, CODES_ZONES, NIVEAUX
+from grille_tarifaire import grille_partagee
+
+st.set_page_config(
+    page_title="ACTÉRIM - Grille tarifaire PD",
+    page_icon="🏗️",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+st.header("📋 Grille tarifaire Petit Déplacement")
+
+try:
+    demarrer_surveillance()
+    grille = grille_partagee()
+except Exception as e:
+    st.error(f"⚠️ Erreur chargement base PD : {e}")
+    st.stop()
+
+p = grille.parametres
+st.caption(f"{len(grille.departements)} départements × {len(CODES_ZONES)} zones × {len(NIVEAUX)} niveaux × "
+           f"{len(grille.heures)} durées, {p.jours_travailles} jours travaillés, taux et indemnités PD "
+           f"de la base (mise à jour à chaque modification du fichier).")
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FILTRES
+# ═══════════════════════════════════════════════════════════════════════════
+
+with st.sidebar:
+    st.subheader("🔎 Filtres")
+    departements = st.multiselect("Départements", options=grille.departements, placeholder="Tous")
+    zones = st.multiselect("Zones", options=CODES_ZONES, placeholder="Toutes")
+    niveaux = st.multiselect("Niveaux", options=NIVEAUX, placeholder="Tous")
+    heures_min, heures_max = st.slider("Heures travaillées", min(grille.heures), max(grille.heures),
+                                       (min(grille.heures), max(grille.heures)), 1)
+    marge_pct = st.number_input("Marge %", min_value=0.0, max_value=99.0, value=p.marge_pct, step=0.01,
+                                format="%.2f")
+
+df = grille.tableau(
+    departements=departements or None,
+    zones=zones or None,
+    niveaux=niveaux or None,
+    heures=range(heures_min, heures_max + 1),
+    marge_pct=marge_pct,
+)
+
+# Une seule combinaison : réponse directe
+if len(df) == 1:
+    ligne = df.iloc[0]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Taux de facturation", f"{ligne['taux_facturation']:.2f} €/h")
+    col2.metric("Coût total", f"{ligne['cout_total']:.2f} €")
+    col3.metric("Taux brut", f"{ligne['taux_brut']:.2f} €/h")
+
+st.dataframe(
+    df.drop(columns=['ca_ht']),
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        'departement': "Département",
+        'zone': "Zone",
+        'niveau': "Niveau",
+        'heures': "Heures",
+        'taux_brut': st.column_config.NumberColumn("Taux brut €/h", format="%.2f"),
+        'brut_total': st.column_config.NumberColumn("Brut total €", format="%.2f"),
+        'cout_total': st.column_config.NumberColumn("Coût total €", format="%.2f"),
+        'taux_facturation': st.column_config.NumberColumn("Taux facturation €/h", format="%.2f"),
+        'coefficient': st.column_config.NumberColumn("Coefficient", format="%.3f"),
+    },
+)
+st.caption(f"{len(df):,} combinaisons".replace(",", " "))
+
+# ═══════════════════════════════════════════════════════════════════════════
+# EXPORT
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Fichier généré à la demande (l'Excel complet prend quelques secondes)
+col1, col2 = st.columns([1, 3])
+with col1:
+    format_export = st.radio("Format", ["xlsx", "csv"], horizontal=True, label_visibility="collapsed")
+with col2:
+    if st.button("📦 Préparer l'export de la grille complète"):
+        tampon = io.BytesIO()
+        grille.exporter(tampon, format_export, marge_pct)
+        st.session_state["export_grille"] = (format_export, tampon.getvalue())
+
+if "export_grille" in st.session_state:
+    format_fichier, contenu = st.session_state["export_grille"]
+    st.download_button(f"⬇️ Télécharger grille_tarifaire_pd.{format_fichier}", data=contenu,
+                       file_name=f"grille_tarifaire_pd.{format_fichier}")
@@ -0,0 +1,129 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Sensibilité heures × taux brut × marge                         ║
+║   Cartes de chaleur et tableaux, seuils de la paie surlignés               ║
+╚════════════════════════════════════════════════════════════════════════════╝
+"""
+
+from dataclasses import asdict
+
+import altair as alt
+import numpy as np
+import streamlit as st
+
+from base_pd import index_pd_partage, completer_colonnes_pd, CODES_ZONES, NIVEAUX, COLONNES_AUTO_PD
+from baremes import bareme_au
+from moteur_paie import ParametresSimulation
+from sensibilite import (grille_sensibilite, plage, INDICATEURS_FACTURATION, INDICATEURS_PAIE, SEUILS,
+                         HEURES_SENSIBILITE)
+
+st.set_page_config(
+    page_title="ACTÉRIM - Sensibilité",
+    page_icon="🏗️",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+st.header("📈 Sensibilité : heures × taux brut × marge")
+
+# Couleur de chaque seuil : (carte, nom Streamlit de la légende du tableau)
+COULEURS_SEUILS = {
+    'tranche_2': ("#e67e22", "orange"),
+    'plafond_ss': ("#8e44ad", "violet"),
+    'rgdu_nulle': ("#c0392b", "red"),
+}
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SCÉNARIO
+# ═══════════════════════════════════════════════════════════════════════════
+
+bareme = bareme_au()
+
+with st.sidebar:
+    st.subheader("🚗 Scénario")
+    deplacement = st.radio("Déplacement", ["GD", "PD"], horizontal=True)
+    jours_travailles = st.number_input("Jours travaillés", 1, 7, 5, 1)
+    if deplacement == "GD":
+        parametres = ParametresSimulation(
+            jours_travailles=jours_travailles,
+            nb_repas_gd=jours_travailles, taux_repas_gd=bareme.indemnite_repas,
+            nb_decouches_gd=max(jours_travailles - 1, 0), taux_decouche_gd=bareme.indemnite_decouche,
+        )
+    else:
+        try:
+            index = index_pd_partage()
+        except Exception as e:
+            st.error(f"⚠️ Erreur chargement base PD : {e}")
+            st.stop()
+        departement = st.selectbox("Département", index.departements)
+        zone = st.selectbox("Zone", CODES_ZONES)
+        niveau = st.selectbox("Niveau", NIVEAUX)
+        base = ParametresSimulation(grand_deplacement=False, jours_travailles=jours_travailles,
+                                    nb_repas_pd=jours_travailles, taux_repas_pd=bareme.indemnite_repas_pd)
+        colonnes = {nom: v for nom, v in asdict(base).items() if nom not in COLONNES_AUTO_PD}
+        colonnes.update(departement=departement, zone_chantier=zone, niveau=niveau)
+        colonnes = completer_colonnes_pd(colonnes, index, 1)
+        parametres = ParametresSimulation(**{nom: np.asarray(v).item() if np.ndim(v) else v
+                                             for nom, v in colonnes.items()})
+
+    st.subheader("📐 Plages")
+    taux_min, taux_max = st.slider("Taux brut €/h", bareme.smic_horaire, 60.0,
+                                   (bareme.smic_horaire, 40.0), 0.5)
+    pas_taux = st.select_slider("Pas du taux brut", options=[0.1, 0.25, 0.5, 1.0, 2.0], value=0.5)
+    marge_min, marge_max = st.slider("Marges %", 0.0, 50.0, (5.0, 30.0), 1.0)
+    pas_marge = st.select_slider("Pas de la marge", options=[0.5, 1.0, 2.0, 5.0], value=1.0)
+
+grille = grille_sensibilite(parametres, plage(taux_min, taux_max, pas_taux), plage(marge_min, marge_max, pas_marge),
+                            HEURES_SENSIBILITE)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# AFFICHAGE (sans recalcul : lectures dans la grille en cache)
+# ═══════════════════════════════════════════════════════════════════════════
+
+libelles = {**INDICATEURS_FACTURATION, **INDICATEURS_PAIE}
+col1, col2, col3 = st.columns([2, 2, 1])
+with col1:
+    indicateur = st.selectbox("Indicateur", list(libelles), format_func=libelles.get)
+with col2:
+    marge_pct = st.select_slider("Marge %", options=grille.marges,
+                                 value=min(grille.marges, key=lambda m: abs(m - 17.0)),
+                                 disabled=indicateur in INDICATEURS_PAIE)
+with col3:
+    vue = st.radio("Vue", ["Carte", "Tableau"], horizontal=True, label_visibility="collapsed")
+
+st.caption(f"{len(grille.taux_bruts)} taux × {len(grille.heures)} durées × {len(grille.marges)} marges = "
+           f"{len(grille.taux_bruts) * len(grille.heures) * len(grille.marges):,} cellules".replace(",", " ") +
+           " — cellules où un seuil est franchi surlignées")
+
+df = grille.tableau(indicateur, marge_pct)
+
+if vue == "Carte":
+    axes = dict(x=alt.X('heures:O', title="Heures / semaine"),
+                y=alt.Y('taux_brut:O', title="Taux brut €/h", sort='descending'))
+    carte = alt.Chart(df).mark_rect().encode(
+        **axes,
+        color=alt.Color('valeur:Q', title=libelles[indicateur], scale=alt.Scale(scheme='blues')),
+        tooltip=['taux_brut', 'heures', alt.Tooltip('valeur:Q', format='.2f')],
+    )
+    seuils = df.melt(id_vars=['taux_brut', 'heures'], value_vars=list(SEUILS), var_name='seuil')
+    seuils = seuils[seuils['value']].assign(seuil=lambda d: d['seuil'].map(SEUILS))
+    contours = alt.Chart(seuils).mark_rect(fillOpacity=0, strokeWidth=2).encode(
+        **axes,
+        stroke=alt.Stroke('seuil:N', title="Seuil franchi",
+                          scale=alt.Scale(domain=list(SEUILS.values()),
+                                          range=[couleur for couleur, _ in COULEURS_SEUILS.values()])),
+    )
+    st.altair_chart(carte + contours, use_container_width=True)
+else:
+    table = df.pivot(index='taux_brut', columns='heures', values='valeur').sort_index(ascending=False)
+    franchi = {seuil: df.pivot(index='taux_brut', columns='heures', values=seuil).sort_index(ascending=False)
+               for seuil in SEUILS}
+
+    def surligner(_):
+        styles = np.full(table.shape, "", dtype=object)
+        for seuil, (couleur, _) in COULEURS_SEUILS.items():
+            styles = np.where(franchi[seuil].to_numpy(), f"background-color: {couleur}55", styles)
+        return styles
+
+    st.dataframe(table.style.apply(surligner, axis=None).format("{:.2f}"), use_container_width=True)
+    st.markdown(" ".join(f":{nom}-background[{SEUILS[seuil]}]" for seuil, (_, nom) in COULEURS_SEUILS.items()))
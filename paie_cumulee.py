@@ -0,0 +1,146 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Paie sur plusieurs semaines                                    ║
+║   Plafond SS progressif et RGDU annualisée, cumuls reportés par semaine    ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Chaque salarié garde ses cumuls de l'année (brut, heures, plafond SS, RGDU
+déjà accordée). La semaine N+1 est simulée avec ces cumuls en entrée
+(champs cumul_* de ParametresSimulation) : tranches A/B du cumul à date
+moins celles déjà déclarées, RGDU du cumul à date moins celle déjà accordée.
+Ajouter une semaine coûte une simulation et quatre additions, sans recalculer
+les semaines précédentes. Les cumuls repartent de zéro au changement d'année
+(année de date_effet).
+
+    paie = PaieCumulee()
+    for p in semaines:
+        r = paie.ajouter_semaine(p)
+
+En lot (une ligne par salarié, même ordre chaque semaine) :
+
+    cumuls = None
+    for colonnes in semaines:
+        resultats, cumuls = semaine_lot(colonnes, cumuls)
+"""
+
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from baremes import date_du_jour
+from moteur_paie import simuler
+from moteur_vectoriel import simuler_lot, preparer_colonnes
+
+# Cumul -> champ de ParametresSimulation
+CHAMPS_CUMULS = {
+    'brut': 'cumul_brut',
+    'heures': 'cumul_heures',
+    'plafond': 'cumul_plafond',
+    'rgdu': 'cumul_rgdu',
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# UN SALARIÉ
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True, slots=True)
+class Cumuls:
+    """Cumuls de l'année d'un salarié, avant la semaine suivante"""
+    annee: int = 0
+    semaines: int = 0
+    brut: float = 0.0
+    heures: float = 0.0
+    plafond: float = 0.0
+    rgdu: float = 0.0
+
+    def pour(self, annee):
+        """Cumuls à reporter sur une semaine de l'année donnée (remis à zéro si elle change)"""
+        return self if annee == self.annee else Cumuls(annee)
+
+    def parametres(self, p):
+        """p avec ces cumuls en entrée"""
+        return replace(p, **{champ: getattr(self, nom) for nom, champ in CHAMPS_CUMULS.items()})
+
+    def ajouter(self, p, r):
+        """Cumuls après la semaine p (résultat r)"""
+        return Cumuls(
+            annee=self.annee,
+            semaines=self.semaines + 1,
+            brut=self.brut + r.brut_total,
+            heures=self.heures + p.heures_semaine,
+            plafond=self.plafond + r.plafond_ss,
+            rgdu=self.rgdu + r.rgdu,
+        )
+
+
+class PaieCumulee:
+    """Paie d'un salarié semaine après semaine
+
+    calcul : moteur à utiliser (simuler par défaut, ou le simuler d'une
+    SimulationIncrementale propre à ce salarié).
+    """
+
+    def __init__(self, cumuls=None, calcul=simuler):
+        self.cumuls = cumuls or Cumuls()
+        self.calcul = calcul
+
+    def ajouter_semaine(self, p):
+        """Simule la semaine p avec les cumuls reportés ; renvoie son ResultatSimulation"""
+        cumuls = self.cumuls.pour(date_du_jour(p.date_effet).year)
+        p = cumuls.parametres(p)
+        r = self.calcul(p)
+        self.cumuls = cumuls.ajouter(p, r)
+        return r
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# UN LOT DE SALARIÉS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def cumuls_lot(n):
+    """Cumuls vides pour n salariés (dict nom -> tableau)"""
+    cumuls = {nom: np.zeros(n) for nom in CHAMPS_CUMULS}
+    cumuls['annee'] = np.zeros(n, dtype=np.int64)
+    cumuls['semaines'] = np.zeros(n, dtype=np.int64)
+    return cumuls
+
+
+def _annees(jours):
+    return np.asarray(jours).astype(np.int64).astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
+
+
+def semaine_lot(colonnes, cumuls=None, n=None, calcul=simuler_lot):
+    """Une semaine pour un lot de salariés ; renvoie (résultats, cumuls à jour)
+
+    colonnes : comme pour simuler_lot, une ligne par salarié (les colonnes
+    cumul_* sont remplacées par les cumuls) ; cumuls : ceux de la semaine
+    précédente (même ordre des lignes), None pour la première.
+    calcul : simuler_lot ou CalculParallele.simuler_lot.
+    """
+    tableaux = preparer_colonnes(colonnes, n)
+    n = len(tableaux['heures_semaine'])
+    if cumuls is None:
+        cumuls = cumuls_lot(n)
+
+    annee = _annees(tableaux['date_effet'])
+    nouvelle_annee = annee != cumuls['annee']
+    avant = {nom: np.where(nouvelle_annee, 0.0, cumuls[nom]) for nom in CHAMPS_CUMULS}
+    tableaux.update((champ, avant[nom]) for nom, champ in CHAMPS_CUMULS.items())
+
+    resultats = calcul(tableaux, n)
+    return resultats, {
+        'annee': annee,
+        'semaines': np.where(nouvelle_annee, 0, cumuls['semaines']) + 1,
+        'brut': avant['brut'] + resultats['brut_total'],
+        'heures': avant['heures'] + tableaux['heures_semaine'],
+        'plafond': avant['plafond'] + resultats['plafond_ss'],
+        'rgdu': avant['rgdu'] + resultats['rgdu'],
+    }
+
+
+def simuler_semaines_lot(semaines, n=None, cumuls=None, calcul=simuler_lot):
+    """semaine_lot sur une suite de semaines ; génère (résultats, cumuls) semaine par semaine"""
+    for colonnes in semaines:
+        resultats, cumuls = semaine_lot(colonnes, cumuls, n, calcul)
+        yield resultats, cumuls
@@ -0,0 +1,266 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Ingestion des pointages                                        ║
+║   Pointages journaliers -> semaines (heures, nuit, jours, repas) -> paie   ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Usage :
+    python pointages.py pointages.csv -o semaines.csv
+    python pointages.py pointages.csv -o semaines.xlsx --parametre taux_brut=14 --parametre taux_repas_gd=21.40
+
+Une ligne par pointage : `salarie`, `date`, `debut`, `fin` (07:30, 7h30 ou
+heure Excel ; une fin avant le début passe minuit, une fin égale au début
+est un pointage annulé, ignoré), `departement`,
+`zone_chantier`, et en option `type_deplacement`, `niveau` et `taux_pas`
+(taux de prélèvement individualisé du salarié). Chaque semaine
+ISO d'un salarié devient une ligne de simulation :
+
+    heures_semaine    somme des durées pointées
+    heures_nuit       part des pointages entre 21h et 6h
+    jours_travailles  jours distincts pointés
+    nb_repas_gd / pd  jours dont l'amplitude couvre la pause de midi (12h-13h)
+    departement, zone chantier principal (le plus d'heures dans la semaine)
+    date_effet        lundi de la semaine (choisit le barème)
+
+Une semaine de moins de 35 h (temps partiel, arrivée en cours de semaine)
+est payée et facturée aux heures pointées, sans heures supplémentaires.
+
+Le fichier est lu par blocs ; les pointages sont agrégés par salarié et par
+jour au fil de l'eau. L'export étant chronologique, une semaine est close dès
+qu'un bloc commence après elle : elle est alors simulée et écrite, et seule
+la semaine en cours reste en mémoire.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from base_pd import index_pd_partage
+from calcul_parallele import CalculParallele
+from moteur_vectoriel import COLONNES_ENTREE
+from tarification_lot import lire_blocs, tarifer_bloc, ecrivain, COLONNES_CLES, TAILLE_BLOC
+
+COLONNES_POINTAGE = ['salarie', 'date', 'debut', 'fin']
+COLONNES_CONTEXTE = ['type_deplacement', 'niveau', 'taux_pas']   # reprises du dernier pointage de la semaine
+CHANTIER = ['departement', 'zone_chantier']
+CLES_JOUR = ['salarie', 'lundi', 'date']
+
+# Fenêtres horaires (minutes depuis minuit)
+DEBUT_NUIT = 21 * 60
+FIN_NUIT = 6 * 60
+MIDI = (12 * 60, 13 * 60)
+JOUR = 24 * 60
+
+# Nuits recoupées par un pointage (début dans la journée, au plus 24h)
+_NUITS = ((0, FIN_NUIT), (DEBUT_NUIT, JOUR + FIN_NUIT), (JOUR + DEBUT_NUIT, 2 * JOUR))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# POINTAGES -> JOURS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def minutes(serie):
+    """Heures '07:30', '7h30', '07:30:00' ou horodatage -> minutes depuis minuit (NaN si illisible)"""
+    # Peu d'heures distinctes dans un export : chaque texte n'est analysé qu'une fois
+    codes, textes = pd.factorize(serie.astype(str))
+    parties = pd.Series(textes).str.extract(r'(\d{1,2})\s*[:hH]\s*(\d{2})?')
+    valeurs = (parties[0].astype(np.float64) * 60 + parties[1].astype(np.float64).fillna(0)).to_numpy()
+    return np.where(codes < 0, np.nan, valeurs[codes])
+
+
+def heures_nuit(debut, fin):
+    """Heures entre DEBUT_NUIT et FIN_NUIT d'un intervalle [debut, fin] en minutes (fin > debut)"""
+    nuit = 0.0
+    for a, b in _NUITS:
+        nuit = nuit + np.clip(np.minimum(fin, b) - np.maximum(debut, a), 0, None)
+    return nuit / 60
+
+
+def preparer_pointages(df):
+    """Un bloc de pointages -> une ligne par salarié, jour et chantier"""
+    manquantes = [c for c in COLONNES_POINTAGE + CHANTIER if c not in df.columns]
+    if manquantes:
+        raise KeyError(f"Colonnes de pointage manquantes : {', '.join(manquantes)}")
+
+    debut = minutes(df['debut'])
+    fin = minutes(df['fin'])
+    fin = np.where(fin < debut, fin + JOUR, fin)           # pointage de nuit : fin le lendemain
+    dates = pd.to_datetime(df['date'], errors='coerce', format='ISO8601').fillna(
+        pd.to_datetime(df['date'], errors='coerce', format='%d/%m/%Y')).to_numpy('datetime64[D]')
+    # Durée nulle (pointage en double ou annulé) : écarté comme un pointage illisible
+    valides = ~(np.isnan(debut) | np.isnan(fin) | np.isnat(dates)) & (fin != debut)
+
+    pointages = pd.DataFrame({
+        'salarie': df['salarie'].astype(str).str.strip().to_numpy(),
+        # Lundi de la semaine ISO (1970-01-01 était un jeudi)
+        'lundi': dates - ((dates.astype(np.int64) + 3) % 7).astype('timedelta64[D]'),
+        'date': dates,
+        'departement': df['departement'].fillna("").astype(str).str.strip().to_numpy(),
+        'zone_chantier': df['zone_chantier'].fillna("").astype(str).str.strip().to_numpy(),
+        'heures': (fin - debut) / 60,
+        'nuit': heures_nuit(debut, fin),
+        'debut': debut,
+        'fin': fin,
+    })
+    for nom in COLONNES_CONTEXTE:
+        if nom in df.columns:
+            pointages[nom] = df[nom].to_numpy()
+    return pointages[valides]
+
+
+def agreger_jours(pointages):
+    """Cumule les pointages par salarié, jour et chantier (fusion de blocs comprise)"""
+    regles = {'heures': 'sum', 'nuit': 'sum', 'debut': 'min', 'fin': 'max'}
+    regles.update((nom, 'last') for nom in COLONNES_CONTEXTE if nom in pointages.columns)
+    return pointages.groupby(CLES_JOUR + CHANTIER, sort=False, as_index=False).agg(regles)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# JOURS -> SEMAINES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def semaines(jours):
+    """Jours (agreger_jours) de semaines closes -> une ligne de simulation par salarié et semaine"""
+    if not len(jours):
+        return pd.DataFrame()
+    cles = ['salarie', 'lundi']
+    par_jour = jours.groupby(CLES_JOUR, sort=False).agg(
+        heures=('heures', 'sum'), debut=('debut', 'min'), fin=('fin', 'max'))
+    par_jour['travaille'] = par_jour['heures'] > 0
+    par_jour['repas'] = par_jour['travaille'] & (par_jour['debut'] <= MIDI[0]) & (par_jour['fin'] >= MIDI[1])
+    semaine = par_jour.groupby(level=cles, sort=True).agg(
+        jours_travailles=('travaille', 'sum'), nb_repas=('repas', 'sum'))
+    semaine['heures_semaine'] = jours.groupby(cles)['heures'].sum()
+    semaine['heures_nuit'] = jours.groupby(cles)['nuit'].sum()
+
+    # Chantier principal : le plus d'heures dans la semaine
+    chantiers = jours.groupby(cles + CHANTIER)['heures'].sum()
+    principal = chantiers.groupby(level=cles).idxmax()
+    for i, nom in enumerate(CHANTIER, start=len(cles)):
+        semaine[nom] = [cle[i] for cle in principal.reindex(semaine.index)]
+    contexte = [nom for nom in COLONNES_CONTEXTE if nom in jours.columns]
+    if contexte:
+        semaine[contexte] = jours.groupby(cles)[contexte].last()
+
+    semaine = semaine.reset_index().sort_values(['lundi', 'salarie'], kind='stable', ignore_index=True)
+    gd = True if 'type_deplacement' not in semaine else \
+        ~semaine['type_deplacement'].fillna("G").astype(str).str.strip().str.upper().str.startswith("P")
+    semaine['nb_repas_gd'] = np.where(gd, semaine['nb_repas'], 0)
+    semaine['nb_repas_pd'] = np.where(gd, 0, semaine['nb_repas'])
+    codes, lundis = pd.factorize(semaine['lundi'])
+    semaine['semaine'] = lundis.strftime('%G-W%V').to_numpy()[codes]
+    semaine['date_effet'] = lundis.strftime('%Y-%m-%d').to_numpy()[codes]
+    return semaine.drop(columns=['lundi', 'nb_repas'])[
+        ['salarie', 'semaine', 'date_effet'] + contexte + CHANTIER +
+        ['heures_semaine', 'heures_nuit', 'jours_travailles', 'nb_repas_gd', 'nb_repas_pd']]
+
+
+class AgregateurPointages:
+    """Agrège des blocs de pointages chronologiques ; rend les semaines au fur et à mesure qu'elles se closent"""
+
+    def __init__(self):
+        self.ouverts = None          # jours des semaines non closes
+        self.cloture = None          # lundi de la plus ancienne semaine encore ouverte
+
+    def ajouter(self, bloc):
+        """Ajoute un bloc de pointages bruts ; renvoie les semaines closes (DataFrame, éventuellement vide)"""
+        pointages = preparer_pointages(bloc)
+        if not len(pointages):
+            return pd.DataFrame()
+        premier = pointages['lundi'].min()
+        if self.cloture is not None and premier < self.cloture:
+            raise ValueError(f"Pointage du {pd.Timestamp(premier):%d/%m/%Y} arrivé après la clôture de sa semaine : "
+                             "l'export doit être trié par date")
+        jours = agreger_jours(pointages)
+        if self.ouverts is not None:
+            jours = agreger_jours(pd.concat([self.ouverts, jours], ignore_index=True))
+        closes = jours['lundi'] < premier
+        self.ouverts = jours[~closes]
+        self.cloture = premier
+        return semaines(jours[closes])
+
+    def terminer(self):
+        """Semaines restées ouvertes en fin de fichier"""
+        restants, self.ouverts = self.ouverts, None
+        return semaines(restants) if restants is not None else pd.DataFrame()
+
+
+def lire_semaines(chemin, taille_bloc=TAILLE_BLOC, sep=",", decimal="."):
+    """Itère sur les semaines closes d'un fichier de pointages (DataFrames non vides)"""
+    agregateur = AgregateurPointages()
+    for bloc in lire_blocs(chemin, taille_bloc, sep, decimal, texte=COLONNES_CLES + ['salarie']):
+        closes = agregateur.ajouter(bloc)
+        if len(closes):
+            yield closes
+    restantes = agregateur.terminer()
+    if len(restantes):
+        yield restantes
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# POINT D'ENTRÉE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def simuler_pointages(entree, sortie, taille_bloc=TAILLE_BLOC, sep=",", decimal=".", parametres=None,
+                      rapport=sys.stderr, processus=1):
+    """Pointages -> semaines simulées et écrites au fil de l'eau ; renvoie le nombre de semaines
+
+    parametres : valeurs fixes des autres champs de simulation
+    (ex. {'taux_brut': 14.0}), valeurs par défaut de la sidebar sinon.
+    """
+    parametres = parametres or {}
+    inconnus = set(parametres) - set(COLONNES_ENTREE)
+    if inconnus:
+        raise KeyError(f"Paramètres inconnus : {', '.join(sorted(inconnus))}")
+    index = index_pd_partage()
+    calcul = None if processus == 1 else CalculParallele(processus or None)
+    destination = ecrivain(sortie, sep, decimal)
+    debut = time.perf_counter()
+    total = 0
+    try:
+        for bloc in lire_semaines(entree, taille_bloc, sep, decimal):
+            bloc = bloc.assign(**parametres)
+            destination.ecrire(tarifer_bloc(bloc, index, calcul))
+            total += len(bloc)
+            if rapport is not None:
+                duree = time.perf_counter() - debut
+                print(f"\r{total:,} semaines  ({total / duree:,.0f} semaines/s)", end="", file=rapport, flush=True)
+    finally:
+        destination.fermer()
+        if calcul is not None:
+            calcul.fermer()
+    if rapport is not None:
+        duree = time.perf_counter() - debut
+        print(f"\r{total:,} semaines simulées en {duree:.2f} s", file=rapport)
+    return total
+
+
+def _parametre(texte):
+    nom, _, valeur = texte.partition("=")
+    if not valeur:
+        raise argparse.ArgumentTypeError(f"nom=valeur attendu : {texte}")
+    return nom.strip(), float(valeur)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pointages journaliers -> paie hebdomadaire ACTERIM")
+    parser.add_argument("entree", help="Fichier de pointages (.csv ou .xlsx), trié par date")
+    parser.add_argument("-o", "--sortie", required=True, help="Fichier de résultats (.csv ou .xlsx)")
+    parser.add_argument("--parametre", type=_parametre, action="append", default=[], metavar="NOM=VALEUR",
+                        help="Valeur fixe d'un champ de simulation (ex. taux_brut=14), répétable")
+    parser.add_argument("--taille-bloc", type=int, default=TAILLE_BLOC,
+                        help=f"Pointages lus par bloc (défaut : {TAILLE_BLOC})")
+    parser.add_argument("--sep", default=",", help="Séparateur CSV (défaut : ',')")
+    parser.add_argument("--decimal", default=".", help="Séparateur décimal CSV (défaut : '.')")
+    parser.add_argument("--processus", type=int, default=1,
+                        help="Processus de calcul (défaut : 1 ; 0 = un par cœur)")
+    args = parser.parse_args(argv)
+    simuler_pointages(args.entree, args.sortie, args.taille_bloc, args.sep, args.decimal,
+                      dict(args.parametre), processus=args.processus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Tarification d'un portefeuille de missions                     ║
+║   Marges ou taux bruts par mission pour une marge totale négociée          ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Pour un compte client, on négocie une marge globale, pas une marge par
+intérimaire. Deux répartitions, sous les mêmes contraintes (taux brut au
+moins égal au SMIC, au minimum conventionnel PD et au taux qui tient le net
+promis ; taux client plafonné) :
+
+    optimiser_marges     taux bruts fixés, marge de chaque mission
+    optimiser_taux_brut  taux client fixé, taux brut de chaque mission
+
+La paie ne dépend pas de la marge : avec k = 1 / (1 - marge), le CA d'une
+mission vaut coût × k + refacturation et sa marge en € coût × (k - 1). La
+marge totale est donc linéaire par morceaux en un coefficient commun k,
+borné mission par mission : la répartition des marges se résout exactement,
+sans itération. Pour les taux bruts, un même supplément au-dessus du
+plancher de chaque mission est cherché par dichotomie (une simulation du lot
+par pas).
+
+    a = optimiser_marges(colonnes, marge_totale=25_000, taux_client=38.0)
+    a.tableau()
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from base_pd import index_pd_partage, completer_colonnes_pd
+from moteur_vectoriel import simuler_lot, preparer_colonnes
+from solveur import resoudre_lot, arrondir, INCONNUES, STATUT_RESOLU, STATUT_BORNE_BASSE, STATUT_BORNE_HAUTE
+
+MARGE_MIN = 0.0
+MARGE_MAX = 60.0
+TAUX_BRUT_MAX = INCONNUES['taux_brut'][1]
+ITERATIONS_MAX = 60
+TOLERANCE = 0.005         # € sur la marge totale
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONTRAINTES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _colonnes_moteur(colonnes, n, index):
+    """Colonnes du moteur, taux PD complétés si le lot a des départements
+
+    Le taux brut est remplacé par NaN : completer_colonnes_pd y met le
+    minimum conventionnel (SMIC hors PD ou département inconnu).
+    """
+    colonnes = dict(colonnes)
+    saisi = colonnes.pop('taux_brut', None)
+    if 'departement' not in colonnes:
+        colonnes['departement'] = np.full(n, "", dtype=object)
+    index = index_pd_partage() if index is None else index
+    colonnes = completer_colonnes_pd({**colonnes, 'taux_brut': np.nan}, index, n)
+    return preparer_colonnes(colonnes, n), saisi
+
+
+def _preparer(colonnes, n, index, net_promis):
+    """(planchers, colonnes préparées, taux brut saisi ou None)"""
+    if n is None:
+        longueurs = {np.size(v) for v in colonnes.values() if np.ndim(v) > 0}
+        n = longueurs.pop() if len(longueurs) == 1 else 1
+    tableaux, saisi = _colonnes_moteur(colonnes, n, index)
+    planchers = tableaux['taux_brut'].copy()
+    if net_promis:
+        net = resoudre_lot(tableaux, 'taux_brut', 'net', n=n, bornes=(planchers, TAUX_BRUT_MAX), pas=0.01)
+        planchers = np.maximum(planchers, net['valeur'])
+    return planchers, tableaux, saisi
+
+
+def planchers_taux_brut(colonnes, n=None, index=None, net_promis=True):
+    """Taux brut minimum de chaque mission
+
+    Minimum conventionnel (base PD selon département et niveau, SMIC sinon),
+    relevé au taux qui tient le net promis (taux_net) sans régularisation si
+    net_promis.
+    """
+    return _preparer(colonnes, n, index, net_promis)[0]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RÉSULTAT
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class AllocationPortefeuille:
+    """Répartition trouvée, mission par mission (tableaux NumPy)
+
+    statut : STATUT_RESOLU si la marge totale est atteinte ;
+    STATUT_BORNE_BASSE si elle est dépassée même là où elle est la plus
+    faible (marges minimales, ou taux bruts maximum) ; STATUT_BORNE_HAUTE si
+    elle est hors d'atteinte même là où elle est la plus forte (marges
+    maximales ou plafond client, ou taux bruts planchers). plafond_depasse :
+    missions dont le taux client dépasse le plafond même à la marge minimale.
+    """
+    taux_brut: np.ndarray
+    marge_pct: np.ndarray
+    cout_total_comptable: np.ndarray
+    ca_ht_comptable: np.ndarray
+    taux_fact_comptable: np.ndarray
+    marge_euro: np.ndarray
+    plafond_depasse: np.ndarray
+    marge_cible: float
+    statut: int
+
+    @property
+    def marge_totale(self):
+        return float(self.marge_euro.sum())
+
+    @property
+    def resolu(self):
+        return self.statut == STATUT_RESOLU
+
+    def tableau(self):
+        """DataFrame une ligne par mission"""
+        import pandas as pd
+
+        return pd.DataFrame({nom: getattr(self, nom) for nom in (
+            'taux_brut', 'marge_pct', 'cout_total_comptable', 'ca_ht_comptable', 'taux_fact_comptable',
+            'marge_euro', 'plafond_depasse')})
+
+
+def _allocation(tableaux, taux_brut, cout, ca_ht, marge_cible, statut, plafond_depasse):
+    ca_refactu = tableaux['nb_refactu'] * tableaux['taux_refactu']
+    marge_euro = ca_ht - cout - ca_refactu
+    with np.errstate(divide='ignore', invalid='ignore'):
+        marge_pct = np.where(ca_ht - ca_refactu > 0, 100 * marge_euro / (ca_ht - ca_refactu), 0.0)
+    return AllocationPortefeuille(taux_brut, marge_pct, cout, ca_ht, ca_ht / tableaux['heures_semaine'],
+                                  marge_euro, plafond_depasse, float(marge_cible), statut)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MARGES PAR MISSION (TAUX BRUTS FIXÉS)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _coefficient_commun(cout, k_bas, k_haut, cible):
+    """k tel que somme(cout × (clip(k, k_bas, k_haut) - 1)) = cible, exactement
+
+    La somme est linéaire entre deux bornes consécutives : on l'évalue aux
+    bornes (sommes cumulées) puis on interpole.
+    """
+    bornes = np.unique(np.concatenate([k_bas, k_haut]))
+    ordre_bas, ordre_haut = np.argsort(k_bas), np.argsort(k_haut)
+    kb, cb = k_bas[ordre_bas], cout[ordre_bas]
+    kh, ch = k_haut[ordre_haut], cout[ordre_haut]
+    cumul_cb = np.concatenate([[0.0], np.cumsum(cb)])
+    cumul_cbk = np.concatenate([[0.0], np.cumsum(cb * kb)])
+    cumul_ch = np.concatenate([[0.0], np.cumsum(ch)])
+    cumul_chk = np.concatenate([[0.0], np.cumsum(ch * kh)])
+
+    # Pour k donné : missions sous k_bas -> k_bas, entre -> k, au-delà de k_haut -> k_haut
+    i_bas = np.searchsorted(kb, bornes, side='left')
+    i_haut = np.searchsorted(kh, bornes, side='left')
+    total = (cumul_cbk[-1] - cumul_cbk[i_bas]) + bornes * (cumul_cb[i_bas] - cumul_ch[i_haut]) + cumul_chk[i_haut]
+    marges = total - cout.sum()
+    return float(np.interp(cible, marges, bornes))
+
+
+def optimiser_marges(colonnes, marge_totale, taux_client=None, n=None, marge_min=MARGE_MIN, marge_max=MARGE_MAX,
+                     index=None, net_promis=True):
+    """Marge de chaque mission pour une marge totale (€), taux bruts fixés
+
+    colonnes    : comme pour tarification_lot (departement, zone_chantier,
+                  niveau acceptés) ; le taux brut saisi est relevé au plancher
+    taux_client : taux de facturation maximum (€/h), scalaire ou par mission
+    marge_min / marge_max : bornes de la marge de chaque mission (%)
+
+    Les missions partagent un même coefficient k = 1 / (1 - marge), ramené
+    dans les bornes de chacune (marge min/max, taux client).
+    """
+    planchers, tableaux, saisi = _preparer(colonnes, n, index, net_promis)
+    n = len(planchers)
+    taux_brut = planchers if saisi is None else np.maximum(planchers, np.broadcast_to(saisi, (n,)))
+    tableaux['taux_brut'] = taux_brut
+    r = simuler_lot(tableaux, n)
+    cout = r['cout_total_comptable']
+    ca_refactu = r['ca_refactu']
+
+    k_bas = np.full(n, 1 / (1 - marge_min / 100))
+    k_haut = np.full(n, 1 / (1 - marge_max / 100))
+    plafond_depasse = np.zeros(n, dtype=bool)
+    if taux_client is not None:
+        ventes_max = np.broadcast_to(np.asarray(taux_client, dtype=np.float64), (n,)) * tableaux['heures_semaine']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            k_client = np.where(cout > 0, (ventes_max - ca_refactu) / cout, np.inf)
+        plafond_depasse = k_client < k_bas
+        k_haut = np.maximum(np.minimum(k_haut, k_client), k_bas)
+
+    marge_bas = float((cout * (k_bas - 1)).sum())
+    marge_haut = float((cout * (k_haut - 1)).sum())
+    if marge_totale <= marge_bas:
+        k, statut = k_bas, STATUT_BORNE_BASSE
+    elif marge_totale >= marge_haut:
+        k = k_haut
+        statut = STATUT_RESOLU if marge_totale - marge_haut <= TOLERANCE else STATUT_BORNE_HAUTE
+    else:
+        k = np.clip(_coefficient_commun(cout, k_bas, k_haut, marge_totale), k_bas, k_haut)
+        statut = STATUT_RESOLU
+    return _allocation(tableaux, taux_brut, cout, cout * k + ca_refactu, marge_totale, statut, plafond_depasse)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TAUX BRUTS PAR MISSION (TAUX CLIENT FIXÉ)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def optimiser_taux_brut(colonnes, marge_totale, taux_client, n=None, taux_brut_max=TAUX_BRUT_MAX, index=None,
+                        net_promis=True, pas=0.01):
+    """Taux brut de chaque mission pour une marge totale (€), taux client fixé
+
+    Chaque mission est facturée taux_client × heures (refacturation
+    comprise) ; les taux bruts reçoivent un même supplément au-dessus de
+    leur plancher, le plus grand qui laisse la marge totale, puis sont
+    arrondis au pas vers le bas (la marge ne peut qu'augmenter).
+    """
+    planchers, tableaux, _ = _preparer(colonnes, n, index, net_promis)
+    n = len(planchers)
+    haut = np.maximum(np.broadcast_to(np.asarray(taux_brut_max, dtype=np.float64), (n,)), planchers)
+    ventes = np.broadcast_to(np.asarray(taux_client, dtype=np.float64), (n,)) * tableaux['heures_semaine']
+    ca_refactu = tableaux['nb_refactu'] * tableaux['taux_refactu']
+
+    def marge(supplement):
+        tableaux['taux_brut'] = np.minimum(planchers + supplement, haut)
+        cout = simuler_lot(tableaux, n)['cout_total_comptable']
+        return float((ventes - ca_refactu - cout).sum())
+
+    # La marge totale décroît avec le supplément
+    a, b = 0.0, float((haut - planchers).max(initial=0.0))
+    if marge(a) < marge_totale:
+        supplement, statut = a, STATUT_BORNE_HAUTE
+    elif marge(b) >= marge_totale:
+        supplement, statut = b, STATUT_BORNE_BASSE
+    else:
+        for _ in range(ITERATIONS_MAX):
+            milieu = (a + b) / 2
+            if marge(milieu) >= marge_totale:
+                a = milieu
+            else:
+                b = milieu
+            if b - a < pas / 100:
+                break
+        supplement, statut = a, STATUT_RESOLU
+
+    taux_brut = np.minimum(planchers + supplement, haut)
+    if pas is not None:
+        taux_brut = np.maximum(arrondir(taux_brut, 'plafond', pas), planchers)
+    tableaux['taux_brut'] = taux_brut
+    cout = simuler_lot(tableaux, n)['cout_total_comptable']
+    return _allocation(tableaux, taux_brut, cout, ventes.copy(), marge_totale, statut, np.zeros(n, dtype=bool))
@@ -0,0 +1,142 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Sensibilité heures × taux brut × marge                         ║
+║   Grille de facturation en un calcul, seuils de la paie repérés            ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+La paie ne dépend pas de la marge : les cellules heures × taux brut sont
+simulées en un seul appel à simuler_lot, puis facturer est appliqué à toutes
+les marges par diffusion NumPy. Les seuils qui font sauter les courbes sont
+repérés cellule par cellule :
+
+    tranche_2     heures au-delà de 43h (2e tranche d'heures supplémentaires)
+    plafond_ss    brut au-dessus du plafond de la sécurité sociale
+    rgdu_nulle    réduction générale annulée (brut au-delà de 3 SMIC)
+
+Une grille est gardée en cache par jeu de paramètres (et version du
+barème) : changer d'indicateur, de marge affichée ou zoomer ne la
+recalcule pas.
+"""
+
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+
+from cache_resultats import version_bareme
+from moteur_paie import ParametresSimulation, facturer
+from moteur_vectoriel import simuler_lot, COLONNES_ENTREE
+
+HEURES_SENSIBILITE = tuple(range(35, 49))
+TAILLE_CACHE_SENSIBILITE = 32
+
+# Indicateurs par marge (marges × taux bruts × heures)
+INDICATEURS_FACTURATION = {
+    'taux_fact_comptable': "Taux de facturation €/h",
+    'coeff_comptable': "Coefficient",
+    'ca_ht_comptable': "CA HT €",
+}
+# Indicateurs de paie (taux bruts × heures)
+INDICATEURS_PAIE = {
+    'cout_total_comptable': "Coût total €",
+    'brut_total': "Brut total €",
+    'rgdu': "RGDU €",
+}
+SEUILS = {
+    'tranche_2': "Au-delà de 43h",
+    'plafond_ss': "Plafond SS dépassé",
+    'rgdu_nulle': "RGDU nulle",
+}
+
+
+@dataclass(frozen=True)
+class GrilleSensibilite:
+    """Grille dense et immuable (partageable entre sessions)
+
+    `paie[nom]` et `seuils[nom]` : tableaux taux bruts × heures ;
+    `facturation[nom]` : marges × taux bruts × heures.
+    """
+    parametres: ParametresSimulation
+    heures: tuple
+    taux_bruts: tuple
+    marges: tuple
+    paie: MappingProxyType
+    facturation: MappingProxyType
+    seuils: MappingProxyType
+
+    def valeurs(self, indicateur, marge_pct=None):
+        """Tableau taux bruts × heures d'un indicateur (à la marge donnée s'il en dépend)"""
+        if indicateur in self.paie:
+            return self.paie[indicateur]
+        return self.facturation[indicateur][self.marges.index(marge_pct)]
+
+    def frontieres(self, seuil):
+        """Cellules où le seuil est franchi (valeur différente de la cellule précédente)"""
+        etat = self.seuils[seuil]
+        frontiere = np.zeros_like(etat)
+        frontiere[:, 1:] |= etat[:, 1:] != etat[:, :-1]
+        frontiere[1:, :] |= etat[1:, :] != etat[:-1, :]
+        return frontiere
+
+    def tableau(self, indicateur, marge_pct=None):
+        """DataFrame long (une ligne par cellule) avec les seuils franchis"""
+        import pandas as pd
+
+        t, h = np.meshgrid(np.arange(len(self.taux_bruts)), np.arange(len(self.heures)), indexing='ij')
+        table = {
+            'taux_brut': np.asarray(self.taux_bruts)[t.ravel()],
+            'heures': np.asarray(self.heures)[h.ravel()],
+            'valeur': self.valeurs(indicateur, marge_pct).ravel(),
+        }
+        for seuil in SEUILS:
+            table[seuil] = self.frontieres(seuil).ravel()
+        return pd.DataFrame(table)
+
+
+def _calculer(parametres, heures, taux_bruts, marges):
+    t, h = np.meshgrid(np.asarray(taux_bruts, dtype=np.float64), np.asarray(heures, dtype=np.float64),
+                       indexing='ij')
+    colonnes = {nom: getattr(parametres, nom) for nom in COLONNES_ENTREE}
+    colonnes.update(heures_semaine=h.ravel(), taux_brut=t.ravel())
+    forme = t.shape
+    r = simuler_lot(colonnes, t.size)
+    paie = {nom: r[nom].reshape(forme) for nom in INDICATEURS_PAIE}
+
+    # Marges en tête : (marges, 1, 1) diffusé sur (taux bruts, heures)
+    f = facturer(paie['cout_total_comptable'], r['cout_total_tresorerie'].reshape(forme),
+                 r['ca_refactu'].reshape(forme), h, t, np.asarray(marges, dtype=np.float64)[:, None, None])
+    facturation = {nom: getattr(f, nom) for nom in INDICATEURS_FACTURATION}
+
+    seuils = {
+        'tranche_2': r['h_sup_tranche2'].reshape(forme) > 0,
+        'plafond_ss': r['est_au_dessus_plafond'].reshape(forme),
+        'rgdu_nulle': r['rgdu'].reshape(forme) <= 0,
+    }
+    for tableau in (*paie.values(), *facturation.values(), *seuils.values()):
+        tableau.setflags(write=False)
+    return GrilleSensibilite(parametres, tuple(heures), tuple(taux_bruts), tuple(marges),
+                             MappingProxyType(paie), MappingProxyType(facturation), MappingProxyType(seuils))
+
+
+@lru_cache(maxsize=TAILLE_CACHE_SENSIBILITE)
+def _grille(version, parametres, heures, taux_bruts, marges):
+    return _calculer(parametres, heures, taux_bruts, marges)
+
+
+def grille_sensibilite(parametres, taux_bruts, marges, heures=HEURES_SENSIBILITE):
+    """Grille heures × taux brut × marge pour le scénario parametres (en cache)
+
+    Les heures et le taux brut de parametres sont remplacés par ceux de la
+    grille, sa marge par chacune de `marges` (ils ne font donc pas partie de
+    la clé du cache).
+    """
+    parametres = replace(parametres, **{nom: COLONNES_ENTREE[nom] for nom in ('heures_semaine', 'taux_brut',
+                                                                              'marge_pct')})
+    return _grille(version_bareme(), parametres, tuple(heures),
+                   tuple(round(float(t), 2) for t in taux_bruts), tuple(round(float(m), 2) for m in marges))
+
+
+def plage(debut, fin, pas):
+    """Valeurs de debut à fin incluse, au pas donné (arrondies au centime)"""
+    return tuple(round(float(v), 2) for v in np.arange(debut, fin + pas / 2, pas))
@@ -7,87 +7,80 @@
 """
 
 import streamlit as st
-import math
-import base64
-import pandas as pd
-from pathlib import Path
+from dataclasses import replace
+from datetime import date
+
+from baremes import BAREMES, bareme_au
+from base_pd import index_pd_partage, recharger_index_pd, demarrer_surveillance, ZONES_CHANTIER, NIVEAUX
+from moteur_paie import ParametresSimulation, SimulationIncrementale, GRAPHE_PAIE
+from solveur import resoudre, CIBLES, STATUT_RESOLU, STATUT_BORNE_BASSE
+from grille_tarifaire import precalculer_grille
+from cache_resultats import CACHE_RESULTATS, version_pd
+from chrono_rerun import chrono_session, ETAPE_PAIE
+from habillage import afficher_habillage
+from metriques import METRIQUES, demarrer_export
+from affichage import (
+    saisie_mot_de_passe, marge_saisie, afficher_brut, afficher_net,
+    afficher_cotisations_salariales, afficher_charges_patronales, facturation, risque_heures_variables,
+    afficher_performance,
+)
+
+# Chronométrage du rerun : panneau ⏱️ affiché avec l'accès détails ou ?perf=1
+chrono = chrono_session(st.session_state)
+panneau_performance = "perf" in st.query_params or st.session_state.get("acces_details", False)
+chrono.demarrer(compter_envois=panneau_performance)
+# Métriques d'exploitation (ACTERIM_METRIQUES) et profil du rerun (ACTERIM_PROFILS)
+demarrer_export()
+profil = METRIQUES.profiler()
+# Rerun compté même s'il s'arrête avant la fin (st.rerun, exception) : souvent les plus lents
+chrono.a_la_cloture(lambda chrono: METRIQUES.enregistrer_rerun(chrono, profil))
 
 # ═══════════════════════════════════════════════════════════════════════════
 # CHARGEMENT DE LA BASE DE DONNÉES PETIT DÉPLACEMENT
 # ═══════════════════════════════════════════════════════════════════════════
 
-@st.cache_data
 def charger_base_donnees_pd():
-    """Charge les données Excel pour les Petits Déplacements"""
+    """Index PD partagé par toutes les sessions (chargé une fois par processus)"""
     try:
-        # Chemin du fichier Excel (même dossier que le script)
-        fichier_excel = Path(__file__).parent / "BASE_DE_DONNE_PD.xlsx"
-        
-        # Charger les 4 feuilles
-        df_taux = pd.read_excel(fichier_excel, sheet_name='Taux_Horaires')
-        df_transport = pd.read_excel(fichier_excel, sheet_name='Transport')
-        df_trajet = pd.read_excel(fichier_excel, sheet_name='Trajet_Brut')
-        df_repas = pd.read_excel(fichier_excel, sheet_name='Repas_Soumis')
-        
-        # Nettoyer : convertir Département en string et supprimer espaces
-        for df in [df_taux, df_transport, df_trajet, df_repas]:
-            df['Département'] = df['Département'].astype(str).str.strip()
-        
-        return df_taux, df_transport, df_trajet, df_repas
+        demarrer_surveillance()
+        index = index_pd_partage()
+        precalculer_grille()
+        return index
     except Exception as e:
         st.error(f"⚠️ Erreur chargement base PD : {e}")
-        return None, None, None, None
+        return None
 
 # Charger les données
-df_taux_horaires, df_transport_pd, df_trajet_brut_pd, df_repas_soumis_pd = charger_base_donnees_pd()
+with chrono.etape("charger_base_donnees_pd"):
+    index_pd = charger_base_donnees_pd()
 
 def lookup_taux_horaire(departement, niveau):
     """Récupère le taux horaire selon département et niveau"""
-    if df_taux_horaires is None or not departement:
+    if index_pd is None or not departement:
         return None
-    
-    ligne = df_taux_horaires[df_taux_horaires['Département'] == departement]
-    if ligne.empty:
-        return None
-    
-    return float(ligne[niveau].iloc[0])
+    with chrono.etape("Lookups base PD"):
+        return index_pd.taux_horaire(departement, niveau)
 
 def lookup_transport(departement, zone):
     """Récupère l'indemnité transport selon département et zone"""
-    if df_transport_pd is None or not departement:
-        return None
-    
-    ligne = df_transport_pd[df_transport_pd['Département'] == departement]
-    if ligne.empty:
+    if index_pd is None or not departement:
         return None
-    
-    # Convertir "Zone IA - 0 km à 4 km" en "Zone_IA"
-    zone_col = "Zone_" + zone.split(" ")[1]  # Extrait "IA", "IB", etc.
-    return float(ligne[zone_col].iloc[0])
+    with chrono.etape("Lookups base PD"):
+        return index_pd.transport_zone(departement, zone)
 
 def lookup_trajet_brut(departement, zone):
     """Récupère la prime trajet brut selon département et zone"""
-    if df_trajet_brut_pd is None or not departement:
-        return None
-    
-    ligne = df_trajet_brut_pd[df_trajet_brut_pd['Département'] == departement]
-    if ligne.empty:
+    if index_pd is None or not departement:
         return None
-    
-    # Convertir "Zone IA - 0 km à 4 km" en "Zone_IA"
-    zone_col = "Zone_" + zone.split(" ")[1]  # Extrait "IA", "IB", etc.
-    return float(ligne[zone_col].iloc[0])
+    with chrono.etape("Lookups base PD"):
+        return index_pd.trajet_zone(departement, zone)
 
 def lookup_repas_soumis(departement):
     """Récupère le panier repas soumis selon département"""
-    if df_repas_soumis_pd is None or not departement:
-        return None
-    
-    ligne = df_repas_soumis_pd[df_repas_soumis_pd['Département'] == departement]
-    if ligne.empty:
+    if index_pd is None or not departement:
         return None
-    
-    return float(ligne['Panier soumis'].iloc[0])
+    with chrono.etape("Lookups base PD"):
+        return index_pd.repas_soumis(departement)
 
 # Configuration de la page
 st.set_page_config(
@@ -97,224 +90,17 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Fonction pour charger le logo en base64
-def get_logo_base64():
-    try:
-        logo_path = Path("logo_acterim.png")
-        if logo_path.exists():
-            with open(logo_path, "rb") as f:
-                return base64.b64encode(f.read()).decode()
-    except:
-        return None
+# CSS, police et logo ACTÉRIM (servis en statique, voir habillage.py)
+with chrono.etape("CSS / logo"):
+    afficher_habillage()
 
-logo_b64 = get_logo_base64()
+# Barème en vigueur à la date de la mission (choisie dans la sidebar)
+bandeau_bareme = st.empty()
 
-# CSS personnalisé ACTÉRIM V2 avec couleurs turquoise
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
-    
-    * {
-        font-family: 'Inter', sans-serif;
-    }
-    
-    /* Fond général moins blanc */
-    .main {
-        background-color: #F5F7FA;
-    }
-    
-    /* Header ACTÉRIM avec logo */
-    .acterim-header {
-        background: linear-gradient(135deg, #202E3B 0%, #2a3f4f 100%);
-        padding: 10px 20px;
-        border-radius: 10px;
-        margin-bottom: 20px;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-    }
-    
-    .acterim-logo-img {
-        max-height: 50px;
-        width: auto;
-    }
-    
-    /* Titres */
-    h1, h2, h3 {
-        color: #202E3B !important;
-    }
-    
-    h2 {
-        border-left: 4px solid #49c7cb;
-        padding-left: 15px;
-        margin-top: 30px !important;
-        background: linear-gradient(90deg, #e6f9fa 0%, transparent 100%);
-        padding: 10px 15px;
-        border-radius: 5px;
-    }
-    
-    /* Métriques - SANS flèches ni croix */
-    [data-testid="stMetricValue"] {
-        color: #202E3B !important;
-        font-weight: 700 !important;
-    }
-    
-    [data-testid="stMetricDelta"] {
-        display: none !important;
-    }
-    
-    [data-testid="stMetricLabel"] {
-        color: #5a6c7d !important;
-        font-weight: 600 !important;
-    }
-    
-    /* Sliders avec couleurs turquoise */
-    .stSlider > div > div > div > div {
-        background-color: #49c7cb !important;
-    }
-    
-    /* Expanders avec turquoise */
-    .streamlit-expanderHeader {
-        background: linear-gradient(90deg, #e6f9fa 0%, #f0fafb 100%);
-        border-left: 4px solid #00a99f;
-        font-weight: 600;
-        color: #202E3B !important;
-    }
-    
-    /* Sidebar fond clair */
-    section[data-testid="stSidebar"] {
-        background-color: #FAFBFC;
-    }
-    
-    section[data-testid="stSidebar"] h2, 
-    section[data-testid="stSidebar"] h3 {
-        color: #202E3B !important;
-        font-weight: 600 !important;
-        border-left: 3px solid #49c7cb;
-        padding-left: 10px;
-    }
-    
-    /* Labels dans la sidebar */
-    section[data-testid="stSidebar"] label {
-        color: #202E3B !important;
-        font-weight: 500 !important;
-    }
-    
-    section[data-testid="stSidebar"] .stMarkdown {
-        color: #202E3B !important;
-    }
-    
-    /* Checkboxes dans la sidebar */
-    section[data-testid="stSidebar"] [data-testid="stCheckbox"] label {
-        color: #202E3B !important;
-    }
-    
-    /* Input text dans la sidebar */
-    section[data-testid="stSidebar"] input {
-        color: #202E3B !important;
-    }
-    
-    /* Badges turquoise */
-    .badge {
-        display: inline-block;
-        padding: 8px 20px;
-        border-radius: 25px;
-        font-weight: 600;
-        font-size: 14px;
-        margin-bottom: 15px;
-    }
-    
-    .badge-comptable {
-        background: linear-gradient(135deg, #00a99f 0%, #49c7cb 100%);
-        color: white;
-    }
-    
-    .badge-tresorerie {
-        background: linear-gradient(135deg, #F05534 0%, #ff6b4a 100%);
-        color: white;
-    }
-    
-    /* Cards */
-    .result-card {
-        background: white;
-        border: 2px solid #e0e0e0;
-        border-radius: 10px;
-        padding: 20px;
-        margin: 10px 0;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-    }
-    
-    /* Info boxes turquoise */
-    .stAlert {
-        background: linear-gradient(135deg, #e6f9fa 0%, #f0fafb 100%);
-        border-left: 4px solid #00a99f;
-    }
-    
-    /* Formules de calcul */
-    .formula-box {
-        background: #f8f9fa;
-        border-left: 3px solid #49c7cb;
-        padding: 10px 15px;
-        margin: 10px 0;
-        border-radius: 5px;
-        font-family: 'Courier New', monospace;
-        font-size: 13px;
-        color: #202E3B;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Header avec logo ACTÉRIM
-if logo_b64:
-    st.markdown(f"""
-    <div class="acterim-header">
-        <img src="data:image/png;base64,{logo_b64}" class="acterim-logo-img" alt="ACTÉRIM Logo">
-    </div>
-    """, unsafe_allow_html=True)
-else:
-    st.markdown("""
-    <div class="acterim-header">
-        <div style="color: white; font-size: 36px; font-weight: 700;">Actérim - Simulateur Paie BTP</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-st.markdown("**Barème 2026** : SMIC 12.02€/h • Découché 51.60€ • Repas GD 21.40€ • Repas PD 10.40€ • PMSS 4005€")
-
-# Mot de passe pour accès détails
+# Mot de passe pour accès détails (fragment : la saisie ne relance pas la page)
 st.markdown("---")
-mot_de_passe = st.text_input("🔒 Mot de passe (pour détails)", type="password", help="Saisissez le mot de passe pour accéder aux détails des calculs")
-acces_details = (mot_de_passe == "acterim")
-
-# ═══════════════════════════════════════════════════════════════════════════
-# FONCTION CALCUL RGDU
-# ═══════════════════════════════════════════════════════════════════════════
-
-def calculer_rgdu(brut_total, heures_travaillees, smic_horaire=12.02):
-    """Calcule la Réduction Générale Des Cotisations patronales (RGDU)"""
-    T_MIN = 0.0200
-    T_MAX = 0.3981
-    T_DELTA = 0.3781
-    COEFF_PUISSANCE = 1.75
-    
-    trois_smic = 3 * smic_horaire * heures_travaillees
-    
-    if brut_total == 0:
-        return 0, 0, 0, trois_smic
-    
-    step1 = trois_smic / brut_total
-    step2 = step1 - 1
-    step3 = step2 / 2
-    step4 = math.pow(step3, COEFF_PUISSANCE)
-    step5 = step4 * T_DELTA
-    coeff = step5 + T_MIN
-    
-    coeff_max = min(coeff, T_MAX)
-    
-    rgdu_avant = coeff_max * brut_total
-    rgdu_apres = rgdu_avant * 1.1
-    
-    return rgdu_avant, rgdu_apres, coeff_max, trois_smic
+saisie_mot_de_passe()
+acces_details = st.session_state["acces_details"]
 
 # ═══════════════════════════════════════════════════════════════════════════
 # SIDEBAR - PARAMÈTRES RÉORGANISÉS
@@ -323,6 +109,14 @@ def calculer_rgdu(brut_total, heures_travaillees, smic_horaire=12.02):
 st.sidebar.header("⚙️ Paramètres")
 
 with st.sidebar:
+    # Date de la mission : choisit le barème (SMIC, PMSS, indemnités, cotisations)
+    date_mission = st.date_input("📅 Date de la mission", value=date.today(),
+                                 min_value=BAREMES[0].date_effet, format="DD/MM/YYYY")
+    bareme = bareme_au(date_mission)
+    bandeau_bareme.markdown(f"**{bareme.libelle}** : SMIC {bareme.smic_horaire:.2f}€/h • "
+                            f"Découché {bareme.indemnite_decouche:.2f}€ • Repas GD {bareme.indemnite_repas:.2f}€ • "
+                            f"Repas PD {bareme.indemnite_repas_pd:.2f}€ • PMSS {bareme.pmss:g}€")
+
     # 1. TYPE DE DÉPLACEMENT (TOUT EN HAUT)
     st.subheader("🚗 Type de Déplacement")
     type_deplacement = st.radio(
@@ -367,10 +161,21 @@ with st.sidebar:
             help="0.5€/h ou 1.5€/h selon le cas"
         )
         reduction_hs_patronale_euro = reduction_hs_choix
+
+        taux_pas = st.number_input("Taux PAS individualisé (%)", 0.0, 60.0, value=None, step=0.1,
+                                   placeholder="Grille du taux neutre",
+                                   help="Taux transmis par l'administration ; vide = grille du taux neutre")
+        contrat_court = st.checkbox("Contrat de 2 mois au plus (abattement PAS)", value=True,
+                                    help="Abattement de 50 % du SMIC mensuel sur la base du taux neutre")
+        arrondi_centime = st.checkbox("Bulletin au centime", value=False,
+                                      help="Chaque ligne arrondie au centime comme sur la fiche de paie")
     else:
         repas_auto = False
         taux_accident = 0.03
         reduction_hs_patronale_euro = 1.5
+        taux_pas = None
+        contrat_court = True
+        arrondi_centime = False
     
     # 3. PARAMÈTRES DÉPLACEMENT (si Petit Déplacement)
     if petit_deplacement:
@@ -382,22 +187,17 @@ with st.sidebar:
         
         zone_chantier = st.selectbox(
             "Zone Chantier",
-            options=["Zone IA - 0 km à 4 km", 
-                    "Zone IB - 4 km à 10km",
-                    "Zone II - 10 km à 20 km",
-                    "Zone III - 20 km à 30 km",
-                    "Zone IV - 30 km à 40 km",
-                    "Zone V - 40 à 50 km"]
+            options=ZONES_CHANTIER
         )
         
         niveau = st.selectbox(
             "Niveau",
-            options=["N1P1", "N1P2", "N2", "N3P1", "N3P2", "N4P1", "N4P2"]
+            options=NIVEAUX
         )
     else:
         departement = ""
-        zone_chantier = "Zone IA - 0 km à 4 km"
-        niveau = "N1P1"
+        zone_chantier = ZONES_CHANTIER[0]
+        niveau = NIVEAUX[0]
     
     # 4. TEMPS DE TRAVAIL
     st.markdown("---")
@@ -420,12 +220,12 @@ with st.sidebar:
                                         help=f"Minimum conventionnel : {taux_brut_auto:.2f}€/h")
         else:
             st.warning(f"⚠️ Département {departement} introuvable, saisie manuelle")
-            taux_brut = st.number_input("Taux Horaire Brut (€/h)", min_value=12.02, max_value=25.0,
-                                        value=12.02, step=0.01, format="%.2f")
+            taux_brut = st.number_input("Taux Horaire Brut (€/h)", min_value=bareme.smic_horaire, max_value=25.0,
+                                        value=bareme.smic_horaire, step=0.01, format="%.2f")
     else:
-        taux_brut = st.number_input("Taux Horaire Brut (€/h)", min_value=12.02, max_value=25.0,
-                                    value=12.02, step=0.01, format="%.2f",
-                                    help="Minimum = SMIC 12.02€/h")
+        taux_brut = st.number_input("Taux Horaire Brut (€/h)", min_value=bareme.smic_horaire, max_value=25.0,
+                                    value=bareme.smic_horaire, step=0.01, format="%.2f",
+                                    help=f"Minimum = SMIC {bareme.smic_horaire:.2f}€/h")
     
     taux_net = st.slider("Net €/h promis", 8.0, 20.0, 14.0, 0.5)
     prime_brute = st.number_input("Prime Brute Hebdomadaire (€)", 0.0, 10000.0, 0.0, 10.0)
@@ -523,9 +323,9 @@ with st.sidebar:
     if petit_deplacement:
         st.subheader("🚶 Indemnités PD")
         
-        st.write("**Repas (10.40€/jour fixe)**")
+        st.write(f"**Repas ({bareme.indemnite_repas_pd:.2f}€/jour fixe)**")
         nb_repas_pd = st.number_input("Quantité", 0, 7, 0, 1, key="nb_repas_pd")
-        taux_repas_pd = 10.40
+        taux_repas_pd = bareme.indemnite_repas_pd
         
         # Transport AUTOMATIQUE
         st.write("**Transport (automatique)**")
@@ -551,7 +351,7 @@ with st.sidebar:
                 taux_transport_pd = st.number_input("€/jour", 0.0, 100.0, 0.0, 1.0, key="taux_transport_pd")
     else:
         nb_repas_pd = 0
-        taux_repas_pd = 10.40
+        taux_repas_pd = bareme.indemnite_repas_pd
         nb_transport_pd = 0
         taux_transport_pd = 0.0
     
@@ -567,305 +367,118 @@ with st.sidebar:
     nb_refactu = st.number_input("Quantité à refacturer", 0.0, 100.0, 0.0, 1.0)
     taux_refactu = st.number_input("Taux unitaire refactu (€)", 0.0, 1000.0, 0.0, 10.0)
     
-    # 11. MARGE
+    # 11. CALCUL INVERSE
     st.markdown("---")
-    st.subheader("📊 Marge cible")
-    marge_pct = st.number_input("Marge %", min_value=0.0, max_value=100.0, value=17.0, step=0.01, format="%.2f")
+    st.subheader("🎯 Calcul inverse")
+    # Libellé -> (inconnue, cible, pas d'arrondi)
+    modes_inverse = {
+        "Désactivé": None,
+        "Taux brut pour le net promis": ('taux_brut', 'net', 0.01),
+        "Prime brute pour le net promis": ('prime_brute', 'net', 0.01),
+        "Repas pour le net promis": (('taux_repas_gd', 'net', 0.01) if grand_deplacement
+                                     else ('nb_repas_pd', 'net', 1)),
+        "Taux brut max pour un taux client": ('taux_brut', 'taux_fact_comptable', 0.01),
+    }
+    mode_inverse = st.selectbox("Trouver", options=list(modes_inverse),
+                                help="Calcule la valeur qui atteint le net promis sans régularisation, "
+                                     "ou le taux brut maximum pour un taux de facturation client")
+    taux_client_max = None
+    if modes_inverse[mode_inverse] and modes_inverse[mode_inverse][1] == 'taux_fact_comptable':
+        taux_client_max = st.number_input("Taux de facturation client max (€/h)", 0.0, 200.0, 30.0, 0.01,
+                                          format="%.2f")
+    zone_inverse = st.empty()
+
+    # 12. BASE PD (accès détails)
+    if acces_details:
+        st.markdown("---")
+        if st.button("🔄 Recharger la base PD", help="Relit BASE_DE_DONNE_PD.xlsx pour toutes les sessions"):
+            try:
+                recharger_index_pd()
+                chrono.clore()
+                st.rerun()
+            except Exception as e:
+                st.error(f"⚠️ Erreur rechargement base PD : {e}")
+        stats = CACHE_RESULTATS.statistiques()
+        st.caption(f"Cache résultats : {stats['taille']}/{stats['taille_max']} scénarios, "
+                   f"{stats['succes']} succès, {stats['echecs']} échecs, {stats['evictions']} évictions "
+                   f"({stats['taux_succes']:.0%} de succès)")
 
 # ═══════════════════════════════════════════════════════════════════════════
 # CALCULS DÉTAILLÉS
 # ═══════════════════════════════════════════════════════════════════════════
 
-# Variables
-h = heures_semaine
-brut_h = taux_brut
-net_h = taux_net
-prime = prime_brute
-jours = jours_travailles
-log = logement_hebdo
-cout_log_salarie = cout_logement_salarie
-marge = marge_pct / 100
-attest_fisc = attestation_fiscale
-nb_refact = nb_refactu
-taux_refact = taux_refactu
-
-# Variables selon type de déplacement
-if grand_deplacement:
-    # Indemnités GD (nettes)
-    total_repas = nb_repas_gd * taux_repas_gd
-    total_decouche = nb_decouches_gd * taux_decouche_gd
-    # Primes brutes PD = 0
-    total_prime_repas_brut = 0.0
-    total_prime_trajet_brut = 0.0
-    # Indemnités PD = 0
-    total_repas_pd = 0.0
-    total_transport_pd = 0.0
-else:  # petit_deplacement
-    # Indemnités GD = 0
-    total_repas = 0.0
-    total_decouche = 0.0
-    # Primes brutes PD (alimentent le brut)
-    total_prime_repas_brut = nb_prime_repas * taux_prime_repas
-    total_prime_trajet_brut = nb_prime_trajet * taux_prime_trajet
-    # Indemnités PD (nettes)
-    total_repas_pd = nb_repas_pd * taux_repas_pd
-    total_transport_pd = nb_transport_pd * taux_transport_pd
-
-# 1. BRUT TOTAL AVEC DOUBLE MAJORATION ET PRIMES BRUTES
-h_normales = 35
-h_sup_tranche1 = 0  # 36-43h à majo_sup_1%
-h_sup_tranche2 = 0  # 44h+ à majo_sup_2%
+parametres = ParametresSimulation(
+    grand_deplacement=grand_deplacement,
+    payer_ifm=payer_ifm,
+    payer_iccp=payer_iccp,
+    attestation_fiscale=attestation_fiscale,
+    repas_auto=repas_auto,
+    taux_accident=taux_accident,
+    reduction_hs_patronale_euro=reduction_hs_patronale_euro,
+    heures_semaine=heures_semaine,
+    jours_travailles=jours_travailles,
+    heures_nuit=heures_nuit,
+    taux_brut=taux_brut,
+    taux_net=taux_net,
+    prime_brute=prime_brute,
+    nb_prime_repas=nb_prime_repas,
+    taux_prime_repas=taux_prime_repas,
+    nb_prime_trajet=nb_prime_trajet,
+    taux_prime_trajet=taux_prime_trajet,
+    majo_sup_1=majo_sup_1,
+    majo_sup_2=majo_sup_2,
+    majo_nuit=majo_nuit,
+    nb_repas_gd=nb_repas_gd,
+    taux_repas_gd=taux_repas_gd,
+    nb_decouches_gd=nb_decouches_gd,
+    taux_decouche_gd=taux_decouche_gd,
+    nb_repas_pd=nb_repas_pd,
+    taux_repas_pd=taux_repas_pd,
+    nb_transport_pd=nb_transport_pd,
+    taux_transport_pd=taux_transport_pd,
+    logement_hebdo=logement_hebdo,
+    cout_logement_salarie=cout_logement_salarie,
+    nb_refactu=nb_refactu,
+    taux_refactu=taux_refactu,
+    marge_pct=marge_saisie(),
+    taux_pas=taux_pas,
+    contrat_court=contrat_court,
+    arrondi_centime=arrondi_centime,
+    date_effet=date_mission,
+)
 
-if h > 35:
-    if h <= 43:
-        h_sup_tranche1 = h - 35
+# Calcul inverse : l'inconnue remplace la saisie de la sidebar
+if modes_inverse[mode_inverse]:
+    inconnue, cible, pas = modes_inverse[mode_inverse]
+    bornes = None
+    if inconnue == 'taux_brut':
+        taux_brut_min = lookup_taux_horaire(departement, niveau) if petit_deplacement and departement else None
+        bornes = (taux_brut_min or bareme.smic_horaire, 200.0)
+    elif inconnue == 'taux_repas_gd' and nb_repas_gd == 0:
+        parametres = replace(parametres, nb_repas_gd=jours_travailles)
+    with chrono.etape("Calcul inverse (solveur)"):
+        solution = resoudre(parametres, inconnue, cible, taux_client_max, bornes, pas)
+    parametres = solution.parametres
+    valeur = f"{solution.valeur:.0f} repas" if inconnue == 'nb_repas_pd' else f"{solution.valeur:.2f} €"
+    if solution.statut == STATUT_RESOLU:
+        zone_inverse.success(f"🎯 {mode_inverse} : **{valeur}**")
+    elif solution.statut == STATUT_BORNE_BASSE:
+        zone_inverse.info(f"🎯 Cible déjà atteinte au minimum : **{valeur}**")
     else:
-        h_sup_tranche1 = 8  # Max 8h pour la tranche 1
-        h_sup_tranche2 = h - 43
-
-brut_normales = h_normales * brut_h
-brut_sup_t1 = h_sup_tranche1 * brut_h * (1 + majo_sup_1 / 100)
-brut_sup_t2 = h_sup_tranche2 * brut_h * (1 + majo_sup_2 / 100)
-brut_sup_total = brut_sup_t1 + brut_sup_t2
-
-brut_base = brut_normales + brut_sup_total
-
-# Majoration heures de nuit (jamais cumulée avec HS, s'ajoute comme une prime)
-majo_nuit_montant = heures_nuit * brut_h * (majo_nuit / 100)
-
-# Ajout primes (hebdo + primes brutes PD + majoration nuit)
-brut_avant_ifm = brut_base + prime + total_prime_repas_brut + total_prime_trajet_brut + majo_nuit_montant
-ifm = brut_avant_ifm * 0.10 if payer_ifm else 0.0
-brut_majoré = brut_avant_ifm + ifm
-iccp = brut_majoré * 0.10 if payer_iccp else 0.0
-brut_total = brut_avant_ifm + ifm + iccp
-
-# 3. CALCUL DU PLAFOND SÉCURITÉ SOCIALE
-plafond_ss = (4005 / 30) * jours
-tranche_a = min(brut_total, plafond_ss)
-tranche_b = max(0, brut_total - plafond_ss)
-est_au_dessus_plafond = brut_total > plafond_ss
-
-# 4. COTISATIONS SALARIALES DÉTAILLÉES
-part_patron_mutuelle = h_normales * 0.0874
-part_patron_prevoyance = brut_total * 0.00449
-
-# CSG sur heures sup (9.7%)
-base_hs_csg = brut_sup_total * 0.9825
-csg_hs = base_hs_csg * 0.097 if not attest_fisc else 0.0
-
-# CSG 2.9% et 6.8% (base = brut HORS HS × 0.9825 + part patronale)
-base_avant_abattement = brut_total - brut_sup_total
-base_csg_abattue = base_avant_abattement * 0.9825
-base_csg = base_csg_abattue + part_patron_mutuelle + part_patron_prevoyance
-
-csg_deduct = base_csg * 0.068 if not attest_fisc else 0.0
-csg_non_deduct = base_csg * 0.029 if not attest_fisc else 0.0
-
-# Maladie
-maladie = brut_total * 0.055 if attest_fisc else 0.0
-
-# Cotisations avec logique Tranche A/B
-if est_au_dessus_plafond:
-    # TRANCHE A (limitée au plafond)
-    ss_plaf = tranche_a * 0.069
-    comp_incap_t1 = tranche_a * 0.004
-    comp_t1 = tranche_a * 0.0401
-    
-    # TRANCHE B (au-dessus du plafond) - Nouvelles cotisations
-    comp_incap_t2 = tranche_b * 0.00335
-    comp_t2 = tranche_b * 0.0972
-    cet = brut_total * 0.0014
-else:
-    # Brut sous le plafond - calcul normal
-    ss_plaf = brut_total * 0.069
-    comp_incap_t1 = brut_total * 0.004
-    comp_t1 = brut_total * 0.0401
-    
-    # Pas de tranche B
-    comp_incap_t2 = 0.0
-    comp_t2 = 0.0
-    cet = 0.0
-
-# Cotisations communes (toujours sur brut total)
-ss_deplaf = brut_total * 0.004
-comp_sante = h_normales * 0.0874
-reduction_hs = brut_sup_total * 0.1131
-
-# TOTAL COTISATIONS SALARIALES
-cotis_salar = (maladie + ss_plaf + ss_deplaf + comp_incap_t1 + comp_t1 + 
-               comp_sante + csg_deduct + csg_non_deduct + csg_hs + 
-               comp_incap_t2 + comp_t2 + cet) - reduction_hs
-
-# 5. NET IMPOSABLE ET RETENUE À LA SOURCE
-if attest_fisc:
-    net_imposable = brut_total - cotis_salar - brut_sup_total + part_patron_mutuelle
-else:
-    # Réintégrer les CSG non déductibles (HS + 2.9%)
-    net_imposable = brut_total - cotis_salar + part_patron_mutuelle + csg_hs + csg_non_deduct - brut_sup_total
-
-base_pas = (net_imposable * 0.9) - (55 * jours)
-retenue_source = max(0, base_pas * 0.12)
-
-# 6. NET AVANT RÉGULARISATION et REPAS AUTO
-net_avant_regul = brut_total - cotis_salar - retenue_source + total_repas + total_decouche + total_repas_pd + total_transport_pd - cout_log_salarie
-net_cible = net_h * h
-regul_initiale = max(0, net_cible - net_avant_regul)
-
-# REPAS AUTOMATIQUES pour atteindre le net
-nb_repas_auto = 0
-montant_repas_auto = 0
-taux_repas_auto = 0
-
-if repas_auto and regul_initiale > 0:
-    # Plafond selon attestation fiscale
-    taux_max_repas = 21.40 if attest_fisc else 10.40
-    
-    # Nombre de repas = nombre de jours travaillés (toujours)
-    nb_repas_auto = int(jours)
-    
-    # Taux unitaire = montant nécessaire / nb de jours (plafonné au taux max)
-    taux_repas_auto = min(regul_initiale / nb_repas_auto, taux_max_repas)
-    montant_repas_auto = nb_repas_auto * taux_repas_auto
-    
-    # Recalcul avec les repas auto
-    total_repas_final = total_repas + montant_repas_auto
-    net_avant_regul_final = brut_total - cotis_salar - retenue_source + total_repas_final + total_decouche + total_repas_pd + total_transport_pd - cout_log_salarie
-    regul = max(0, net_cible - net_avant_regul_final)
-else:
-    total_repas_final = total_repas
-    net_avant_regul_final = net_avant_regul
-    regul = regul_initiale
-
-# 7. CHARGES PATRONALES avec Tranches A/B et détails
-charges_patron = {}
-
-# Cotisations communes (sur brut total)
-charges_patron['Secu-Maladie-Mat-Inv-Deces'] = {
-    'base': brut_total,
-    'taux': 0.13,
-    'montant': brut_total * 0.13
-}
-charges_patron['Complementaire sante'] = {
-    'base': h_normales,
-    'taux': 0.0874,
-    'montant': h_normales * 0.0874,
-    'unite': '€/h'
-}
-charges_patron['Accidents du travail'] = {
-    'base': brut_total,
-    'taux': taux_accident,
-    'montant': brut_total * taux_accident
-}
-charges_patron['Securite Sociale deplafonnee'] = {
-    'base': brut_total,
-    'taux': 0.0211,
-    'montant': brut_total * 0.0211
-}
-charges_patron['Famille-Securite Sociale'] = {
-    'base': brut_total,
-    'taux': 0.0525,
-    'montant': brut_total * 0.0525
-}
-charges_patron['Assurance chomage'] = {
-    'base': brut_total,
-    'taux': 0.0403,
-    'montant': brut_total * 0.0403
-}
-charges_patron['Autres contributions'] = {
-    'base': brut_total,
-    'taux': 0.03766,
-    'montant': brut_total * 0.03766
-}
-charges_patron['Cotisations statutaires'] = {
-    'base': brut_total,
-    'taux': 0.0015,
-    'montant': brut_total * 0.0015
-}
-
-# Cotisations avec logique Tranche A/B
-if est_au_dessus_plafond:
-    # TRANCHE A
-    charges_patron['Complementaire Incap-Inv-Deces T1'] = {
-        'base': tranche_a,
-        'taux': 0.00449,
-        'montant': tranche_a * 0.00449,
-        'tranche': 'A'
-    }
-    charges_patron['Securite Sociale plafonnee'] = {
-        'base': tranche_a,
-        'taux': 0.0855,
-        'montant': tranche_a * 0.0855,
-        'tranche': 'A'
-    }
-    charges_patron['Complementaire Tranche 1'] = {
-        'base': tranche_a,
-        'taux': 0.0601,
-        'montant': tranche_a * 0.0601,
-        'tranche': 'A'
-    }
-    
-    # TRANCHE B (nouvelles lignes)
-    charges_patron['Complementaire Incap-Inv-Deces T2'] = {
-        'base': tranche_b,
-        'taux': 0.00385,
-        'montant': tranche_b * 0.00385,
-        'tranche': 'B'
-    }
-    charges_patron['Complementaire Tranche 2'] = {
-        'base': tranche_b,
-        'taux': 0.1457,
-        'montant': tranche_b * 0.1457,
-        'tranche': 'B'
-    }
-    charges_patron['CET 1+2'] = {
-        'base': brut_total,
-        'taux': 0.0014,
-        'montant': brut_total * 0.0014,
-        'note': 'Si > plafond'
-    }
-else:
-    # Brut sous le plafond - calcul normal
-    charges_patron['Complementaire Incap-Inv-Deces T1'] = {
-        'base': brut_total,
-        'taux': 0.00449,
-        'montant': brut_total * 0.00449
-    }
-    charges_patron['Securite Sociale plafonnee'] = {
-        'base': brut_total,
-        'taux': 0.0855,
-        'montant': brut_total * 0.0855
-    }
-    charges_patron['Complementaire Tranche 1'] = {
-        'base': brut_total,
-        'taux': 0.0601,
-        'montant': brut_total * 0.0601
-    }
-
-cotis_patron_brutes = sum([v['montant'] for v in charges_patron.values()])
-reduction_patron_hs = (h_sup_tranche1 + h_sup_tranche2) * reduction_hs_patronale_euro
-
-# 8. CALCUL RGDU
-SMIC_LEGAL_2026 = 12.02
-rgdu_avant, rgdu, coeff, trois_smic = calculer_rgdu(brut_total, h, SMIC_LEGAL_2026)
-cotis_patron = cotis_patron_brutes - reduction_patron_hs - rgdu
-
-# 9. COÛT TOTAL ET FACTURATION
-cout_total_comptable = brut_total + cotis_patron + log + total_repas_final + total_decouche + total_repas_pd + total_transport_pd - cout_log_salarie
-cout_total_tresorerie = cout_total_comptable + regul
-
-ca_refactu = nb_refact * taux_refact
-
-# CA HT : marge sur le coût intérimaire uniquement, refacturation ajoutée en CA direct
-ca_ht_comptable = (cout_total_comptable / (1 - marge)) + ca_refactu
-taux_fact_comptable = ca_ht_comptable / h
-marge_euro_comptable = ca_ht_comptable - cout_total_comptable - ca_refactu
-coeff_comptable = taux_fact_comptable / brut_h
-
-ca_ht_tresorerie = (cout_total_tresorerie / (1 - marge)) + ca_refactu
-taux_fact_tresorerie = ca_ht_tresorerie / h
-marge_euro_tresorerie = ca_ht_tresorerie - cout_total_tresorerie - ca_refactu
-coeff_tresorerie = taux_fact_tresorerie / brut_h
+        zone_inverse.warning(f"⚠️ Cible hors d'atteinte, valeur limitée à **{valeur}**")
+
+# Cache partagé par les sessions (profils standards) ; en cas d'absence, graphe
+# mémorisé par session : seul l'aval des paramètres modifiés est recalculé
+if "simulation" not in st.session_state:
+    st.session_state["simulation"] = SimulationIncrementale()
+# Nœuds chronométrés (charges_patron, RGDU...) seulement pour le panneau de performance
+st.session_state["simulation"].calcul.durees = {} if panneau_performance else None
+with chrono.etape(ETAPE_PAIE):
+    r = CACHE_RESULTATS.simuler(parametres, version_pd(index_pd, departement) if petit_deplacement else None,
+                                st.session_state["simulation"].simuler)
+# La marge ne change que la facturation, sauf si la cible du calcul inverse en dépend
+marge_recalcule_paie = bool(modes_inverse[mode_inverse]) and \
+    'marge_pct' in GRAPHE_PAIE.entrees_de(CIBLES[modes_inverse[mode_inverse][1]][0])
 
 # ═══════════════════════════════════════════════════════════════════════════
 # AFFICHAGE DES RÉSULTATS DÉTAILLÉS
@@ -873,358 +486,19 @@ coeff_tresorerie = taux_fact_tresorerie / brut_h
 
 st.header("📊 Résultats du Calcul")
 
-# SALAIRE BRUT DÉTAILLÉ
-with st.expander("💵 SALAIRE BRUT (Détails et formules)", expanded=True):
-    st.markdown("### Décomposition des heures")
-    
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("Heures normales", f"{h_normales}h")
-        st.markdown(f'<div class="formula-box">{h_normales}h × {brut_h:.2f}€ = {brut_normales:.2f}€</div>', 
-                   unsafe_allow_html=True)
-    
-    with col2:
-        if h_sup_tranche1 > 0:
-            st.metric("Heures sup 36-43h", f"{h_sup_tranche1}h (+{majo_sup_1}%)")
-            st.markdown(f'<div class="formula-box">{h_sup_tranche1}h × {brut_h:.2f}€ × {1+majo_sup_1/100:.2f} = {brut_sup_t1:.2f}€</div>', 
-                       unsafe_allow_html=True)
-    
-    with col3:
-        if h_sup_tranche2 > 0:
-            st.metric("Heures sup 44h+", f"{h_sup_tranche2}h (+{majo_sup_2}%)")
-            st.markdown(f'<div class="formula-box">{h_sup_tranche2}h × {brut_h:.2f}€ × {1+majo_sup_2/100:.2f} = {brut_sup_t2:.2f}€</div>', 
-                       unsafe_allow_html=True)
-    
-    st.markdown("### Majorations")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        if prime > 0:
-            st.metric("Prime brute hebdo", f"{prime:.2f} €")
-    with col2:
-        if ifm > 0:
-            st.metric("IFM (10%)", f"{ifm:.2f} €")
-            st.markdown(f'<div class="formula-box">{brut_avant_ifm:.2f}€ × 0.10 = {ifm:.2f}€</div>',
-                       unsafe_allow_html=True)
-    with col3:
-        if iccp > 0:
-            st.metric("ICCP (10%)", f"{iccp:.2f} €")
-            st.markdown(f'<div class="formula-box">{brut_majoré:.2f}€ × 0.10 = {iccp:.2f}€</div>',
-                       unsafe_allow_html=True)
-
-    if majo_nuit_montant > 0:
-        st.markdown("### Majoration Heures de Nuit")
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("Heures de nuit", f"{heures_nuit}h (+{majo_nuit}%)")
-            st.markdown(f'<div class="formula-box">{heures_nuit}h × {brut_h:.2f}€ × {majo_nuit/100:.2f} = {majo_nuit_montant:.2f}€</div>',
-                       unsafe_allow_html=True)
-        with col2:
-            st.info("💡 Incluse dans la base IFM et CP")
-    
-    # Afficher les primes brutes PD si présentes
-    if total_prime_repas_brut > 0 or total_prime_trajet_brut > 0:
-        st.markdown("### Primes Brutes PD (soumises)")
-        col1, col2 = st.columns(2)
-        with col1:
-            if total_prime_repas_brut > 0:
-                st.metric("Prime Repas Brut", f"{total_prime_repas_brut:.2f} €")
-                st.markdown(f'<div class="formula-box">{nb_prime_repas} × {taux_prime_repas:.2f}€ = {total_prime_repas_brut:.2f}€</div>', 
-                           unsafe_allow_html=True)
-        with col2:
-            if total_prime_trajet_brut > 0:
-                st.metric("Prime Trajet Brut", f"{total_prime_trajet_brut:.2f} €")
-                st.markdown(f'<div class="formula-box">{nb_prime_trajet} × {taux_prime_trajet:.2f}€ = {total_prime_trajet_brut:.2f}€</div>', 
-                           unsafe_allow_html=True)
-    
-    st.markdown("---")
-    st.metric("**🎯 BRUT TOTAL IMPOSABLE**", f"**{brut_total:.2f} €**")
-
-# COTISATIONS SALARIALES ULTRA DÉTAILLÉES
-if acces_details:
-    with st.expander("📉 COTISATIONS SALARIALES (Détails et formules)"):
-    
-        # Afficher le plafond SS
-        st.info(f"💡 **Plafond Sécurité Sociale** : {plafond_ss:.2f} € (4005/30 × {jours} jours)")
-        if est_au_dessus_plafond:
-            st.warning(f"⚠️ **Brut > Plafond** → Tranches A ({tranche_a:.2f}€) et B ({tranche_b:.2f}€)")
-    
-        if attest_fisc:
-            st.info("✅ **Attestation fiscale cochée** : Cotisation maladie Non Résident 5.5% (pas de CSG/CRDS)")
-            st.write(f"**Maladie (5.5%)** : {maladie:.2f} €")
-            st.markdown(f'<div class="formula-box">Base : {brut_total:.2f}€ × 0.055 = {maladie:.2f}€</div>', 
-                       unsafe_allow_html=True)
-        else:
-            st.warning("❌ **Attestation fiscale décochée** : CSG/CRDS au lieu de maladie 5.5% Non Résident")
-            st.markdown("### CSG/CRDS Détaillée")
-        
-            st.write(f"**CSG NON DÉDUCTIBLE sur heures sup (9.7%)** : {csg_hs:.2f} €")
-            st.markdown(f'<div class="formula-box">Base HS : {brut_sup_total:.2f}€ × 98.25% = {base_hs_csg:.2f}€<br>CSG HS : {base_hs_csg:.2f}€ × 0.097 = {csg_hs:.2f}€</div>', 
-                       unsafe_allow_html=True)
-        
-            st.write(f"**CSG NON DÉDUCTIBLE (2.9%)** : {csg_non_deduct:.2f} €")
-            st.markdown(f'<div class="formula-box">Base avant abattement : {base_avant_abattement:.2f}€ (brut - HS)<br>Base abattue : {base_avant_abattement:.2f}€ × 98.25% = {base_csg_abattue:.2f}€<br>+ Part patronale mutuelle : {part_patron_mutuelle:.2f}€<br>+ Part patronale prévoyance : {part_patron_prevoyance:.2f}€<br>Base finale : {base_csg:.2f}€<br>CSG 2.9% : {base_csg:.2f}€ × 0.029 = {csg_non_deduct:.2f}€</div>', 
-                       unsafe_allow_html=True)
-        
-            st.write(f"**CSG DÉDUCTIBLE (6.8%)** : {csg_deduct:.2f} €")
-            st.markdown(f'<div class="formula-box">CSG 6.8% : {base_csg:.2f}€ × 0.068 = {csg_deduct:.2f}€<br>⚠️ Diminue le net imposable</div>', 
-                       unsafe_allow_html=True)
-    
-        st.markdown("### Cotisations sociales")
-    
-        if est_au_dessus_plafond:
-            st.markdown("**Tranche A (plafonnée) :**")
-            col1, col2 = st.columns(2)
-            with col1:
-                st.write(f"• SS plafonnée (6.9%) : {ss_plaf:.2f} €")
-                st.markdown(f'<div class="formula-box">Tranche A : {tranche_a:.2f}€ × 0.069 = {ss_plaf:.2f}€</div>', 
-                           unsafe_allow_html=True)
-                st.write(f"• Comp. Incap T1 (0.4%) : {comp_incap_t1:.2f} €")
-                st.markdown(f'<div class="formula-box">Tranche A : {tranche_a:.2f}€ × 0.004 = {comp_incap_t1:.2f}€</div>', 
-                           unsafe_allow_html=True)
-            with col2:
-                st.write(f"• Complémentaire T1 (4.01%) : {comp_t1:.2f} €")
-                st.markdown(f'<div class="formula-box">Tranche A : {tranche_a:.2f}€ × 0.0401 = {comp_t1:.2f}€</div>', 
-                           unsafe_allow_html=True)
-        
-            st.markdown("**Tranche B (déplafonnée) :**")
-            col1, col2 = st.columns(2)
-            with col1:
-                st.write(f"• Comp. Incap T2 (0.335%) : {comp_incap_t2:.2f} €")
-                st.markdown(f'<div class="formula-box">Tranche B : {tranche_b:.2f}€ × 0.00335 = {comp_incap_t2:.2f}€</div>', 
-                           unsafe_allow_html=True)
-            with col2:
-                st.write(f"• Complémentaire T2 (9.72%) : {comp_t2:.2f} €")
-                st.markdown(f'<div class="formula-box">Tranche B : {tranche_b:.2f}€ × 0.0972 = {comp_t2:.2f}€</div>', 
-                           unsafe_allow_html=True)
-        
-            st.write(f"• **CET 1+2 (0.14%)** : {cet:.2f} €")
-            st.markdown(f'<div class="formula-box">Brut total : {brut_total:.2f}€ × 0.0014 = {cet:.2f}€</div>', 
-                       unsafe_allow_html=True)
-        else:
-            col1, col2 = st.columns(2)
-            with col1:
-                st.write(f"• SS plafonnée (6.9%) : {ss_plaf:.2f} €")
-                st.markdown(f'<div class="formula-box">Base : {brut_total:.2f}€ × 0.069 = {ss_plaf:.2f}€</div>', 
-                           unsafe_allow_html=True)
-                st.write(f"• Comp. Incap T1 (0.4%) : {comp_incap_t1:.2f} €")
-                st.markdown(f'<div class="formula-box">Base : {brut_total:.2f}€ × 0.004 = {comp_incap_t1:.2f}€</div>', 
-                           unsafe_allow_html=True)
-            with col2:
-                st.write(f"• Complémentaire T1 (4.01%) : {comp_t1:.2f} €")
-                st.markdown(f'<div class="formula-box">Base : {brut_total:.2f}€ × 0.0401 = {comp_t1:.2f}€</div>', 
-                           unsafe_allow_html=True)
-    
-        st.markdown("**Cotisations communes :**")
-        col1, col2 = st.columns(2)
-        with col1:
-            st.write(f"• SS déplafonnée (0.4%) : {ss_deplaf:.2f} €")
-            st.write(f"• Complémentaire santé : {comp_sante:.2f} €")
-        with col2:
-            st.write(f"• ❌ Réduction HS (11.31%) : -{reduction_hs:.2f} €")
-    
-        st.markdown(f'<div class="formula-box">Réduction HS : {brut_sup_total:.2f}€ × 0.1131 = {reduction_hs:.2f}€</div>', 
-                   unsafe_allow_html=True)
-        
-        st.markdown("---")
-        st.metric("**TOTAL COTISATIONS SALARIALES**", f"**{cotis_salar:.2f} €**")
-else:
-    st.info("🔒 Saisissez le mot de passe pour accéder aux détails des cotisations salariales")
-
-# NET À PAYER DÉTAILLÉ
-with st.expander("💰 NET À PAYER (Détails et formules)", expanded=True):
-    st.markdown("### Calcul du net")
-    
-    # Afficher d'abord le détail du net fiscal
-    st.markdown("**Détail du NET FISCAL (Net imposable) :**")
-    if attest_fisc:
-        st.markdown(f"""
-        <div class="formula-box">
-        • Brut total : {brut_total:.2f} €<br>
-        • - Cotisations salariales : -{cotis_salar:.2f} €<br>
-        • - Heures sup : -{brut_sup_total:.2f} €<br>
-        • + Part patronale mutuelle : +{part_patron_mutuelle:.2f} €<br>
-        <strong>= NET FISCAL : {net_imposable:.2f} €</strong>
-        </div>
-        """, unsafe_allow_html=True)
-    else:
-        st.markdown(f"""
-        <div class="formula-box">
-        • Brut total : {brut_total:.2f} €<br>
-        • - Cotisations salariales : -{cotis_salar:.2f} €<br>
-        • + Part patronale mutuelle : +{part_patron_mutuelle:.2f} €<br>
-        • + CSG HS non déductible (réintégrée) : +{csg_hs:.2f} €<br>
-        • + CSG 2.9% non déductible (réintégrée) : +{csg_non_deduct:.2f} €<br>
-        • - Heures sup : -{brut_sup_total:.2f} €<br>
-        <strong>= NET FISCAL : {net_imposable:.2f} €</strong>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("**Calcul de la Retenue À la Source (RAS) :**")
-    st.markdown(f'<div class="formula-box">Base RAS : ({net_imposable:.2f}€ × 0.9) - (55 × {jours}) = {base_pas:.2f}€<br>Retenue : {base_pas:.2f}€ × 0.12 = {retenue_source:.2f}€</div>', 
-               unsafe_allow_html=True)
-    
-    st.markdown("---")
-    st.markdown("**Calcul du net à payer :**")
-    
-    col1, col2 = st.columns([2, 1])
-    with col1:
-        st.write(f"Brut total : **{brut_total:.2f} €**")
-        st.write(f"❌ Cotisations salariales : **-{cotis_salar:.2f} €**")
-        st.write(f"❌ Retenue à la source : **-{retenue_source:.2f} €**")
-        if total_repas > 0:
-            st.write(f"✅ Indemnités repas : **+{total_repas:.2f} €**")
-        if total_decouche > 0:
-            st.write(f"✅ Indemnités découchés : **+{total_decouche:.2f} €**")
-        if cout_log_salarie > 0:
-            st.write(f"❌ Participation salarié : **-{cout_log_salarie:.2f} €**")
-    
-    with col2:
-        pass
-    
-    st.markdown("---")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("Net avant régularisation", f"{net_avant_regul_final:.2f} €")
-    with col2:
-        st.metric("Net cible garanti", f"{net_cible:.2f} €", help=f"{net_h:.2f}€/h × {h}h")
-    with col3:
-        st.metric("**Régularisation / Avance**", f"**+{regul:.2f} €**")
-
-# CHARGES PATRONALES DÉTAILLÉES
+with chrono.etape("Section brut"):
+    afficher_brut(r, parametres)
+with chrono.etape("Section cotisations salariales"):
+    afficher_cotisations_salariales(r, parametres, acces_details)
+with chrono.etape("Section net"):
+    afficher_net(r, parametres)
+with chrono.etape("Section charges patronales"):
+    afficher_charges_patronales(r, parametres, acces_details)
+with chrono.etape("Section facturation"):
+    facturation(r, parametres, acces_details, marge_recalcule_paie)
 if acces_details:
-    with st.expander("🏢 CHARGES PATRONALES (Base + Taux + Montant)"):
-        st.markdown("### Charges patronales détaillées")
-    
-                # Afficher chaque charge avec base, taux et montant
-        for key, data in charges_patron.items():
-            if isinstance(data, dict):  # ← indenté d'un niveau par rapport au for
-                base = data['base']
-                taux = data['taux'] * 100
-                montant = data['montant']
-                
-                # Affichage avec note si tranche
-                note = ""
-                if 'tranche' in data:
-                    note = f" [{data['tranche']}]"
-                elif 'note' in data:
-                    note = f" ({data['note']})"
-                elif 'unite' in data:
-                    note = f" ({data['unite']})"
-                
-                st.write(f"**{key}{note}** : {montant:.2f} €")
-                st.markdown(f'<div class="formula-box">Base : {base:.2f}€ × {taux:.2f}% = {montant:.2f}€</div>', 
-                           unsafe_allow_html=True)
-    
-        st.markdown("---")
-        st.write(f"**Total brut** : {cotis_patron_brutes:.2f} €")
-    
-        st.markdown("### Réductions")
-        st.write(f"❌ Réduction HS patronale : -{reduction_patron_hs:.2f} €")
-        st.markdown(f'<div class="formula-box">{h_sup_tranche1 + h_sup_tranche2}h HS × {reduction_hs_patronale_euro:.2f}€ = {reduction_patron_hs:.2f}€</div>', 
-               unsafe_allow_html=True)
-    
-        st.write(f"❌ RGDU (après ×1.1) : -{rgdu:.2f} €")
-        st.markdown(f'<div class="formula-box">3 SMIC : 3 × {SMIC_LEGAL_2026}€ × {h}h = {trois_smic:.2f}€<br>Coefficient : {coeff:.4f} ({coeff*100:.2f}%)<br>RGDU avant ×1.1 : {rgdu_avant:.2f}€<br>RGDU après ×1.1 : {rgdu:.2f}€</div>', 
-                   unsafe_allow_html=True)
-        
-        st.markdown("---")
-        st.metric("**CHARGES PATRONALES NETTES**", f"**{cotis_patron:.2f} €**")
-else:
-        st.info("🔒 Saisissez le mot de passe pour accéder aux détails des charges patronales")
-
-    # FACTURATION CLIENT
-st.markdown("---")
-if acces_details:
-    with st.expander("💼 FACTURATION CLIENT", expanded=True):
-        # MODE PRINCIPAL (ex-comptable)
-        st.markdown('<div class="badge badge-comptable">💰 FACTURATION CLIENT</div>', unsafe_allow_html=True)
-
-        st.write("**Composition du coût intérimaire :**")
-        st.write(f"• Brut total : {brut_total:.2f} €")
-        st.write(f"• Charges patronales : {cotis_patron:.2f} €")
-        st.write(f"• Logement : {log:.2f} €")
-        st.write(f"• Indemnités repas (manuels) : {total_repas:.2f} €")
-        if repas_auto and nb_repas_auto > 0:
-            st.write(f"• 🍽️ Repas automatiques : {montant_repas_auto:.2f} € ({nb_repas_auto} × {taux_repas_auto:.2f}€)")
-        st.write(f"• Indemnités découchés : {total_decouche:.2f} €")
-        if total_repas_pd > 0:
-            st.write(f"• 🚶 Indemnités Repas PD : {total_repas_pd:.2f} €")
-        if total_transport_pd > 0:
-            st.write(f"• 🚶 Indemnités Transport PD : {total_transport_pd:.2f} €")
-        if cout_log_salarie > 0:
-            st.write(f"• ❌ Participation salarié : -{cout_log_salarie:.2f} €")
-
-        st.markdown("---")
-        st.metric("**Coût total intérimaire**", f"**{cout_total_comptable:.2f} €**")
-
-        st.write(f"Marge cible ({marge_pct:.2f}%) : {marge_euro_comptable:.2f} €")
-
-        st.markdown("---")
-        st.metric("**CA HT NÉCESSAIRE**", f"**{ca_ht_comptable:.2f} €**")
-        if ca_refactu > 0:
-            st.write(f"✅ dont refacturation : +{ca_refactu:.2f} € ({nb_refact:.1f} × {taux_refact:.2f}€)")
-        st.metric("**Taux facturation client**", f"**{taux_fact_comptable:.2f} €/h**")
-
-        # MODE TRÉSORERIE (caché dans expander)
-        if regul > 0 and not repas_auto:
-            with st.expander("💸 Facturation avec avance non récupérable"):
-                st.write("**Composition du coût :**")
-                st.write(f"• Coût total intérimaire : {cout_total_comptable:.2f} €")
-                st.write(f"• ✅ Avance non récupérable : +{regul:.2f} €")
-            
-                st.markdown("---")
-                st.metric("**Coût total avec avance**", f"**{cout_total_tresorerie:.2f} €**")
-
-                st.write(f"Marge cible ({marge_pct:.2f}%) : {marge_euro_tresorerie:.2f} €")
-
-                st.markdown("---")
-                st.metric("**CA HT NÉCESSAIRE**", f"**{ca_ht_tresorerie:.2f} €**")
-                if ca_refactu > 0:
-                    st.write(f"✅ dont refacturation : +{ca_refactu:.2f} €")
-                st.metric("**Taux facturation client**", f"**{taux_fact_tresorerie:.2f} €/h**")
-else:
-    st.info("🔒 Saisissez le mot de passe pour accéder aux détails de la facturation client")
-
-# RÉSUMÉ ET WARNINGS
-st.markdown("---")
-if acces_details:
-    with st.expander("📋 RÉSUMÉ", expanded=True):
-        # Infos générales
-        resume_text = f"""
-**Options payées :**
-- IFM : {"✅ Oui" if payer_ifm else "❌ Non"}
-- ICCP : {"✅ Oui" if payer_iccp else "❌ Non"}
-
-**Facturation :**
-- CA HT : {ca_ht_comptable:.2f} €{f" (dont refactu : {ca_refactu:.2f} €)" if ca_refactu > 0 else ""}
-- Marge : {marge_euro_comptable:.2f} € ({marge_pct:.2f}%)
-- Taux horaire : {taux_fact_comptable:.2f} €/h
-"""
-        st.info(resume_text)
-
-        # Warnings conditionnels
-        if repas_auto and nb_repas_auto > 0:
-            st.warning(f"""
-    ⚠️ **Repas automatiques activés**
-    
-    {nb_repas_auto} repas à {taux_repas_auto:.2f}€ ont été déclenchés pour vous permettre d'atteindre le net promis ({net_cible:.2f}€).
-    
-    Vous pouvez désactiver cette option dans les paramètres.
-    """)
-
-        if not repas_auto and regul > 0:
-            st.warning(f"""
-    ⚠️ **Avance nécessaire**
-    
-    Une avance de {regul:.2f}€ est nécessaire pour atteindre le net promis ({net_cible:.2f}€).
-    
-    Options :
-    - Activer les repas automatiques pour couvrir cette avance
-    - Consulter le mode "Facturation avec avance non récupérable" ci-dessus
-    """)
-else:
-    st.info("🔒 Saisissez le mot de passe pour accéder au résumé détaillé")
-
+    with chrono.etape("Section risque"):
+        risque_heures_variables(parametres)
 
 # Footer
 st.markdown("---")
@@ -1238,3 +512,7 @@ st.markdown("""
     </p>
 </div>
 """, unsafe_allow_html=True)
+
+chrono.clore()
+if panneau_performance:
+    afficher_performance(chrono, st.session_state["simulation"].calcul.durees)
@@ -0,0 +1,183 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Calcul inverse                                                 ║
+║   Taux brut, prime ou repas nécessaires pour un net ou un taux de facture  ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Chaque cible est une fonction croissante de l'inconnue, linéaire par morceaux
+pour le net (cassures au plafond SS, sauts aux tranches du taux neutre de la
+retenue à la source) et non linéaire pour la facturation (RGDU). La résolution applique le modèle
+linéaire local (un pas suffit sur un morceau linéaire), protégé par un
+encadrement [bas, haut] resserré à chaque itération : si le pas sort de
+l'encadrement, on prend la sécante des bornes, et si l'écart à la cible n'a
+pas diminué de moitié (saut de la fonction), une bissection. Tout est vectoriel : un scénario ou tout
+un lot.
+"""
+
+from dataclasses import dataclass, asdict, replace
+
+import numpy as np
+
+from baremes import valeurs_lot
+from moteur_vectoriel import simuler_lot, preparer_colonnes
+
+# Inconnue -> bornes de recherche par défaut (un nom : champ du barème en
+# vigueur à la date de chaque ligne)
+INCONNUES = {
+    'taux_brut': ('smic_horaire', 200.0),
+    'prime_brute': (0.0, 10_000.0),
+    'taux_repas_gd': (0.0, 'indemnite_repas'),
+    'nb_repas_gd': (0.0, 7.0),
+    'nb_repas_pd': (0.0, 7.0),
+}
+
+# Cible -> (sortie du moteur, sens)
+#   plancher : la sortie doit atteindre la valeur (net promis sans régularisation)
+#   plafond  : la sortie ne doit pas dépasser la valeur (taux maximum du client)
+CIBLES = {
+    'net': ('net_avant_regul_final', 'plancher'),
+    'taux_fact_comptable': ('taux_fact_comptable', 'plafond'),
+    'taux_fact_tresorerie': ('taux_fact_tresorerie', 'plafond'),
+}
+
+STATUT_RESOLU = 0
+STATUT_BORNE_BASSE = -1   # cible déjà dépassée à la borne basse
+STATUT_BORNE_HAUTE = 1    # cible hors d'atteinte à la borne haute
+
+TOLERANCE = 1e-7          # écart toléré sur la sortie (€ ou €/h)
+ITERATIONS_MAX = 60
+
+
+def _ecart(tableaux, consigne, sortie, inconnue, x, lignes):
+    """Sortie du moteur moins la consigne, pour les lignes données"""
+    colonnes = {nom: v[lignes] for nom, v in tableaux.items()}
+    colonnes[inconnue] = x
+    return simuler_lot(colonnes, len(lignes))[sortie] - consigne[lignes]
+
+
+def arrondir(x, sens, pas):
+    """Arrondit au pas du côté sûr : vers le haut pour un plancher, vers le bas pour un plafond"""
+    # L'arrondi préalable à 1e-9 absorbe les erreurs de représentation (1235.0000000001)
+    arrondi = np.ceil if sens == 'plancher' else np.floor
+    return np.round(arrondi(np.round(x / pas, 9)) * pas, 10)
+
+
+def _arrondir_sur(tableaux, consigne, sortie, sens, inconnue, solution, bas, haut, pas):
+    """Arrondit au pas puis avance d'un pas tant que la cible n'est pas respectée
+
+    La cible n'est pas strictement monotone (la CET s'ajoute d'un coup au
+    passage du plafond SS) : l'arrondi seul peut tomber du mauvais côté.
+    """
+    direction = 1 if sens == 'plancher' else -1
+    solution = np.clip(arrondir(solution, sens, pas), bas, haut)
+    lignes = np.arange(len(solution))
+    for _ in range(10):
+        ecart = _ecart(tableaux, consigne, sortie, inconnue, solution[lignes], lignes)
+        lignes = lignes[direction * ecart < -TOLERANCE]
+        if not len(lignes):
+            break
+        solution[lignes] = np.clip(solution[lignes] + direction * pas, bas[lignes], haut[lignes])
+    return solution
+
+
+def resoudre_lot(colonnes, inconnue, cible, valeur=None, n=None, bornes=None, pas=None):
+    """Trouve l'inconnue qui amène la cible à la valeur, ligne par ligne
+
+    colonnes : comme pour simuler_lot (la colonne de l'inconnue est ignorée)
+    cible    : 'net' (valeur en €/h, défaut : colonne taux_net) ou un taux
+               de facturation (valeur en €/h, obligatoire)
+    bornes   : (bas, haut), scalaires ou tableaux ; défaut INCONNUES[inconnue]
+    pas      : arrondi de la solution du côté sûr (0.01 pour un taux)
+
+    Renvoie {'valeur', 'statut', 'iterations'}. Hors encadrement, la valeur
+    est la borne atteinte et le statut STATUT_BORNE_BASSE / STATUT_BORNE_HAUTE.
+    Les repas automatiques sont désactivés : l'inconnue les remplace.
+    """
+    if inconnue not in INCONNUES:
+        raise KeyError(f"Inconnue non prise en charge : {inconnue}")
+    if cible not in CIBLES:
+        raise KeyError(f"Cible non prise en charge : {cible}")
+    sortie, sens = CIBLES[cible]
+
+    tableaux = preparer_colonnes({**colonnes, 'repas_auto': False}, n)
+    n = len(tableaux['taux_brut'])
+    if cible == 'net':
+        taux_net = tableaux['taux_net'] if valeur is None else valeur
+        consigne = np.broadcast_to(np.asarray(taux_net, dtype=np.float64) * tableaux['heures_semaine'], (n,))
+    elif valeur is None:
+        raise ValueError(f"Valeur obligatoire pour la cible {cible}")
+    else:
+        consigne = np.broadcast_to(np.asarray(valeur, dtype=np.float64), (n,))
+
+    bas, haut = (valeurs_lot(b, tableaux['date_effet']) if isinstance(b, str) else b
+                 for b in (INCONNUES[inconnue] if bornes is None else bornes))
+    bas = np.broadcast_to(np.asarray(bas, dtype=np.float64), (n,)).copy()
+    haut = np.broadcast_to(np.asarray(haut, dtype=np.float64), (n,)).copy()
+
+    toutes = np.arange(n)
+    f_bas = _ecart(tableaux, consigne, sortie, inconnue, bas, toutes)
+    f_haut = _ecart(tableaux, consigne, sortie, inconnue, haut, toutes)
+
+    statut = np.where(f_bas >= 0, STATUT_BORNE_BASSE,
+                      np.where(f_haut < 0, STATUT_BORNE_HAUTE, STATUT_RESOLU))
+    solution = np.where(statut == STATUT_BORNE_HAUTE, haut, bas)
+
+    # Lignes encadrées : f(bas) < 0 <= f(haut)
+    lignes = np.flatnonzero(statut == STATUT_RESOLU)
+    a, b, fa, fb = bas[lignes], haut[lignes], f_bas[lignes], f_haut[lignes]
+    x, fx = a.copy(), fa.copy()
+    bissection = np.zeros(len(lignes), dtype=bool)
+    iterations = 0
+
+    while len(lignes) and iterations < ITERATIONS_MAX:
+        iterations += 1
+        ecart_prec = np.abs(fx)
+
+        # Pente locale par différence finie, prise vers l'intérieur de l'encadrement
+        d = 1e-6 * np.maximum(1.0, np.abs(x))
+        d = np.where(x + d <= b, d, -d)
+        pente = (_ecart(tableaux, consigne, sortie, inconnue, x + d, lignes) - fx) / d
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = x - fx / pente
+            secante = a - fa * (b - a) / (fb - fa)
+        dans_encadrement = (pente > 0) & (newton > a) & (newton < b)
+        x = np.where(bissection, (a + b) / 2, np.where(dans_encadrement, newton, secante))
+        fx = _ecart(tableaux, consigne, sortie, inconnue, x, lignes)
+
+        negatif = fx < 0
+        a, fa = np.where(negatif, x, a), np.where(negatif, fx, fa)
+        b, fb = np.where(negatif, b, x), np.where(negatif, fb, fx)
+        bissection = np.abs(fx) > ecart_prec / 2
+
+        fini = (np.abs(fx) <= TOLERANCE) | (b - a <= 1e-8 * np.maximum(1.0, np.abs(x)))
+        # Sans racine exacte (saut du RGDU à 3 SMIC, de la CET au plafond SS),
+        # on retient la borne qui respecte la cible
+        sure = b if sens == 'plancher' else a
+        solution[lignes[fini]] = np.where(np.abs(fx[fini]) <= TOLERANCE, x[fini], sure[fini])
+        garde = ~fini
+        lignes, a, b, fa, fb, x, fx, bissection = (
+            lignes[garde], a[garde], b[garde], fa[garde], fb[garde], x[garde], fx[garde], bissection[garde])
+
+    solution[lignes] = b if sens == 'plancher' else a
+    if pas is not None:
+        solution = _arrondir_sur(tableaux, consigne, sortie, sens, inconnue, solution, bas, haut, pas)
+    return {'valeur': solution, 'statut': statut, 'iterations': iterations}
+
+
+@dataclass(frozen=True, slots=True)
+class SolutionInverse:
+    """Résultat d'un calcul inverse unitaire"""
+    valeur: float
+    statut: int
+    parametres: object   # ParametresSimulation avec l'inconnue renseignée
+
+    @property
+    def resolu(self):
+        return self.statut == STATUT_RESOLU
+
+
+def resoudre(p, inconnue, cible, valeur=None, bornes=None, pas=None):
+    """Calcul inverse pour un ParametresSimulation ; renvoie une SolutionInverse"""
+    lot = resoudre_lot(asdict(p), inconnue, cible, valeur, 1, bornes, pas)
+    x = float(lot['valeur'][0])
+    return SolutionInverse(x, int(lot['statut'][0]), replace(p, **{inconnue: x, 'repas_auto': False}))
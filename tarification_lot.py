@@ -0,0 +1,248 @@
+"""
+╔════════════════════════════════════════════════════════════════════════════╗
+║   ACTERIM - Tarification par lot en ligne de commande                      ║
+║   Missions (CSV / Excel) -> brut, net, charges, RGDU, coût, facturation    ║
+╚════════════════════════════════════════════════════════════════════════════╝
+
+Usage :
+    python tarification_lot.py missions.csv -o resultats.csv
+    python tarification_lot.py missions.xlsx -o resultats.xlsx --taille-bloc 50000
+    python tarification_lot.py missions.csv -o resultats.csv --processus 0   (tous les cœurs)
+
+Une ligne par intérimaire / semaine. Les colonnes reprennent les champs de la
+sidebar (noms de ParametresSimulation) plus `type_deplacement`, `departement`,
+`zone_chantier` et `niveau`. Une colonne absente ou une cellule vide prend la
+valeur par défaut de la sidebar (taux PD automatiques compris). La colonne
+`date_effet` (2026-01-05 ou 05/01/2026, aujourd'hui si vide) choisit le
+barème en vigueur pour chaque ligne.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from base_pd import index_pd_partage, completer_colonnes_pd, COLONNES_AUTO_PD, ZONES_CHANTIER, NIVEAUX
+from moteur_vectoriel import simuler_lot, COLONNES_ENTREE, COLONNES_BOOLEENNES, COLONNES_DATES
+from calcul_parallele import CalculParallele
+
+COLONNES_CLES = ['type_deplacement', 'departement', 'zone_chantier', 'niveau']
+
+# Résultats écrits pour chaque ligne (nom de colonne -> sortie du moteur)
+COLONNES_SORTIE = {
+    'brut_total': 'brut_total',
+    'net_avant_regul': 'net_avant_regul_final',
+    'regularisation': 'regul',
+    'charges_patronales_nettes': 'cotis_patron',
+    'rgdu': 'rgdu',
+    'cout_total': 'cout_total_comptable',
+    'ca_ht': 'ca_ht_comptable',
+    'taux_facturation': 'taux_fact_comptable',
+}
+
+VALEURS_VRAIES = {'1', 'true', 'vrai', 'oui', 'o', 'x', 'yes', 'y'}
+
+TAILLE_BLOC = 100_000
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LECTURE PAR BLOCS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def lire_blocs(chemin, taille_bloc=TAILLE_BLOC, sep=",", decimal=".", texte=COLONNES_CLES):
+    """Itère sur le fichier de missions par DataFrames d'au plus taille_bloc lignes
+
+    texte : colonnes lues comme du texte (codes département « 01 », matricules).
+    """
+    chemin = Path(chemin)
+    if chemin.suffix.lower() in (".xlsx", ".xlsm"):
+        yield from _lire_blocs_excel(chemin, taille_bloc)
+    else:
+        yield from pd.read_csv(chemin, sep=sep, decimal=decimal, chunksize=taille_bloc,
+                               dtype={c: str for c in texte})
+
+
+def _lire_blocs_excel(chemin, taille_bloc):
+    """Lecture en flux de la première feuille (openpyxl en mode lecture seule)"""
+    import openpyxl
+
+    classeur = openpyxl.load_workbook(chemin, read_only=True, data_only=True)
+    try:
+        lignes = classeur.worksheets[0].iter_rows(values_only=True)
+        entetes = [str(e).strip() for e in next(lignes)]
+        bloc = []
+        for ligne in lignes:
+            bloc.append(ligne)
+            if len(bloc) == taille_bloc:
+                yield pd.DataFrame(bloc, columns=entetes)
+                bloc = []
+        if bloc:
+            yield pd.DataFrame(bloc, columns=entetes)
+    finally:
+        classeur.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TARIFICATION D'UN BLOC
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _booleen(serie):
+    return serie.astype(str).str.strip().str.lower().isin(VALEURS_VRAIES).to_numpy()
+
+
+def _dates(serie):
+    # Dates ISO (2026-01-05) ou françaises (05/01/2026) ; vides ou illisibles -> NaT (aujourd'hui)
+    dates = pd.to_datetime(serie, errors='coerce', format='ISO8601')
+    francaises = pd.to_datetime(serie, errors='coerce', format='%d/%m/%Y')
+    return dates.fillna(francaises).to_numpy('datetime64[D]')
+
+
+def colonnes_depuis_bloc(df):
+    """Convertit un bloc de missions en colonnes pour completer_colonnes_pd"""
+    colonnes = {}
+    for nom in df.columns:
+        if nom in COLONNES_BOOLEENNES:
+            # Cellule vide -> valeur par défaut de la sidebar
+            defaut = COLONNES_ENTREE[nom]
+            vide = df[nom].isna().to_numpy()
+            colonnes[nom] = np.where(vide, defaut, _booleen(df[nom]))
+        elif nom in COLONNES_DATES:
+            colonnes[nom] = _dates(df[nom])
+        elif nom in COLONNES_ENTREE:
+            valeurs = pd.to_numeric(df[nom], errors='coerce').to_numpy(dtype=np.float64)
+            # Les taux PD et quantités vides restent NaN : completer_colonnes_pd les résout
+            if nom not in COLONNES_AUTO_PD:
+                valeurs = np.where(np.isnan(valeurs), COLONNES_ENTREE[nom], valeurs)
+            colonnes[nom] = valeurs
+
+    if 'type_deplacement' in df.columns:
+        colonnes['grand_deplacement'] = ~df['type_deplacement'].fillna("G").astype(str).str.strip().str.upper().str.startswith("P").to_numpy()
+    # Zone et niveau vides : valeurs par défaut de la sidebar
+    for nom, defaut in (('departement', ""), ('zone_chantier', ZONES_CHANTIER[0]), ('niveau', NIVEAUX[0])):
+        if nom in df.columns:
+            colonnes[nom] = df[nom].fillna(defaut).astype(str).to_numpy(dtype=object)
+    return colonnes
+
+
+def tarifer_bloc(df, index, calcul=None):
+    """Tarife un bloc de missions ; renvoie les colonnes d'entrée suivies des résultats
+
+    `calcul` (CalculParallele) répartit le bloc sur plusieurs processus.
+    """
+    colonnes = colonnes_depuis_bloc(df)
+    n = len(df)
+    if 'departement' not in colonnes:
+        colonnes['departement'] = np.full(n, "", dtype=object)
+    colonnes = completer_colonnes_pd(colonnes, index, n)
+    if calcul is None:
+        resultats = simuler_lot(colonnes, n)
+    else:
+        resultats = calcul.simuler_lot(colonnes, n, sorties=COLONNES_SORTIE.values())
+    sortie = df.copy()
+    for nom, cle in COLONNES_SORTIE.items():
+        sortie[nom] = np.round(resultats[cle], 2)
+    return sortie
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ÉCRITURE EN FLUX
+# ═══════════════════════════════════════════════════════════════════════════
+
+class EcrivainCSV:
+    """Ajoute chaque bloc au fichier CSV (en-tête au premier bloc)"""
+
+    def __init__(self, chemin, sep=",", decimal="."):
+        self.fichier = open(chemin, "w", encoding="utf-8", newline="")
+        self.sep, self.decimal = sep, decimal
+        self.entete = True
+
+    def ecrire(self, df):
+        df.to_csv(self.fichier, sep=self.sep, decimal=self.decimal, index=False, header=self.entete)
+        self.entete = False
+
+    def fermer(self):
+        self.fichier.close()
+
+
+class EcrivainExcel:
+    """Écriture xlsx en flux (openpyxl write_only : lignes envoyées sur disque)"""
+
+    def __init__(self, chemin):
+        import openpyxl
+
+        self.chemin = chemin
+        self.classeur = openpyxl.Workbook(write_only=True)
+        self.feuille = self.classeur.create_sheet("Tarification")
+        self.entete = True
+
+    def ecrire(self, df):
+        if self.entete:
+            self.feuille.append(list(df.columns))
+            self.entete = False
+        for ligne in df.itertuples(index=False, name=None):
+            self.feuille.append([None if isinstance(v, float) and np.isnan(v) else v for v in ligne])
+
+    def fermer(self):
+        self.classeur.save(self.chemin)
+
+
+def ecrivain(chemin, sep=",", decimal="."):
+    if Path(chemin).suffix.lower() == ".xlsx":
+        return EcrivainExcel(chemin)
+    return EcrivainCSV(chemin, sep, decimal)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# POINT D'ENTRÉE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def tarifer_fichier(entree, sortie, taille_bloc=TAILLE_BLOC, sep=",", decimal=".", rapport=sys.stderr,
+                    processus=1):
+    """Tarife un fichier de missions bloc par bloc ; renvoie le nombre de lignes
+
+    processus : nombre de processus de calcul (1 = dans ce processus,
+    0 ou None = un par cœur).
+    """
+    index = index_pd_partage()
+    calcul = None if processus == 1 else CalculParallele(processus or None)
+    destination = ecrivain(sortie, sep, decimal)
+    debut = time.perf_counter()
+    total = 0
+    try:
+        for bloc in lire_blocs(entree, taille_bloc, sep, decimal):
+            destination.ecrire(tarifer_bloc(bloc, index, calcul))
+            total += len(bloc)
+            if rapport is not None:
+                duree = time.perf_counter() - debut
+                print(f"\r{total:,} lignes  ({total / duree:,.0f} lignes/s)", end="", file=rapport, flush=True)
+    finally:
+        destination.fermer()
+        if calcul is not None:
+            calcul.fermer()
+    if rapport is not None:
+        duree = time.perf_counter() - debut
+        print(f"\r{total:,} lignes tarifées en {duree:.2f} s ({total / max(duree, 1e-9):,.0f} lignes/s)",
+              file=rapport)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tarification par lot des missions ACTERIM")
+    parser.add_argument("entree", help="Fichier de missions (.csv ou .xlsx)")
+    parser.add_argument("-o", "--sortie", required=True, help="Fichier de résultats (.csv ou .xlsx)")
+    parser.add_argument("--taille-bloc", type=int, default=TAILLE_BLOC,
+                        help=f"Lignes traitées par bloc (défaut : {TAILLE_BLOC})")
+    parser.add_argument("--sep", default=",", help="Séparateur CSV (défaut : ',')")
+    parser.add_argument("--decimal", default=".", help="Séparateur décimal CSV (défaut : '.')")
+    parser.add_argument("--processus", type=int, default=1,
+                        help="Processus de calcul (défaut : 1 ; 0 = un par cœur)")
+    args = parser.parse_args(argv)
+    tarifer_fichier(args.entree, args.sortie, args.taille_bloc, args.sep, args.decimal,
+                    processus=args.processus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Modules du simulateur à la racine du dépôt
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def registre():
+    """Registre des barèmes remis dans son état initial (génération suivante) après le test"""
+    import baremes
+
+    _, initiaux = baremes.etat_baremes()
+    yield
+    baremes.restaurer_baremes((baremes.generation + 1, initiaux))
+
+
+def _scenarios_aleatoires(n, graine):
+    """Colonnes d'entrée aléatoires : GD / PD, semaines incomplètes, tranches, PAS, arrondi, cumuls, dates
+
+    Indépendant de bench_simulateur : les tests ne suivent pas les
+    changements du banc d'essai.
+    """
+    rng = np.random.default_rng(graine)
+    # Une semaine sur dix sous 35 h (temps partiel, entrée ou sortie en cours de semaine)
+    h = np.where(rng.random(n) < 0.1, rng.integers(1, 35, n), rng.integers(35, 49, n))
+    semaines_passees = rng.integers(0, 52, n)
+    return {
+        'grand_deplacement': rng.random(n) < 0.5,
+        'payer_ifm': rng.random(n) < 0.8,
+        'payer_iccp': rng.random(n) < 0.8,
+        'attestation_fiscale': rng.random(n) < 0.5,
+        'repas_auto': rng.random(n) < 0.2,
+        'heures_semaine': h,
+        'jours_travailles': rng.integers(1, 8, n),
+        'heures_nuit': rng.integers(0, h + 1),
+        'taux_brut': np.round(rng.uniform(12.02, 80.0, n), 2),
+        'prime_brute': rng.choice([0.0, 50.0, 300.0], n),
+        'nb_repas_gd': rng.integers(0, 8, n),
+        'taux_repas_gd': rng.choice([0.0, 21.40], n),
+        'nb_decouches_gd': rng.integers(0, 8, n),
+        'taux_decouche_gd': rng.choice([0.0, 51.60], n),
+        'nb_repas_pd': rng.integers(0, 6, n),
+        'taux_repas_pd': rng.choice([10.4, 11.0], n),
+        'nb_transport_pd': rng.integers(0, 6, n),
+        'taux_transport_pd': rng.choice([0.0, 5.15, 12.30], n),
+        'nb_prime_trajet': rng.integers(0, 6, n),
+        'taux_prime_trajet': rng.choice([0.0, 7.96], n),
+        'marge_pct': np.round(rng.uniform(5, 30, n), 2),
+        'taux_pas': np.where(rng.random(n) < 0.4, np.round(rng.uniform(0, 20, n), 1), np.nan),
+        'contrat_court': rng.random(n) < 0.7,
+        'arrondi_centime': rng.random(n) < 0.5,
+        'date_effet': rng.choice(np.array(['2026-01-05', '2026-06-29', '2026-12-28'], dtype='datetime64[D]'), n),
+        'cumul_brut': np.round(semaines_passees * rng.uniform(400, 2500, n), 2),
+        'cumul_heures': semaines_passees * 35.0,
+        'cumul_plafond': semaines_passees * 925.0,
+        'cumul_rgdu': np.round(semaines_passees * rng.uniform(0, 150, n), 2),
+    }
+
+
+@pytest.fixture(scope="session")
+def scenarios():
+    """scenarios(n, graine) : colonnes d'entrée aléatoires de simuler_lot"""
+    return _scenarios_aleatoires
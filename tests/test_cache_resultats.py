@@ -0,0 +1,55 @@
+"""Cache des résultats : invalidation par département au rechargement de la base PD, barème remplacé"""
+
+from dataclasses import replace
+
+import numpy as np
+
+from baremes import BAREME_2026, enregistrer_bareme
+from base_pd import NIVEAUX, IndexBasePD, comparer_index_pd
+from cache_resultats import CacheResultats, version_pd
+from moteur_paie import ParametresSimulation, SimulationIncrementale, simuler
+
+
+def _index(taux_06=14.0, taux_13=13.5):
+    taux = np.array([[taux_06] * len(NIVEAUX), [taux_13] * len(NIVEAUX)])
+    zones = np.full((2, 6), 1.5)
+    return IndexBasePD.depuis_tampon(("06", "13"), np.concatenate(
+        [taux.ravel(), zones.ravel(), zones.ravel(), np.array([10.0, np.nan])]))
+
+
+def test_rechargement_invalide_seulement_les_departements_modifies():
+    cache, ancien, nouveau = CacheResultats(), _index(), _index(taux_06=15.0)
+    gd = ParametresSimulation(heures_semaine=41)
+    pd_06 = replace(gd, grand_deplacement=False, taux_brut=14.0)
+    pd_13 = replace(pd_06, taux_brut=13.5)
+    scenarios = ((gd, None), (pd_06, version_pd(ancien, "06")), (pd_13, version_pd(ancien, "13")))
+    for p, version in scenarios:
+        cache.simuler(p, version)
+
+    assert cache.invalider_departements(comparer_index_pd(ancien, nouveau).departements) == 1
+    for p, version in scenarios:
+        cache.simuler(p, version)
+    assert cache.statistiques()['succes'] == 2          # GD et PD 13 toujours servis
+    # Nouvelle version du 06 : nouvelle clé, même si l'entrée n'avait pas été évincée
+    assert version_pd(nouveau, "06") != version_pd(ancien, "06")
+    assert version_pd(nouveau, "13") == version_pd(ancien, "13")
+
+
+def test_version_departement_absent_ou_avec_nan():
+    index = _index()
+    assert index.version_departement("99") is None
+    assert _index().version_departement("13") == index.version_departement("13")   # NaN comparé par octets
+
+
+def test_bareme_remplace_a_la_meme_date(registre):
+    # Même date d'effet, SMIC différent : ni le graphe de la session ni le cache ne gardent l'ancien
+    p = ParametresSimulation(heures_semaine=41, date_effet=BAREME_2026.date_effet)
+    session, cache = SimulationIncrementale(), CacheResultats()
+    avant = session.simuler(p)
+    assert cache.simuler(p, calcul=session.simuler) == avant
+
+    enregistrer_bareme(replace(BAREME_2026, smic_horaire=12.50))
+    apres = simuler(p)
+    assert apres.trois_smic != avant.trois_smic
+    assert session.simuler(p) == apres
+    assert cache.simuler(p, calcul=session.simuler) == apres
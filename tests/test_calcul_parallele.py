@@ -0,0 +1,69 @@
+"""Calcul multi-processus : mêmes résultats que moteur_vectoriel.simuler_lot"""
+
+from dataclasses import replace
+from datetime import date
+
+import numpy as np
+import pytest
+
+from baremes import BAREME_2026, enregistrer_bareme
+from calcul_parallele import CalculParallele, types_sortie
+from moteur_vectoriel import simuler_lot
+
+N = 1001
+
+
+@pytest.fixture(scope="module")
+def calcul():
+    # Tranches courtes : plusieurs tranches par processus, dernière incomplète
+    with CalculParallele(processus=2, taille_tranche=128) as calcul:
+        yield calcul
+
+
+@pytest.fixture(scope="module")
+def colonnes(scenarios):
+    colonnes = scenarios(N, 11)
+    colonnes.update({
+        # Colonnes scalaires : transmises comme constantes, hors mémoire partagée
+        'taux_accident': 0.045,
+        'nb_repas_pd': 3,
+    })
+    return colonnes
+
+
+def test_identique_a_simuler_lot(calcul, colonnes):
+    attendu = simuler_lot(colonnes, N)
+    resultats = calcul.simuler_lot(colonnes, N)
+    assert resultats.keys() == attendu.keys()
+    for nom, colonne in attendu.items():
+        assert resultats[nom].dtype == colonne.dtype, nom
+        np.testing.assert_array_equal(resultats[nom], colonne, err_msg=nom)
+
+
+def test_pool_reutilise_et_sorties_restreintes(calcul, colonnes):
+    sorties = ['net_imposable', 'retenue_source', 'est_au_dessus_plafond']
+    attendu = simuler_lot(colonnes, N)
+    for _ in range(2):
+        resultats = calcul.simuler_lot(colonnes, N, sorties=sorties)
+        assert list(resultats) == sorties
+        for nom in sorties:
+            np.testing.assert_array_equal(resultats[nom], attendu[nom], err_msg=nom)
+
+
+def test_lot_vide_et_sortie_inconnue(calcul):
+    vide = calcul.simuler_lot({'heures_semaine': np.empty(0)})
+    assert all(len(v) == 0 and v.dtype == types_sortie()[nom] for nom, v in vide.items())
+    with pytest.raises(KeyError):
+        calcul.simuler_lot({'heures_semaine': [35]}, sorties=['inconnue'])
+
+
+def test_bareme_enregistre_apres_demarrage_du_pool(calcul, colonnes, registre):
+    calcul.simuler_lot(colonnes, N)         # processus démarrés avec le seul barème 2026
+    enregistrer_bareme(replace(BAREME_2026, date_effet=date(2026, 7, 1), libelle="Barème juillet 2026",
+                               smic_horaire=12.50, pmss=4100))
+    colonnes = dict(colonnes, date_effet=np.where(np.arange(N) % 2, '2026-09-07', '2026-03-02'))
+    attendu = simuler_lot(colonnes, N)
+    resultats = calcul.simuler_lot(colonnes, N)
+    for nom, colonne in attendu.items():
+        np.testing.assert_array_equal(resultats[nom], colonne, err_msg=nom)
+    assert len(np.unique(attendu['plafond_ss'] / colonnes['jours_travailles'])) == 2
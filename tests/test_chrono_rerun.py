@@ -0,0 +1,116 @@
+"""Chronométrage des reruns : clôture unique, étapes, centiles, compteur d'envois"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from chrono_rerun import ChronoRerun
+
+
+def test_clore_une_seule_fois():
+    chrono = ChronoRerun()
+    clotures = []
+    chrono.demarrer()
+    chrono.a_la_cloture(clotures.append)
+    with chrono.etape("paie"):
+        pass
+    chrono.clore()      # avant un st.rerun()
+    chrono.clore()      # fin de script
+    chrono.demarrer()
+    assert clotures == [chrono]
+    assert len(chrono.historique) == 1
+
+
+def test_rerun_interrompu_clos_au_suivant():
+    chrono = ChronoRerun()
+    clotures = []
+    chrono.demarrer()
+    chrono.a_la_cloture(lambda c: clotures.append(c.total))
+    try:
+        with chrono.etape("section"):
+            time.sleep(0.01)
+            raise RuntimeError("exception du script")
+    except RuntimeError:
+        pass
+    fin_derniere_etape = chrono.fin - chrono.debut
+    time.sleep(0.05)                # attente du rerun suivant : pas comptée
+    chrono.demarrer()
+    assert clotures == [fin_derniere_etape]
+    assert 0.01 <= chrono.historique[-1] < 0.05
+    assert chrono.etapes == {} and chrono.en_cours
+
+
+def test_premier_rerun_sans_cloture():
+    chrono = ChronoRerun()
+    chrono.demarrer()
+    assert len(chrono.historique) == 0
+
+
+def test_etapes_cumulees_et_autres():
+    chrono = ChronoRerun()
+    chrono.demarrer()
+    with chrono.etape("section"):
+        time.sleep(0.01)
+    with chrono.etape("paie"):
+        pass
+    with chrono.etape("section"):       # étape qui revient : durée cumulée
+        time.sleep(0.01)
+    time.sleep(0.02)                    # hors étapes : sidebar, widgets...
+    chrono.clore()
+    assert list(chrono.etapes) == ["section", "paie"]
+    assert chrono.etapes["section"] >= 0.02
+    assert chrono.autres == pytest.approx(chrono.total - sum(chrono.etapes.values()))
+    assert chrono.autres >= 0.02
+    chrono.ajouter("section", 1.0)      # étapes plus longues que le rerun : pas de temps négatif
+    assert chrono.autres == 0.0
+
+
+def test_centiles_sur_la_fenetre():
+    chrono = ChronoRerun(fenetre=100)
+    assert chrono.centiles() == (0.0, 0.0)
+    for duree in range(1, 201):         # seuls les 100 derniers reruns (101 à 200) comptent
+        chrono.historique.append(duree / 1000)
+    assert len(chrono.historique) == 100
+    assert chrono.centiles() == pytest.approx((0.1505, 0.19505))
+    assert chrono.centiles((0, 100)) == pytest.approx((0.101, 0.2))
+
+
+class _Message:
+    def __init__(self, type, taille):
+        self.type, self.taille = type, taille
+
+    def WhichOneof(self, _):
+        return self.type
+
+    def ByteSize(self):
+        return self.taille
+
+
+def _contexte(monkeypatch, ctx):
+    monkeypatch.setattr("streamlit.runtime.scriptrunner.get_script_run_ctx", lambda: ctx)
+
+
+def test_envois_comptes_puis_debranches(monkeypatch):
+    envoyes = []
+    ctx = SimpleNamespace(_enqueue=envoyes.append)
+    _contexte(monkeypatch, ctx)
+    chrono = ChronoRerun()
+    chrono.demarrer(compter_envois=True)
+    ctx._enqueue(_Message('delta', 120))
+    ctx._enqueue(_Message('page_info_changed', 30))
+    assert (chrono.elements, chrono.octets) == (1, 150)
+    assert len(envoyes) == 2
+    chrono.demarrer()
+    assert ctx._enqueue == envoyes.append
+    assert chrono.octets is None
+
+
+def test_envois_non_disponibles_sans_enqueue(monkeypatch):
+    # Version de Streamlit sans ScriptRunContext._enqueue : le panneau affiche « non disponible »
+    _contexte(monkeypatch, SimpleNamespace())
+    chrono = ChronoRerun()
+    chrono.demarrer(compter_envois=True)
+    assert chrono.elements is None and chrono.octets is None
+    chrono.clore()
+    assert len(chrono.historique) == 1
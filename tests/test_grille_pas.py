@@ -0,0 +1,76 @@
+"""Retenue à la source : recherche de la tranche du taux neutre, taux individualisé"""
+
+import numpy as np
+import pytest
+
+from baremes import BAREME_2026, HEURES_MOIS, bareme_au
+from moteur_paie import ParametresSimulation, _base_pas, simuler
+from moteur_vectoriel import simuler_lot
+
+BAREME = bareme_au(None)
+GRILLE = BAREME_2026.grille_pas
+TAUX_2000 = 2.9 / 100   # tranche de 2000 € mensuels (seuil 1911)
+
+
+def _taux_neutre(net_imposable, heures_semaine=HEURES_MOIS, contrat_court=False):
+    return _base_pas(BAREME, net_imposable, heures_semaine, None, contrat_court, False)
+
+
+@pytest.mark.parametrize("seuil, taux", GRILLE[1:])
+def test_bornes_des_tranches(seuil, taux):
+    precedent = GRILLE[GRILLE.index((seuil, taux)) - 1][1]
+    # Le seuil appartient à la tranche qu'il ouvre
+    assert _taux_neutre(seuil) == (seuil, taux / 100)
+    assert _taux_neutre(seuil - 0.01)[1] == precedent / 100
+
+
+def test_premiere_et_derniere_tranche():
+    assert _taux_neutre(0.01)[1] == 0.0
+    assert _taux_neutre(1_000_000)[1] == GRILLE[-1][1] / 100
+
+
+def test_grille_proratisee_aux_heures():
+    prorata = 35 / HEURES_MOIS
+    for seuil, taux in GRILLE[1:]:
+        assert _taux_neutre((seuil + 1) * prorata, heures_semaine=35)[1] == taux / 100
+        assert _taux_neutre((seuil - 1) * prorata, heures_semaine=35)[1] < taux / 100
+
+
+def test_abattement_contrat_court():
+    abattement = BAREME.abattement_pas
+    assert abattement == pytest.approx(0.5 * BAREME_2026.smic_horaire * HEURES_MOIS)
+    # 2000 € sans abattement : tranche à 2,9 % ; abattu de la moitié du SMIC : tranche à 0 %
+    assert _taux_neutre(2000) == (2000, TAUX_2000)
+    base, taux = _taux_neutre(2000, contrat_court=True)
+    assert base == 2000 - abattement and taux == 0.0
+
+
+@pytest.mark.parametrize("net_imposable", [0.0, -50.0, 300.0])
+def test_base_nulle_ou_negative(net_imposable):
+    base, taux = _taux_neutre(net_imposable, contrat_court=True)
+    assert base <= 0 and taux == 0.0
+    assert _base_pas(BAREME, net_imposable, 0, None, False, False)[1] == 0.0
+
+
+@pytest.mark.parametrize("contrat_court", [False, True])
+def test_taux_individualise(contrat_court):
+    # Appliqué tel quel au net imposable, sans abattement ni grille
+    assert _base_pas(BAREME, 2000, 35, 7.5, contrat_court, False) == (2000, 0.075)
+    assert _base_pas(BAREME, 2000, 35, 0.0, contrat_court, False) == (2000, 0.0)
+    # NaN (colonne de lot sans taux) : grille du taux neutre
+    assert _base_pas(BAREME, 2000, HEURES_MOIS, float('nan'), False, False) == (2000, TAUX_2000)
+
+
+@pytest.mark.parametrize("contrat_court", [False, True])
+@pytest.mark.parametrize("arrondi_centime", [False, True])
+def test_lot_meme_tranche_que_le_moteur_unitaire(contrat_court, arrondi_centime):
+    taux_bruts = np.round(np.arange(12.02, 400.0, 0.37), 2)
+    lot = simuler_lot({'taux_brut': taux_bruts, 'heures_semaine': 39, 'contrat_court': contrat_court,
+                       'arrondi_centime': arrondi_centime, 'taux_pas': np.nan})
+    unitaires = [simuler(ParametresSimulation(taux_brut=float(t), heures_semaine=39, contrat_court=contrat_court,
+                                              arrondi_centime=arrondi_centime))
+                 for t in taux_bruts]
+    np.testing.assert_array_equal(lot['taux_pas_applique'], [r.taux_pas_applique for r in unitaires])
+    np.testing.assert_array_equal(lot['retenue_source'], [r.retenue_source for r in unitaires])
+    # Le balayage traverse la plupart des tranches de la grille
+    assert len(np.unique(lot['taux_pas_applique'])) > len(GRILLE) // 2
@@ -0,0 +1,93 @@
+"""Grille tarifaire : une seule construction partagée, reprise après un rechargement, suivi du barème ;
+CA HT, taux de facturation et coefficient recalculés ensemble pour une autre marge"""
+
+import io
+import threading
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import grille_tarifaire
+from base_pd import index_pd_partage
+from moteur_paie import ParametresSimulation
+
+PARAMETRES = ParametresSimulation(nb_refactu=3, taux_refactu=25.0)
+
+
+@pytest.fixture
+def construction(monkeypatch):
+    """construire_grille remplacé par un calcul bloqué jusqu'à liberer.set()"""
+    etat = {'index': "A", 'bareme': "v1", 'appels': [], 'liberer': threading.Event()}
+
+    def construire(index):
+        etat['appels'].append(index)
+        assert etat['liberer'].wait(5)
+        return f"grille {index}"
+
+    monkeypatch.setattr(grille_tarifaire, 'construire_grille', construire)
+    monkeypatch.setattr(grille_tarifaire, 'index_pd_partage', lambda: etat['index'])
+    monkeypatch.setattr(grille_tarifaire, 'version_bareme', lambda: etat['bareme'])
+    monkeypatch.setattr(grille_tarifaire, '_grille_partagee', None)
+    monkeypatch.setattr(grille_tarifaire, '_construction', None)
+    monkeypatch.setattr(grille_tarifaire, '_perimee', False)
+    return etat
+
+
+def test_une_seule_construction_pour_plusieurs_reruns(construction):
+    for _ in range(5):
+        grille_tarifaire.precalculer_grille()
+    construction['liberer'].set()
+    assert grille_tarifaire.grille_partagee() == "grille A"
+    grille_tarifaire.precalculer_grille()
+    assert construction['appels'] == ["A"]
+
+
+def test_rechargement_pendant_la_construction(construction):
+    grille_tarifaire.precalculer_grille()
+    while not construction['appels']:
+        threading.Event().wait(0.001)
+    construction['index'] = "B"
+    grille_tarifaire._sur_rechargement(None)    # la grille en cours vient de l'ancien index
+    construction['liberer'].set()
+    assert grille_tarifaire.grille_partagee() == "grille B"
+    assert construction['appels'] == ["A", "B"]
+
+
+def test_changement_de_bareme(construction):
+    construction['liberer'].set()
+    assert grille_tarifaire.grille_partagee() == "grille A"
+    construction['bareme'] = "v2"
+    construction['index'] = "B"
+    assert grille_tarifaire.grille_partagee() == "grille B"
+
+
+@pytest.fixture(scope="module")
+def grille():
+    return grille_tarifaire.construire_grille(index_pd_partage(), heures=(35, 41), parametres=PARAMETRES)
+
+
+@pytest.mark.parametrize("marge_pct", [PARAMETRES.marge_pct, 5.0, 30.0])
+def test_autre_marge_colonnes_coherentes(grille, marge_pct):
+    df = grille.tableau(departements=["13", "75"], marge_pct=marge_pct)
+    refacturation = PARAMETRES.nb_refactu * PARAMETRES.taux_refactu
+    np.testing.assert_allclose(df['ca_ht'], df['cout_total'] / (1 - marge_pct / 100) + refacturation, rtol=1e-12)
+    np.testing.assert_allclose(df['taux_facturation'], df['ca_ht'] / df['heures'], rtol=1e-12)
+    np.testing.assert_allclose(df['coefficient'], df['taux_facturation'] / df['taux_brut'], rtol=1e-12)
+
+    # Mêmes valeurs qu'une grille calculée directement à cette marge
+    directe = grille_tarifaire.construire_grille(index_pd_partage(), heures=(35, 41),
+                                                 parametres=replace(PARAMETRES, marge_pct=marge_pct))
+    attendu = directe.tableau(departements=["13", "75"])
+    pd.testing.assert_frame_equal(df, attendu, rtol=1e-12)
+
+
+def test_export_a_la_marge_demandee(grille):
+    tampon = io.StringIO()
+    grille.exporter(tampon, "csv", marge_pct=30.0)
+    df = pd.read_csv(io.StringIO(tampon.getvalue()), dtype={'departement': str})
+    attendu = grille.tableau(marge_pct=30.0).round(2)
+    for nom in ('ca_ht', 'taux_facturation', 'coefficient'):
+        np.testing.assert_allclose(df[nom], attendu[nom], atol=0.006, err_msg=nom)
+    assert not np.allclose(df['coefficient'], grille.tableau()['coefficient'].round(2))
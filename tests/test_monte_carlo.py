@@ -0,0 +1,57 @@
+"""Risque sur heures variables : marge réalisée hors refacturation"""
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from moteur_paie import ParametresSimulation, simuler
+from monte_carlo import Discrete, Normale, simuler_risque
+
+SANS_REFACTURATION = ParametresSimulation()
+AVEC_REFACTURATION = ParametresSimulation(nb_refactu=3, taux_refactu=25.0)
+
+
+@pytest.mark.parametrize("p", [SANS_REFACTURATION, AVEC_REFACTURATION])
+def test_devis_retrouve_sa_marge(p):
+    # Toutes les semaines tirées valent le devis : marge réalisée = marge du devis
+    d = simuler_risque(p, {'heures_semaine': Discrete((p.heures_semaine,))}, n=1000)
+    marge = d.estimateurs['marge_realisee_pct']
+    assert marge.mini == pytest.approx(p.marge_pct, abs=1e-9)
+    assert marge.maxi == pytest.approx(p.marge_pct, abs=1e-9)
+    assert d.sous_marge == 0
+
+
+def test_marge_de_chaque_semaine_hors_refacturation():
+    p = AVEC_REFACTURATION
+    heures = (36.0, 41.0, 47.5)
+    d = simuler_risque(p, {'heures_semaine': Discrete(heures)}, n=3000)
+    devis = simuler(p)
+    attendues = []
+    for h in heures:
+        r = simuler(replace(p, heures_semaine=h))
+        ventes = devis.taux_fact_comptable * h - r.ca_refactu
+        attendues.append(100 * (1 - r.cout_total_comptable / ventes))
+    marge = d.estimateurs['marge_realisee_pct']
+    assert marge.mini == pytest.approx(min(attendues), abs=1e-9)
+    assert marge.maxi == pytest.approx(max(attendues), abs=1e-9)
+
+
+def test_refacturation_ne_gonfle_pas_la_marge():
+    lois = {'heures_semaine': Normale(41, 3, 35, 48, pas=0.5)}
+    sans = simuler_risque(SANS_REFACTURATION, lois, n=20_000)
+    avec = simuler_risque(AVEC_REFACTURATION, lois, n=20_000)
+    # Même coût tiré, refacturation neutre pour la marge : même part de semaines sous la marge
+    assert avec.part_sous_marge == pytest.approx(sans.part_sous_marge, abs=0.01)
+    assert np.isclose(avec.quantiles('marge_realisee_pct', (0.5,)), 17.0).all()
+
+
+def test_marge_saisie_remplace_celle_du_scenario():
+    # Marge changée dans le fragment facturation depuis le dernier rerun complet
+    lois = {'heures_semaine': Normale(41, 3, 35, 48, pas=0.5)}
+    d = simuler_risque(AVEC_REFACTURATION, lois, n=5000, marge_pct=25.0)
+    attendu = simuler_risque(replace(AVEC_REFACTURATION, marge_pct=25.0), lois, n=5000)
+    assert d.marge_pct == 25.0
+    assert d.taux_fact == attendu.taux_fact == simuler(replace(AVEC_REFACTURATION, marge_pct=25.0)).taux_fact_comptable
+    assert d.sous_marge == attendu.sous_marge
+    np.testing.assert_array_equal(d.quantiles('marge_realisee_pct'), attendu.quantiles('marge_realisee_pct'))
@@ -0,0 +1,104 @@
+"""Moteur vectoriel : mêmes résultats, au bit près, que moteur_paie.simuler"""
+
+from dataclasses import fields
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from baremes import bareme_au
+from moteur_paie import ParametresSimulation, ResultatSimulation, simuler
+from moteur_vectoriel import simuler_lot
+
+N = 3000
+
+
+def _parametres(colonnes, i):
+    """Paramètres unitaires de la ligne i (taux_pas NaN → None, date NumPy → date)"""
+    valeurs = {nom: colonne[i].item() for nom, colonne in colonnes.items()}
+    if valeurs['taux_pas'] != valeurs['taux_pas']:
+        valeurs['taux_pas'] = None
+    if not isinstance(valeurs['date_effet'], date):
+        valeurs['date_effet'] = None
+    return ParametresSimulation(**valeurs)
+
+
+def _egaux(a, b):
+    return a == b or (a != a and b != b)
+
+
+@pytest.mark.parametrize("graine", [0, 1, 2])
+def test_lot_identique_au_moteur_unitaire(scenarios, graine):
+    colonnes = scenarios(N, graine)
+    lot = simuler_lot(colonnes, N)
+    noms = [f.name for f in fields(ResultatSimulation) if f.name in lot]
+    assert {'taux_pas_applique', 'tranche_b', 'assiette_cet', 'rgdu'} <= set(noms)
+
+    ecarts = []
+    for i in range(N):
+        unitaire = simuler(_parametres(colonnes, i))
+        ecarts += [(i, nom, getattr(unitaire, nom), lot[nom][i])
+                   for nom in noms if not _egaux(getattr(unitaire, nom), lot[nom][i])]
+    assert ecarts[:5] == []
+
+
+@pytest.mark.parametrize("arrondi_centime", [False, True])
+def test_colonnes_scalaires_diffusees(scenarios, arrondi_centime):
+    """Une colonne scalaire vaut la même valeur répétée sur tout le lot"""
+    colonnes = scenarios(50, 7)
+    colonnes['arrondi_centime'] = arrondi_centime
+    colonnes['taux_pas'] = 7.5
+    lot = simuler_lot(colonnes, 50)
+    repetees = dict(colonnes, arrondi_centime=np.full(50, arrondi_centime), taux_pas=np.full(50, 7.5))
+    attendu = simuler_lot(repetees, 50)
+    for nom, colonne in attendu.items():
+        np.testing.assert_array_equal(lot[nom], colonne, err_msg=nom)
+
+
+def test_arrondi_centime_montants_au_centime(scenarios):
+    colonnes = scenarios(500, 3)
+    colonnes['arrondi_centime'] = True
+    lot = simuler_lot(colonnes, 500)
+    for nom in ('brut_total', 'net_imposable', 'retenue_source'):
+        np.testing.assert_array_equal(lot[nom], np.round(lot[nom], 2), err_msg=nom)
+
+
+def _somme_exacte(lignes, signes):
+    """Somme décimale exacte des lignes affichées (sans erreur d'arrondi flottant)"""
+    return sum(Decimal(repr(float(ligne))) * int(signe) for ligne, signe in zip(lignes, signes))
+
+
+def test_arrondi_centime_total_egal_somme_des_lignes(scenarios):
+    """Mode bulletin : chaque total vaut au centime près la somme des lignes arrondies"""
+    colonnes = scenarios(300, 4)
+    colonnes['arrondi_centime'] = np.full(300, True)
+    lot = simuler_lot(colonnes, 300)
+    salariales, patronales = bareme_au(None).salariales, bareme_au(None).patronales
+    for i in range(300):
+        unitaire = simuler(_parametres(colonnes, i))
+        lignes = [getattr(unitaire, nom) for nom in salariales.noms]
+        assert _somme_exacte(lignes, salariales.signes) == Decimal(repr(unitaire.cotis_salar)), i
+        total_patron = _somme_exacte(unitaire.charges_patron, patronales.signes)
+        assert total_patron == Decimal(repr(unitaire.cotis_patron_brutes)), i
+        lignes_lot = [lot[nom][i] for nom in salariales.noms]
+        assert _somme_exacte(lignes_lot, salariales.signes) == Decimal(repr(float(lot['cotis_salar'][i]))), i
+        assert Decimal(repr(float(lot['cotis_patron_brutes'][i]))) == total_patron, i
+
+
+@pytest.mark.parametrize("arrondi_centime", [False, True])
+def test_semaine_incomplete(arrondi_centime):
+    """Moins de 35 h : heures normales = heures travaillées, sans heures supplémentaires"""
+    heures = np.array([4.0, 7.0, 21.5, 34.75, 35.0, 41.0, 48.0])
+    colonnes = {'heures_semaine': heures, 'heures_nuit': 0, 'jours_travailles': 3,
+                'taux_brut': 14.0, 'arrondi_centime': arrondi_centime}
+    lot = simuler_lot(colonnes, len(heures))
+    np.testing.assert_array_equal(lot['h_normales'], np.minimum(heures, 35))
+    assert (lot['brut_sup_total'][heures <= 35] == 0).all()
+    assert (np.diff(lot['brut_normales']) >= 0).all()
+    for i, h in enumerate(heures):
+        unitaire = simuler(ParametresSimulation(heures_semaine=h, heures_nuit=0, jours_travailles=3,
+                                                taux_brut=14.0, arrondi_centime=arrondi_centime))
+        assert unitaire.h_normales == min(h, 35)
+        for nom, colonne in lot.items():
+            assert _egaux(getattr(unitaire, nom), colonne[i]), (h, nom)
@@ -0,0 +1,82 @@
+"""Paie sur plusieurs semaines : régularisation progressive des tranches, du CET et de la RGDU"""
+
+from dataclasses import replace
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from baremes import bareme_au
+from moteur_paie import ParametresSimulation, calculer_rgdu
+from paie_cumulee import PaieCumulee, simuler_semaines_lot
+
+LUNDI = date(2026, 1, 5)
+SEMAINE = ParametresSimulation(heures_semaine=35, taux_brut=16.0, jours_travailles=5, date_effet=LUNDI)
+
+
+def _periode(taux_bruts, **champs):
+    """Semaines successives d'un salarié ; renvoie (paramètres, résultats)"""
+    semaines = [replace(SEMAINE, taux_brut=t, date_effet=LUNDI + timedelta(weeks=k), **champs)
+                for k, t in enumerate(taux_bruts)]
+    paie = PaieCumulee()
+    return semaines, [paie.ajouter_semaine(p) for p in semaines]
+
+
+def _bulletin_cumule(table, resultats, attestation, valeurs=()):
+    """Cotisations d'un seul bulletin sur les montants cumulés de la période"""
+    brut = sum(r.brut_total for r in resultats)
+    plafond = sum(r.plafond_ss for r in resultats)
+    bases = {
+        'tranche_a': min(brut, plafond),
+        'tranche_b': max(0.0, brut - plafond),
+        'assiette_cet': brut if brut > plafond else 0.0,
+    }
+    bases = [bases[a] if a in bases else sum(getattr(r, a) for r in resultats) for a in table.assiettes]
+    return table.montants(bases, attestation, brut > plafond, valeurs)
+
+
+# Semaine 1 au-dessus du plafond puis repassée dessous, restée au-dessus, passée au-dessus
+@pytest.mark.parametrize("taux_bruts", [(16.0, 12.02), (16.0, 16.0), (12.02, 25.0), (16.0, 12.02, 12.02, 25.0)])
+@pytest.mark.parametrize("attestation", [True, False])
+def test_periode_egale_un_bulletin_sur_les_cumuls(taux_bruts, attestation):
+    semaines, resultats = _periode(taux_bruts, attestation_fiscale=attestation)
+    bareme = bareme_au(LUNDI)
+
+    attendu = _bulletin_cumule(bareme.salariales, resultats, attestation)
+    for nom, montant in zip(bareme.salariales.noms, attendu):
+        assert sum(getattr(r, nom) for r in resultats) == pytest.approx(montant, abs=1e-9), nom
+    assert sum(r.cotis_salar for r in resultats) == pytest.approx(bareme.salariales.total(attendu), abs=1e-9)
+
+    attendu = _bulletin_cumule(bareme.patronales, resultats, True, (SEMAINE.taux_accident,))
+    for i, montant in enumerate(attendu):
+        assert sum(r.charges_patron[i] for r in resultats) == pytest.approx(montant, abs=1e-9)
+    assert sum(r.cotis_patron_brutes for r in resultats) == pytest.approx(bareme.patronales.total(attendu), abs=1e-9)
+
+
+def test_retour_sous_le_plafond_regularise_tranche_b_et_cet():
+    _, (r1, r2) = _periode((16.0, 12.02))
+    assert r1.tranche_b == pytest.approx(10.10) and r1.comp_t2 > 0 and r1.cet > 0
+    assert r2.tranche_b == pytest.approx(-10.10)
+    assert r2.comp_t2 == pytest.approx(-r1.comp_t2)
+    assert r2.cet == pytest.approx(-r1.cet)
+    assert r1.comp_t1 + r2.comp_t1 == pytest.approx(0.0401 * (r1.brut_total + r2.brut_total))
+
+
+def test_rgdu_cumulee_egale_rgdu_de_la_periode():
+    semaines, resultats = _periode((12.02, 13.5, 16.0, 12.02, 30.0, 12.5))
+    bareme = bareme_au(LUNDI)
+    _, rgdu, _, _ = calculer_rgdu(sum(r.brut_total for r in resultats), sum(p.heures_semaine for p in semaines),
+                                  bareme.smic_horaire, bareme.rgdu_t_min, bareme.rgdu_t_max, bareme.rgdu_t_delta)
+    assert sum(r.rgdu for r in resultats) == pytest.approx(rgdu, abs=1e-9)
+
+
+def test_lot_egal_unitaire_semaine_apres_semaine():
+    taux = np.array([[16.0, 12.02, 12.02, 25.0], [12.02, 25.0, 12.02, 16.0], [30.0, 12.02, 12.02, 12.02]])
+    salaries = [_periode(t)[1] for t in taux]
+    colonnes = [{'heures_semaine': 35, 'taux_brut': taux[:, k], 'jours_travailles': 5,
+                 'date_effet': LUNDI + timedelta(weeks=k)} for k in range(taux.shape[1])]
+    for k, (lot, _) in enumerate(simuler_semaines_lot(colonnes)):
+        for nom in ('tranche_a', 'tranche_b', 'assiette_cet', 'est_au_dessus_plafond', 'comp_t2', 'cet',
+                    'cotis_salar', 'cotis_patron_brutes', 'rgdu', 'cout_total_comptable'):
+            np.testing.assert_array_equal(lot[nom], [getattr(s[k], nom) for s in salaries],
+                                          err_msg=f"semaine {k}, {nom}")
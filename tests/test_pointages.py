@@ -0,0 +1,99 @@
+"""Agrégation des pointages : mêmes semaines quelle que soit la taille des blocs"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pointages import AgregateurPointages, lire_semaines
+
+LUNDI = date(2026, 1, 5)
+
+
+@pytest.fixture(scope="module")
+def pointages():
+    """Export chronologique : 8 salariés sur 3 semaines, journées coupées, nuits, GD / PD"""
+    rng = np.random.default_rng(3)
+    lignes = []
+    for jour in range(21):
+        if jour % 7 == 6:
+            continue
+        quand = LUNDI + timedelta(days=jour)
+        for salarie in rng.permutation(8):
+            if rng.random() < 0.2:
+                continue
+            contexte = {
+                'salarie': f"M{salarie:03d}",
+                # Dates ISO ou françaises selon la ligne
+                'date': quand.isoformat() if rng.random() < 0.7 else quand.strftime('%d/%m/%Y'),
+                'departement': rng.choice(["13", "75", "01"]),
+                'zone_chantier': rng.choice(["Zone 1", "Zone 3", ""]),
+                'type_deplacement': "PD" if salarie % 3 == 0 else "GD",
+                'taux_pas': 7.5 if salarie % 4 == 0 else np.nan,
+            }
+            if salarie % 5 == 0:
+                # Poste de nuit : la fin passe minuit
+                lignes.append(dict(contexte, debut="21:00", fin="05h30"))
+            else:
+                debut = int(rng.integers(6, 9))
+                lignes.append(dict(contexte, debut=f"{debut:02d}:{rng.choice(['00', '30'])}", fin="12:00"))
+                lignes.append(dict(contexte, debut="13h00", fin=f"{int(rng.integers(16, 19))}:00"))
+        if jour == 9:
+            lignes.append(dict(contexte, debut="illisible", fin="12:00"))
+    return pd.DataFrame(lignes)
+
+
+def _agreger(pointages, taille_bloc):
+    agregateur = AgregateurPointages()
+    resultats = [agregateur.ajouter(pointages.iloc[i:i + taille_bloc].reset_index(drop=True))
+                 for i in range(0, len(pointages), taille_bloc)]
+    resultats.append(agregateur.terminer())
+    return pd.concat([r for r in resultats if len(r)], ignore_index=True)
+
+
+def test_semaines_attendues(pointages):
+    semaines = _agreger(pointages, len(pointages))
+    assert semaines['semaine'].unique().tolist() == ['2026-W02', '2026-W03', '2026-W04']
+    assert not semaines.duplicated(['salarie', 'semaine']).any()
+    nuit = semaines['salarie'] == "M005"
+    assert (semaines.loc[nuit, 'heures_nuit'] == semaines.loc[nuit, 'heures_semaine']).all()
+    assert (semaines.loc[semaines['salarie'] == "M003", 'nb_repas_gd'] == 0).all()
+
+
+@pytest.mark.parametrize("taille_bloc", [3, 7, 33, 100, 1000])
+def test_independant_de_la_taille_des_blocs(pointages, taille_bloc):
+    pd.testing.assert_frame_equal(_agreger(pointages, taille_bloc), _agreger(pointages, len(pointages)))
+
+
+@pytest.mark.parametrize("taille_bloc", [16, 64])
+def test_lecture_par_blocs_du_fichier(pointages, tmp_path, taille_bloc):
+    chemin = tmp_path / "pointages.csv"
+    pointages.to_csv(chemin, index=False)
+    attendu = pd.concat(lire_semaines(chemin, taille_bloc=len(pointages)), ignore_index=True)
+    obtenu = pd.concat(lire_semaines(chemin, taille_bloc=taille_bloc), ignore_index=True)
+    pd.testing.assert_frame_equal(obtenu, attendu)
+    assert attendu['departement'].isin(["13", "75", "01"]).all()
+
+
+def test_pointage_apres_cloture(pointages):
+    agregateur = AgregateurPointages()
+    agregateur.ajouter(pointages.iloc[-10:])
+    with pytest.raises(ValueError, match="trié par date"):
+        agregateur.ajouter(pointages.iloc[:10])
+
+
+def test_pointage_de_duree_nulle_ignore():
+    # Pointage en double ou annulé (début = fin) : ni 24 h, ni jour travaillé ; la nuit passe minuit
+    bloc = pd.DataFrame({
+        'salarie': ["A", "A", "A", "B"],
+        'date': ["2026-01-05", "2026-01-05", "2026-01-06", "2026-01-05"],
+        'debut': ["08:00", "12:00", "07:30", "22:00"],
+        'fin': ["12:00", "12:00", "07h30", "06:00"],
+        'departement': "13",
+        'zone_chantier': "Zone 1",
+    })
+    semaines = _agreger(bloc, len(bloc)).set_index('salarie')
+    assert semaines.loc["A", 'heures_semaine'] == 4.0
+    assert semaines.loc["A", 'jours_travailles'] == 1
+    assert semaines.loc["B", 'heures_semaine'] == semaines.loc["B", 'heures_nuit'] == 8.0